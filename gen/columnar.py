@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+'''
+Binary columnar format for data streams
+
+A columnar stream file has a header followed by one fixed-width record per
+tuple (little-endian 32-bit integer for every attribute, in the order of
+attribute list). Header layout:
+- magic string (8 bytes);
+- header size in bytes (uint32, multiple of 8);
+- number of attributes (uint32);
+- number of tuples (uint64);
+- comma separated attribute names (padded with zeros up to header size).
+Tuples are sorted by timestamp (first attribute), so a range of timestamps
+is a contiguous block of records.
+'''
+
+from array import array
+import os
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from gen.directory import WRITE_BUFFER_SIZE
+
+
+# Magic string of columnar stream files
+COLUMNAR_MAGIC = 'SPGCOL01'
+# Fixed part of header (magic, header size, attributes, tuples)
+COLUMNAR_HEADER = struct.Struct('<8sIIQ')
+# Offset of number of tuples in header
+COLUMNAR_ROWS_OFFSET = 16
+# Data type of attribute values
+COLUMNAR_DTYPE = '<i4'
+
+
+def get_columnar_file(filename):
+    '''
+    Return the columnar filename correspondent to a CSV data file
+    '''
+    return os.path.splitext(filename)[0] + '.col'
+
+
+class ColumnarStreamWriter(object):
+    '''
+    Writer of columnar stream files
+    (rows are lists of integers or NumPy integer arrays)
+
+    When append_size is given, the existing file is truncated to that size
+    (discarding incomplete data) and rows are appended
+    '''
+
+    def __init__(self, filename, attribute_list, skip_existing=True,
+                 append_size=None):
+        self.filename = filename
+        self._data_file = None
+        self._columns = len(attribute_list)
+        self._rows = 0
+        # Check if file does not exists
+        self.skipped = skip_existing and append_size is None and \
+            os.path.isfile(filename)
+        if self.skipped:
+            return
+        if append_size is not None:
+            self._data_file = open(filename, 'r+b', WRITE_BUFFER_SIZE)
+            self._data_file.truncate(append_size)
+            header_size = COLUMNAR_HEADER.unpack(
+                self._data_file.read(COLUMNAR_HEADER.size))[1]
+            # Tuples stored before the last complete write
+            self._rows = (append_size - header_size) // \
+                (self._columns * struct.calcsize('<i'))
+            self._data_file.seek(0, os.SEEK_END)
+            return
+        names = ','.join(attribute_list)
+        header_size = COLUMNAR_HEADER.size + len(names)
+        header_size += -header_size % 8
+        self._data_file = open(filename, 'wb', WRITE_BUFFER_SIZE)
+        self._data_file.write(COLUMNAR_HEADER.pack(
+            COLUMNAR_MAGIC, header_size, self._columns, 0))
+        self._data_file.write(
+            names.ljust(header_size - COLUMNAR_HEADER.size, '\0'))
+
+    def write_rows(self, row_list):
+        '''
+        Append rows to file
+        '''
+        if self._data_file is None:
+            return
+        if numpy is not None and isinstance(row_list, numpy.ndarray):
+            self._rows += row_list.shape[0]
+            self._data_file.write(
+                row_list.astype(COLUMNAR_DTYPE).tostring())
+            return
+        values = array('i')
+        for row in row_list:
+            values.extend(row)
+        self._rows += len(values) // self._columns
+        if sys.byteorder == 'big':
+            values.byteswap()
+        self._data_file.write(values.tostring())
+
+    def close(self):
+        '''
+        Store number of tuples, flush buffer and close file
+        '''
+        if self._data_file is not None:
+            self._data_file.seek(COLUMNAR_ROWS_OFFSET)
+            self._data_file.write(struct.pack('<Q', self._rows))
+            self._data_file.close()
+            self._data_file = None
+
+
+def read_columnar_stream(filename):
+    '''
+    Memory-map a columnar stream file (requires NumPy)
+    Return the attribute list and a read-only array with one line per tuple
+    '''
+    data_file = open(filename, 'rb')
+    magic, header_size, columns, rows = \
+        COLUMNAR_HEADER.unpack(data_file.read(COLUMNAR_HEADER.size))
+    names = data_file.read(header_size - COLUMNAR_HEADER.size)
+    data_file.close()
+    if magic != COLUMNAR_MAGIC:
+        raise ValueError('Invalid columnar stream file: ' + filename)
+    att_list = names.rstrip('\0').split(',')
+    if rows == 0:
+        return att_list, numpy.zeros((0, columns), dtype=COLUMNAR_DTYPE)
+    data = numpy.memmap(filename, dtype=COLUMNAR_DTYPE, mode='r',
+                        offset=header_size, shape=(rows, columns))
+    return att_list, data
+
+
+def get_timestamp_range(data, start, end):
+    '''
+    Return the tuples with timestamp between start and end (inclusive)
+    as a view of the memory-mapped array (without copy)
+    '''
+    ts_column = data[:, 0]
+    first = numpy.searchsorted(ts_column, start, side='left')
+    last = numpy.searchsorted(ts_column, end, side='right')
+    return data[first:last]
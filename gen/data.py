@@ -3,150 +3,687 @@
 Data stream generation
 '''
 
+from array import array
+import cPickle as pickle
+import csv
+from itertools import chain, dropwhile, islice
+from multiprocessing import Pool
+import os
 import random
+from resource import getrusage, RUSAGE_SELF
+import shutil
+import time
 
-from gen.directory import write_to_csv, get_data_file, append_to_csv
-from gen.experiment import ATT, NSQ, TS_ATT, PARAMETER, RAN, PCT, \
-    get_attribute_list, get_max_data_timestamp, TUPLE_RATE, MAX_VALUE
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
+from gen.columnar import ColumnarStreamWriter, get_columnar_file
+from gen.directory import CSVStreamWriter, StreamWriterGroup, \
+    get_data_file, get_data_store_file, link_to_file, get_compression, \
+    get_compressed_file, find_file, open_read_file, get_state_file, \
+    unshare_file, get_data_store_timestamps
+from gen.experiment import ATT, NSQ, PARAMETER, PCT, get_start_range, \
+    get_attribute_list, get_max_data_timestamp, TUPLE_RATE, MAX_VALUE, \
+    DATA_ENGINE, PYTHON_ENGINE, NUMPY_ENGINE, GEN_WORKERS, DATA_STORE, \
+    COLUMNAR, FIFO_MODE, CHUNK_ROWS, ZIPF_DIST, HOTSET_DIST, \
+    VERIFY_HASH, get_id_distribution, get_data_key, \
+    get_data_seed, get_projection_source, is_projected_data
+from gen.metadata import META_ROWS, META_TS_RANGE, META_SCHEMA, \
+    META_SEED, META_KEY, get_meta_file, get_valid_metadata, write_atomic, \
+    write_metadata
+from gen.schedule import gen_id_array, schedule_ids, schedule_id_block, \
+    gen_gap_pattern, gen_zipf_weights, gen_hotset_weights, \
+    schedule_weighted_ids
 
-def gen_sequence_id_list(sequence_number):
-    '''
-    Generate the list of all possible identifier for sequences
-    '''
-    # Create the list of identifier records
-    return [{'A1': value} for value in range(sequence_number)]
 
+# Keys of generation state of data files
+# Maximum timestamp generated
+STATE_HORIZON = 'horizon'
+# Number of tuples generated
+STATE_ROWS = 'rows'
+# Data identity (see get_data_key)
+STATE_KEY = 'key'
+# Sizes of CSV and columnar files
+STATE_CSV_SIZE = 'csv_size'
+STATE_COL_SIZE = 'col_size'
+# State of Python random generator
+STATE_RANDOM = 'random'
+# Identifier array (shuffled in place at every instant)
+STATE_IDS = 'ids'
+# NumPy random states of identifiers and values
+STATE_ID_RAND = 'id_rand'
+STATE_VALUE_RAND = 'value_rand'
+# Start timestamps of identifiers (CONSEQ streams)
+STATE_STARTS = 'starts'
 
-def gen_records(configuration, experiment_conf, id_list, timestamp):
+
+def gen_records(configuration, experiment_conf, id_array, timestamp,
+                weight_list=None):
     '''
     Generate records for a timestamp
+    (integer rows in the order _TS, A1, A2, ...)
     '''
     sequences_per_instant = int(experiment_conf[NSQ] *
                                 configuration[TUPLE_RATE])
-    # Randomize list of identifiers
-    random.shuffle(id_list)
-    rec_list = []
+    # Randomize identifiers to be used in this instant
+    if weight_list is None:
+        schedule_ids(id_array, sequences_per_instant)
+    else:
+        id_array = schedule_weighted_ids(weight_list, sequences_per_instant)
     # Loop to count identifier
-    for _ in range(sequences_per_instant):
-        # Get an identifier
-        rec = id_list.pop(0)
-        # Put it back into list
-        id_list.append(rec)
-        # Create new record
-        new_rec = rec.copy()
+    for pos in range(sequences_per_instant):
+        # Create new record with timestamp and identifier
+        new_rec = [timestamp, id_array[pos]]
         # Generate random values for attributes (excluding identifier)
-        for att in range(2, experiment_conf[ATT] + 1):
-            new_rec['A' + str(att)] = \
-                random.randint(0, configuration[MAX_VALUE] - 1)
-        # Include timestamp attribute
-        new_rec[TS_ATT] = timestamp
-        # Append to list
-        rec_list.append(new_rec)
-    return rec_list
-
-
-def generate(timestamp, conseq_percent, start):
-    '''
-    Return if a timestamp must be generated according to
-    percentage consecutive
-    '''
-    if conseq_percent == 0.0 and (timestamp+start) % 2 == 0:
-        return False
-    elif conseq_percent == 0.25 and ((timestamp+start) % 4 == 0 or
-                                     ((timestamp+start) - 1) % 4 == 0):
-        return False
-    elif conseq_percent == 0.5 and (timestamp+start) % 4 == 0:
-        return False
-    elif conseq_percent == 0.75 and (timestamp+start) % 8 == 0:
-        return False
-    else:
-        return True
+        for _ in range(2, experiment_conf[ATT] + 1):
+            new_rec.append(random.randint(0, configuration[MAX_VALUE] - 1))
+        yield new_rec
+
+
+def gen_records_array(configuration, experiment_conf, state, first_ts,
+                      last_ts, chunk_rows=None, weight_list=None):
+    '''
+    Generate records from first_ts to last_ts (inclusive) as integer arrays
+    (one row per tuple, columns in the order _TS, A1, A2, ...)
 
+    Identifiers and values are drawn from independent NumPy random states
+    of the generation state, so records do not depend on how timestamps are
+    split in calls. Without chunk_rows, a single array is generated.
+    Otherwise, arrays have at most chunk_rows rows (or one instant)
+    '''
+    sequences_per_instant = int(experiment_conf[NSQ] *
+                                configuration[TUPLE_RATE])
+    instants = last_ts - first_ts + 1
+    columns = experiment_conf[ATT] + 1
+    id_array = state[STATE_IDS]
+    weight_array = None
+    # Rows of identifier scheduling (all identifiers for weighted choice)
+    schedule_rows = sequences_per_instant
+    if weight_list is not None:
+        weight_array = numpy.array(weight_list)
+        schedule_rows = len(weight_array)
+    if chunk_rows is None:
+        chunk_rows = max(instants * schedule_rows, 1)
+    block_instants = max(chunk_rows // max(schedule_rows, 1), 1)
+    for first in range(first_ts, last_ts + 1, block_instants):
+        last = min(first + block_instants, last_ts + 1)
+        # Randomize identifiers of every instant and take the first ones
+        id_block = numpy.empty((last - first, sequences_per_instant),
+                               dtype=numpy.int64)
+        schedule_id_block(state[STATE_ID_RAND], id_array, id_block,
+                          weight_array)
+        # Split instants larger than chunk
+        for pos in range(0, sequences_per_instant, chunk_rows):
+            end = min(pos + chunk_rows, sequences_per_instant)
+            block = numpy.empty((last - first, end - pos, columns),
+                                dtype=numpy.int64)
+            # Timestamp attribute
+            block[:, :, 0] = numpy.arange(first, last)[:, numpy.newaxis]
+            block[:, :, 1] = id_block[:, pos:end]
+            # Generate random values for attributes (excluding identifier)
+            block[:, :, 2:] = state[STATE_VALUE_RAND].randint(
+                0, configuration[MAX_VALUE],
+                size=(last - first, end - pos, columns - 2))
+            yield block.reshape(-1, columns)
 
-def gen_conseq_records(configuration, experiment_conf,
-                       start_id_list, timestamp):
+
+def gen_conseq_records(configuration, experiment_conf, pattern,
+                       start_list, timestamp):
     '''
     Generate records for a timestamp
+    (integer rows in the order _TS, A1, A2, ...)
     '''
-    rec_list = []
+    period = len(pattern)
     # Loop to count identifier
-    for id_rec, start in start_id_list:
-        if generate(timestamp, experiment_conf[PCT], start):
-            # Create new record
-            new_rec = id_rec.copy()
+    for id_value, start in enumerate(start_list):
+        if pattern[(timestamp + start) % period]:
+            # Create new record with timestamp and identifier
+            new_rec = [timestamp, id_value]
             # Generate random values for attributes (excluding identifier)
-            for att in range(2, experiment_conf[ATT] + 1):
-                new_rec['A' + str(att)] = \
-                    random.randint(0, configuration[MAX_VALUE] - 1)
-            # Include timestamp attribute
-            new_rec[TS_ATT] = timestamp
-            # Append to list
-            rec_list.append(new_rec)
-    return rec_list
+            for _ in range(2, experiment_conf[ATT] + 1):
+                new_rec.append(
+                    random.randint(0, configuration[MAX_VALUE] - 1))
+            yield new_rec
 
 
-def gen_stream(configuration, experiment_conf):
+def gen_conseq_records_array(configuration, experiment_conf, pattern,
+                             state, first_ts, last_ts, chunk_rows=None):
     '''
-    Generate a data stream
+    Generate records from first_ts to last_ts (inclusive) as integer arrays
+    (one row per tuple, columns in the order _TS, A1, A2, ...)
+
+    Without chunk_rows, a single array is generated. Otherwise, every array
+    covers at most chunk_rows pairs of instant and identifier
     '''
-    # Build attribute list
-    att_list = get_attribute_list(experiment_conf[ATT], include_timestamp=True)
-    # Get list of sequence identifiers
-    id_list = gen_sequence_id_list(experiment_conf[NSQ])
+    rand_state = state[STATE_VALUE_RAND]
+    pattern = numpy.frombuffer(pattern, dtype=numpy.uint8)
+    start_array = numpy.array(state[STATE_STARTS], dtype=numpy.int64)
+    instants = last_ts - first_ts + 1
+    sequences = len(start_array)
+    if chunk_rows is None:
+        chunk_rows = max(instants * sequences, 1)
+    id_step = max(min(sequences, chunk_rows), 1)
+    block_instants = max(chunk_rows // id_step, 1)
+    for first in range(first_ts, last_ts + 1, block_instants):
+        ts_array = numpy.arange(first, min(first + block_instants,
+                                           last_ts + 1))
+        # Split instants larger than chunk
+        for first_id in range(0, sequences, id_step):
+            # Matrix of present identifiers (one line per timestamp)
+            offset_matrix = ts_array[:, numpy.newaxis] + \
+                start_array[numpy.newaxis, first_id:first_id + id_step]
+            mask_matrix = pattern[offset_matrix % len(pattern)]
+            ts_index, id_index = numpy.nonzero(mask_matrix)
+            block = numpy.empty((len(ts_index), experiment_conf[ATT] + 1),
+                                dtype=numpy.int64)
+            block[:, 0] = ts_array[ts_index]
+            block[:, 1] = id_index + first_id
+            # Generate random values for attributes (excluding identifier)
+            block[:, 2:] = rand_state.randint(
+                0, configuration[MAX_VALUE],
+                size=(len(ts_index), experiment_conf[ATT] - 1))
+            yield block
+
+
+def _get_engine(configuration):
+    '''
+    Return the configured data generation engine
+    '''
+    engine = configuration.get(DATA_ENGINE, PYTHON_ENGINE)
+    if engine == NUMPY_ENGINE and numpy is None:
+        print 'NumPy not found, using ' + PYTHON_ENGINE + ' engine'
+        engine = PYTHON_ENGINE
+    return engine
+
+
+def _open_stream_writer(configuration, filename, attribute_list,
+                        state=None):
+    '''
+    Open writer for a data stream file
+    (and for its columnar file if configured)
+
+    Files are overwritten, or extended when the generation state of
+    existing files is given
+    '''
+    csv_size = col_size = None
+    if state is not None:
+        csv_size = state[STATE_CSV_SIZE]
+        col_size = state.get(STATE_COL_SIZE)
+    writer = CSVStreamWriter(filename, attribute_list,
+                             get_compression(configuration),
+                             skip_existing=False, append_size=csv_size)
+    if not configuration.get(COLUMNAR, False):
+        return writer
+    col_writer = ColumnarStreamWriter(get_columnar_file(filename),
+                                      attribute_list, skip_existing=False,
+                                      append_size=col_size)
+    return StreamWriterGroup([writer, col_writer])
+
+
+def _get_id_weights(configuration, experiment_conf):
+    '''
+    Return the popularity weights of identifiers
+    (None for uniform distribution)
+    '''
+    distribution, par_tuple = get_id_distribution(configuration)
+    if distribution == ZIPF_DIST:
+        return gen_zipf_weights(experiment_conf[NSQ], *par_tuple)
+    elif distribution == HOTSET_DIST:
+        return gen_hotset_weights(experiment_conf[NSQ], *par_tuple)
+    return None
+
+
+def _write_arrays(writer, array_iter):
+    '''
+    Write a sequence of NumPy arrays
+    Return the number of rows
+    '''
+    rows = 0
+    for rec_array in array_iter:
+        writer.write_rows(rec_array)
+        rows += rec_array.shape[0]
+    return rows
+
+
+def _write_records(writer, rec_iter, chunk_rows=None):
+    '''
+    Write records in chunks with at most chunk_rows records
+    (all records at once without chunk_rows)
+    Return the number of rows
+    '''
+    rec_iter = iter(rec_iter)
+    rows = 0
+    while True:
+        rec_list = list(islice(rec_iter, chunk_rows))
+        if not rec_list:
+            return rows
+        writer.write_rows(rec_list)
+        rows += len(rec_list)
+
+
+def _report_generation(configuration, filename, rows, elapsed):
+    '''
+    Print throughput and peak memory of generation (large-scale mode)
+    '''
+    if configuration.get(CHUNK_ROWS) is None:
+        return
+    # Maximum resident set size (kilobytes on Linux)
+    peak = getrusage(RUSAGE_SELF).ru_maxrss / 1024.0
+    rate = rows / elapsed if elapsed > 0 else float('NaN')
+    print '{fil}: {row} rows, {rat:.0f} rows/s, peak memory {mem:.1f} MB'\
+        .format(fil=filename, row=rows, rat=rate, mem=peak)
+
+
+def start_stream(configuration, experiment_conf):
+    '''
+    Return the generation state of a data stream before its first instant
+    '''
+    random.seed(get_data_seed(configuration, experiment_conf))
+    state = {STATE_HORIZON: -1, STATE_ROWS: 0}
+    if _get_engine(configuration) == NUMPY_ENGINE:
+        # NumPy random states seeded from the global random state
+        state[STATE_IDS] = numpy.arange(experiment_conf[NSQ])
+        state[STATE_ID_RAND] = numpy.random.RandomState(
+            random.getrandbits(32))
+        state[STATE_VALUE_RAND] = numpy.random.RandomState(
+            random.getrandbits(32))
+    else:
+        # Get array of sequence identifiers
+        state[STATE_IDS] = gen_id_array(experiment_conf[NSQ])
+        state[STATE_RANDOM] = random.getstate()
+    return state
+
+
+def write_stream(configuration, experiment_conf, writer, state=None):
+    '''
+    Generate a data stream into an open writer, from the instant after the
+    generation state (first instant without state) to the maximum timestamp
+    Return the updated generation state
+    '''
+    if state is None:
+        state = start_stream(configuration, experiment_conf)
+    chunk_rows = configuration.get(CHUNK_ROWS)
     # Get maximum timestamp (maximum range + maximum slide)
     max_ts = get_max_data_timestamp(configuration[PARAMETER])
-    filename = get_data_file(configuration, experiment_conf)
-    # First timestamp
-    rec_list = gen_records(configuration, experiment_conf,
-                           id_list, 0)
-    write_to_csv(filename, att_list, rec_list)
-    # For each timestamp
-    for timestamp in range(1, max_ts + 1):
-        rec_list = gen_records(configuration, experiment_conf,
-                               id_list, timestamp)
-        append_to_csv(filename, att_list, rec_list)
+    ts_list = range(state[STATE_HORIZON] + 1, max_ts + 1)
+    weight_list = _get_id_weights(configuration, experiment_conf)
+    if _get_engine(configuration) == NUMPY_ENGINE:
+        rows = _write_arrays(writer, gen_records_array(
+            configuration, experiment_conf, state, state[STATE_HORIZON] + 1,
+            max_ts, chunk_rows, weight_list))
+    else:
+        random.setstate(state[STATE_RANDOM])
+        id_array = state[STATE_IDS]
+        if chunk_rows is not None:
+            rows = _write_records(writer, chain.from_iterable(
+                gen_records(configuration, experiment_conf, id_array,
+                            timestamp, weight_list)
+                for timestamp in ts_list), chunk_rows)
+        else:
+            rows = 0
+            # For each timestamp
+            for timestamp in ts_list:
+                rows += _write_records(writer, gen_records(
+                    configuration, experiment_conf, id_array, timestamp,
+                    weight_list))
+        state[STATE_RANDOM] = random.getstate()
+    state[STATE_HORIZON] = max(max_ts, state[STATE_HORIZON])
+    state[STATE_ROWS] += rows
+    return state
 
 
-def gen_conseq_stream(configuration, experiment_conf):
+def gen_stream(configuration, experiment_conf, filename=None):
     '''
-    Generate data stream
+    Generate a data stream
+    (into the experiment data file if filename is not given)
     '''
-    # Build attribute list
-    att_list = get_attribute_list(experiment_conf[ATT], include_timestamp=True)
-    # Get list of sequence identifiers
-    id_list = gen_sequence_id_list(experiment_conf[NSQ])
+    if filename is None:
+        filename = get_data_file(configuration, experiment_conf)
+    _update_data_file(configuration, experiment_conf, filename, write_stream)
+
+
+def start_conseq_stream(configuration, experiment_conf):
+    '''
+    Return the generation state of a data stream for CONSEQ experiments
+    before its first instant
+    '''
+    random.seed(get_data_seed(configuration, experiment_conf))
+    state = {STATE_HORIZON: -1, STATE_ROWS: 0}
     # Randomize start timestamp for every identifier
-    id_start_list = []
-    for rec in id_list:
-        start = random.randint(0, experiment_conf[RAN]-1)
-        id_start_list.append((rec, start))
+    state[STATE_STARTS] = array('l', (
+        random.randint(0, get_start_range(configuration[PARAMETER]) - 1)
+        for _ in range(experiment_conf[NSQ])))
+    if _get_engine(configuration) == NUMPY_ENGINE:
+        # NumPy random state seeded from the global random state
+        state[STATE_VALUE_RAND] = numpy.random.RandomState(
+            random.getrandbits(32))
+    else:
+        state[STATE_RANDOM] = random.getstate()
+    return state
+
+
+def write_conseq_stream(configuration, experiment_conf, writer, state=None):
+    '''
+    Generate a data stream for CONSEQ experiments into an open writer, from
+    the instant after the generation state (first instant without state) to
+    the maximum timestamp
+    Return the updated generation state
+    '''
+    if state is None:
+        state = start_conseq_stream(configuration, experiment_conf)
+    chunk_rows = configuration.get(CHUNK_ROWS)
     # Get maximum timestamp (maximum range + maximum slide)
     max_ts = get_max_data_timestamp(configuration[PARAMETER])
+    ts_list = range(state[STATE_HORIZON] + 1, max_ts + 1)
+    # Present/absent pattern of identifiers
+    pattern = gen_gap_pattern(experiment_conf[PCT])
+    start_list = state[STATE_STARTS]
+    if _get_engine(configuration) == NUMPY_ENGINE:
+        rows = _write_arrays(writer, gen_conseq_records_array(
+            configuration, experiment_conf, pattern, state,
+            state[STATE_HORIZON] + 1, max_ts, chunk_rows))
+    else:
+        random.setstate(state[STATE_RANDOM])
+        if chunk_rows is not None:
+            rows = _write_records(writer, chain.from_iterable(
+                gen_conseq_records(configuration, experiment_conf, pattern,
+                                   start_list, timestamp)
+                for timestamp in ts_list), chunk_rows)
+        else:
+            rows = 0
+            # For each timestamp
+            for timestamp in ts_list:
+                rows += _write_records(writer, gen_conseq_records(
+                    configuration, experiment_conf, pattern, start_list,
+                    timestamp))
+        state[STATE_RANDOM] = random.getstate()
+    state[STATE_HORIZON] = max(max_ts, state[STATE_HORIZON])
+    state[STATE_ROWS] += rows
+    return state
+
+
+def gen_conseq_stream(configuration, experiment_conf, filename=None):
+    '''
+    Generate data stream
+    (into the experiment data file if filename is not given)
+    '''
     # File
-    filename = get_data_file(configuration, experiment_conf)
-    # First instant
-    rec_list = gen_conseq_records(configuration, experiment_conf,
-                                  id_start_list, 0)
-    write_to_csv(filename, att_list, rec_list)
-    # For each timestamp
-    for timestamp in range(1, max_ts+1):
-        rec_list = gen_conseq_records(configuration, experiment_conf,
-                                      id_start_list, timestamp)
-        append_to_csv(filename, att_list, rec_list)
+    if filename is None:
+        filename = get_data_file(configuration, experiment_conf)
+    _update_data_file(configuration, experiment_conf, filename,
+                      write_conseq_stream)
+
+
+def write_projection(configuration, experiment_conf, writer, state,
+                     source_file):
+    '''
+    Write the leading attributes of the tuples of a wider data stream
+    after the instant of the generation state (all tuples without state)
+    Return the updated generation state
+    '''
+    if state is None:
+        state = {STATE_HORIZON: -1, STATE_ROWS: 0}
+    horizon = state[STATE_HORIZON]
+    # Timestamp and attributes
+    columns = experiment_conf[ATT] + 1
+    source = open_read_file(find_file(source_file))
+    reader = csv.reader(source, delimiter=',')
+    # Skip header and tuples already projected
+    next(reader)
+    row_iter = dropwhile(lambda row: int(row[0]) <= horizon, reader)
+    rows = _write_records(writer,
+                          ([int(value) for value in row[:columns]]
+                           for row in row_iter),
+                          configuration.get(CHUNK_ROWS))
+    source.close()
+    state[STATE_HORIZON] = \
+        max(get_max_data_timestamp(configuration[PARAMETER]), horizon)
+    state[STATE_ROWS] += rows
+    return state
+
+
+def project_stream(configuration, experiment_conf, source_file, filename):
+    '''
+    Generate a data stream with the leading attributes of a wider
+    data stream
+    '''
+    _update_data_file(configuration, experiment_conf, filename,
+                      write_projection, source_file)
+
+
+def _load_state(filename):
+    '''
+    Load the generation state of a data file (None if there is no state)
+    '''
+    state_file = get_state_file(filename)
+    if not os.path.isfile(state_file):
+        return None
+    in_file = open(state_file, 'rb')
+    state = pickle.load(in_file)
+    in_file.close()
+    return state
+
+
+def _save_state(filename, state):
+    '''
+    Store the generation state of a data file
+    (written into a temporary file and renamed, so it is never partial)
+    '''
+    write_atomic(get_state_file(filename),
+                 pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+
+def _get_file_list(configuration, filename):
+    '''
+    Return the files of a data stream according to the configuration
+    (CSV file with configured compression and columnar file if configured)
+    '''
+    file_list = [get_compressed_file(filename,
+                                     get_compression(configuration))]
+    if configuration.get(COLUMNAR, False):
+        file_list.append(get_columnar_file(filename))
+    return file_list
+
+
+def _copy_shorter_stream(configuration, experiment_conf, filename):
+    '''
+    Copy the longest shorter version of a data stream in the shared data
+    store (having all configured files) into a new store file
+    '''
+    max_ts = get_max_data_timestamp(configuration[PARAMETER])
+    for shorter_ts in reversed(get_data_store_timestamps(configuration,
+                                                         experiment_conf)):
+        if shorter_ts >= max_ts:
+            continue
+        shorter_file = get_data_store_file(configuration, experiment_conf,
+                                           shorter_ts)
+        source_list = _get_file_list(configuration, shorter_file)
+        if all(os.path.isfile(source) for source in source_list):
+            for source, target in zip(source_list,
+                                      _get_file_list(configuration,
+                                                     filename)):
+                shutil.copyfile(source, target)
+            shutil.copyfile(get_state_file(shorter_file),
+                            get_state_file(filename))
+            return
+
+
+def _check_sizes(state, file_list):
+    '''
+    Check if the files of a data stream have at least the sizes stored in
+    its generation state (larger files have data of interrupted extensions)
+    '''
+    size_list = [state.get(STATE_CSV_SIZE), state.get(STATE_COL_SIZE)]
+    for data_file, size in zip(file_list, size_list):
+        if size is None or not os.path.isfile(data_file) or \
+                os.path.getsize(data_file) < size:
+            return False
+    return True
+
+
+def _update_data_file(configuration, experiment_conf, filename,
+                      write_function, *args):
+    '''
+    Generate a data file or extend it up to the maximum timestamp
+
+    Every data file has a generation state sidecar (maximum timestamp,
+    random states and file sizes) and a metadata sidecar (see gen.metadata).
+    Files generated with another data identity, missing a configured file,
+    or partial or corrupted according to their metadata are generated again.
+    Shorter files are extended with the missing instants only, producing
+    the same content of a full generation
+    '''
+    max_ts = get_max_data_timestamp(configuration[PARAMETER])
+    key = get_data_key(configuration, experiment_conf)
+    file_list = _get_file_list(configuration, filename)
+    # Shared data store keeps a file per maximum timestamp
+    if configuration.get(DATA_STORE) is not None and \
+            find_file(filename) is None:
+        _copy_shorter_stream(configuration, experiment_conf, filename)
+    state = _load_state(filename)
+    if state is not None and (state.get(STATE_KEY) != key or
+                              not _check_sizes(state, file_list)):
+        state = None
+    if state is not None and state[STATE_HORIZON] >= max_ts:
+        # Check if files are complete
+        verify_hash = configuration.get(VERIFY_HASH, False)
+        if all(get_valid_metadata(data_file, verify_hash) is not None
+               for data_file in file_list):
+            return
+        state = None
+    if state is None:
+        # Remove previous files (they may be linked to other files)
+        remove_list = file_list + [find_file(filename)]
+        remove_list += [get_meta_file(data_file) for data_file in remove_list
+                        if data_file is not None]
+        remove_list.append(get_state_file(filename))
+        for data_file in remove_list:
+            if data_file is not None and os.path.lexists(data_file):
+                os.remove(data_file)
+    else:
+        for data_file in file_list:
+            unshare_file(data_file)
+    start = time.time()
+    rows = state[STATE_ROWS] if state is not None else 0
+    att_list = get_attribute_list(experiment_conf[ATT], include_timestamp=True)
+    writer = _open_stream_writer(configuration, filename, att_list, state)
+    state = write_function(configuration, experiment_conf, writer, state,
+                           *args)
+    writer.close()
+    state[STATE_KEY] = key
+    state[STATE_CSV_SIZE] = os.path.getsize(file_list[0])
+    if configuration.get(COLUMNAR, False):
+        state[STATE_COL_SIZE] = os.path.getsize(file_list[1])
+    _save_state(filename, state)
+    # Content of projected streams comes from their source stream
+    seed_conf = experiment_conf
+    if is_projected_data(configuration, experiment_conf):
+        seed_conf = get_projection_source(configuration, experiment_conf)
+    # Metadata are written after files are complete
+    meta_dict = {META_ROWS: state[STATE_ROWS],
+                 META_TS_RANGE: [0, state[STATE_HORIZON]],
+                 META_SCHEMA: att_list,
+                 META_SEED: get_data_seed(configuration, seed_conf),
+                 META_KEY: key}
+    for data_file in file_list:
+        write_metadata(data_file, meta_dict)
+    _report_generation(configuration, filename, state[STATE_ROWS] - rows,
+                       time.time() - start)
+
+
+def _run_task(task):
+    '''
+    Run a generation task (possibly in a worker process)
+    '''
+    function, args = task
+    function(*args)
+
+
+def _run_tasks(configuration, task_dict):
+    '''
+    Run generation tasks (using a pool of worker processes if configured)
+    '''
+    task_list = [task_dict[filename] for filename in sorted(task_dict)]
+    workers = configuration.get(GEN_WORKERS, 1)
+    if workers > 1 and len(task_list) > 1:
+        pool = Pool(workers)
+        pool.map(_run_task, task_list, chunksize=1)
+        pool.close()
+        pool.join()
+    else:
+        for task in task_list:
+            _run_task(task)
+
+
+def _get_stream_file(configuration, experiment_conf):
+    '''
+    Return the file where a data stream is generated
+    (data store file if a shared data store is configured)
+    '''
+    if configuration.get(DATA_STORE) is not None:
+        return get_data_store_file(configuration, experiment_conf)
+    return get_data_file(configuration, experiment_conf)
+
+
+def _gen_streams(gen_function, configuration, experiment_list):
+    '''
+    Generate the data stream of every distinct data file
+
+    When a shared data store is configured, streams are generated into the
+    store and experiment data files are linked to them.
+    When projection is configured, only the widest streams are generated and
+    the remaining ones are projected from them
+    '''
+    # Streams are produced only during experiments execution in FIFO mode
+    if configuration.get(FIFO_MODE, False):
+        return
+    # Distinct data files (many experiments share the same data)
+    gen_dict = {}
+    project_dict = {}
+    link_dict = {}
+    for exp_conf in experiment_list:
+        data_file = get_data_file(configuration, exp_conf)
+        if data_file in link_dict:
+            continue
+        filename = _get_stream_file(configuration, exp_conf)
+        link_dict[data_file] = filename
+        if is_projected_data(configuration, exp_conf):
+            source_conf = get_projection_source(configuration, exp_conf)
+            source_file = _get_stream_file(configuration, source_conf)
+            project_dict[filename] = \
+                (project_stream,
+                 (configuration, exp_conf, source_file, filename))
+            # Source stream is generated even if it is not an experiment
+            exp_conf = source_conf
+            filename = source_file
+        if filename not in gen_dict:
+            gen_dict[filename] = \
+                (gen_function, (configuration, exp_conf, filename))
+    _run_tasks(configuration, gen_dict)
+    _run_tasks(configuration, project_dict)
+    # Link experiment data files into data store
+    if configuration.get(DATA_STORE) is not None:
+        compression = get_compression(configuration)
+        for data_file in sorted(link_dict):
+            link_to_file(get_compressed_file(link_dict[data_file],
+                                             compression),
+                         get_compressed_file(data_file, compression))
+            if configuration.get(COLUMNAR, False):
+                link_to_file(get_columnar_file(link_dict[data_file]),
+                             get_columnar_file(data_file))
 
 
 def gen_all_streams(configuration, experiment_list):
     '''
     Generate all streams
     '''
-    for exp_conf in experiment_list:
-        gen_stream(configuration, exp_conf)
+    _gen_streams(gen_stream, configuration, experiment_list)
 
 
 def gen_all_conseq_streams(configuration, experiment_list):
     '''
     Generate all streams
     '''
-    for exp_conf in experiment_list:
-        gen_conseq_stream(configuration, exp_conf)
+    _gen_streams(gen_conseq_stream, configuration, experiment_list)
@@ -4,10 +4,27 @@ Directories
 '''
 
 import csv
+import glob
+import gzip
+import hashlib
+import io
 import os
+import shutil
+from StringIO import StringIO
+import tarfile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 from gen.experiment import DIRECTORY, PARAMETER, ALGORITHM_LIST, ALGORITHM, \
-    get_id, get_data_id, get_util_id
+    DATA_STORE, COMPRESSION, FIFO_MODE, QUERY_BUNDLE, QUERY_STORE, \
+    GZIP_COMPRESSION, ZSTD_COMPRESSION, get_id, get_data_id, get_util_id, \
+    get_data_key, get_max_data_timestamp
+from gen.metadata import META_EXT, META_HASH, META_ROWS, META_SIZE, \
+    get_valid_metadata, get_directory_metadata, get_text_metadata, \
+    write_atomic, write_metadata, write_directory_metadata
 
 
 # =============================================================================
@@ -89,6 +106,15 @@ UTIL_DIR_DICT = {dire: UTIL_MAIN_DIR + os.sep + dire
 UTIL_DIR_DICT[MAIN_DIR] = UTIL_MAIN_DIR
 # =============================================================================
 
+# Buffer size for files written by stream writers
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Extensions of compressed files
+COMPRESSION_EXT_DICT = {GZIP_COMPRESSION: '.gz', ZSTD_COMPRESSION: '.zst'}
+# Extension of query bundles (tar archive with all query files of an
+# experiment)
+BUNDLE_EXT = '.tar'
+
 
 def _create_directory(directory):
     '''
@@ -108,6 +134,11 @@ def create_directories(configuration, experiment_list):
     # Create remaining directories
     for directory in dir_dict.values():
         _create_directory(directory)
+    # Create shared data and query stores
+    if configuration.get(DATA_STORE) is not None:
+        _create_directory(configuration[DATA_STORE])
+    if configuration.get(QUERY_STORE) is not None:
+        _create_directory(configuration[QUERY_STORE])
     # Create detail, output and environment directories for every algorithm
     for alg in configuration[ALGORITHM_LIST]:
         directory = dir_dict[ENV_DIR] + os.sep + alg
@@ -117,9 +148,12 @@ def create_directories(configuration, experiment_list):
         directory = dir_dict[DETAIL_DIR] + os.sep + alg
         _create_directory(directory)
     # Create query directories for every experiment
+    # (query bundles are expanded into their directories only for execution)
     for alg in configuration[ALGORITHM_LIST]:
         directory = dir_dict[QUERY_DIR] + os.sep + alg
         _create_directory(directory)
+        if configuration.get(QUERY_BUNDLE, False):
+            continue
         for exp in experiment_list:
             exp_id = get_id(exp, configuration[PARAMETER])
             directory = dir_dict[QUERY_DIR] + os.sep + alg + os.sep + exp_id
@@ -136,42 +170,414 @@ def create_util_directories(configuration):
     # Create remaining directories
     for directory in dir_dict.values():
         _create_directory(directory)
+    # Create shared data store
+    if configuration.get(DATA_STORE) is not None:
+        _create_directory(configuration[DATA_STORE])
 
 
-def write_to_csv(filename, attribute_list, record_list):
+def get_compression(configuration):
     '''
-    Store record list into a CSV file
+    Return the configured compression format (None for no compression)
     '''
-    # Check if file does not exists
-    if not os.path.isfile(filename):
-        # Store data to file
-        data_file = open(filename, 'w')
-        writer = csv.DictWriter(data_file, attribute_list, delimiter=',')
-        writer.writeheader()
-        writer.writerows(record_list)
-        data_file.close()
+    compression = configuration.get(COMPRESSION)
+    if compression == ZSTD_COMPRESSION and zstandard is None:
+        print 'zstandard not found, using ' + GZIP_COMPRESSION + \
+            ' compression'
+        compression = GZIP_COMPRESSION
+    return compression
 
 
-def append_to_csv(filename, attribute_list, record_list):
+def get_compressed_file(filename, compression):
     '''
-    Append record list into a CSV file
+    Return the filename of a file stored with a compression format
     '''
-    data_file = open(filename, 'a')
-    writer = csv.DictWriter(data_file, attribute_list, delimiter=',')
-    writer.writerows(record_list)
+    if compression is None:
+        return filename
+    return filename + COMPRESSION_EXT_DICT[compression]
+
+
+def find_file(filename):
+    '''
+    Return the existing file among a filename and its compressed versions
+    (None if there is no such file)
+    '''
+    if os.path.isfile(filename):
+        return filename
+    for compression in sorted(COMPRESSION_EXT_DICT):
+        compressed_file = get_compressed_file(filename, compression)
+        if os.path.isfile(compressed_file):
+            return compressed_file
+    return None
+
+
+def open_write_file(filename, compression=None, append=False):
+    '''
+    Open a buffered file for writing (with streaming compression)
+    (appended data is compressed as a new gzip member or zstd frame)
+    '''
+    mode = 'ab' if append else 'wb'
+    if compression == GZIP_COMPRESSION:
+        return io.BufferedWriter(gzip.GzipFile(filename, mode),
+                                 WRITE_BUFFER_SIZE)
+    elif compression == ZSTD_COMPRESSION:
+        compressor = zstandard.ZstdCompressor()
+        return io.BufferedWriter(
+            compressor.stream_writer(open(filename, mode),
+                                     write_return_read=True),
+            WRITE_BUFFER_SIZE)
+    return open(filename, mode, WRITE_BUFFER_SIZE)
+
+
+def open_read_file(filename):
+    '''
+    Open a file for reading (with streaming decompression according to
+    the file extension)
+    '''
+    if filename.endswith(COMPRESSION_EXT_DICT[GZIP_COMPRESSION]):
+        return io.BufferedReader(gzip.GzipFile(filename, 'rb'))
+    elif filename.endswith(COMPRESSION_EXT_DICT[ZSTD_COMPRESSION]):
+        decompressor = zstandard.ZstdDecompressor()
+        return io.BufferedReader(
+            decompressor.stream_reader(open(filename, 'rb'),
+                                       read_across_frames=True))
+    return open(filename, 'r')
+
+
+def compress_file(filename, compression):
+    '''
+    Replace a file by its compressed version
+    '''
+    if compression is None or not os.path.isfile(filename):
+        return
+    in_file = open(filename, 'rb')
+    out_file = open_write_file(get_compressed_file(filename, compression),
+                               compression)
+    shutil.copyfileobj(in_file, out_file, WRITE_BUFFER_SIZE)
+    out_file.close()
+    in_file.close()
+    os.remove(filename)
+
+
+def expand_file(filename):
+    '''
+    Create a file from its compressed version if it does not exists
+    Return if the file was created
+    '''
+    existing_file = find_file(filename)
+    if existing_file is None or existing_file == filename:
+        return False
+    in_file = open_read_file(existing_file)
+    out_file = open(filename, 'wb')
+    shutil.copyfileobj(in_file, out_file, WRITE_BUFFER_SIZE)
+    out_file.close()
+    in_file.close()
+    return True
+
+
+def truncate_file(filename, size):
+    '''
+    Truncate a file to a size
+    '''
+    data_file = open(filename, 'r+b')
+    data_file.truncate(size)
     data_file.close()
 
 
-def write_to_txt(filename, text):
+def unshare_file(filename):
+    '''
+    Replace a hard or symbolic link by a private copy of the file
+    (so the file can be modified without changing the linked file)
+    '''
+    if not os.path.islink(filename) and os.stat(filename).st_nlink == 1:
+        return
+    temp_file = filename + '.tmp'
+    shutil.copyfile(filename, temp_file)
+    os.remove(filename)
+    os.rename(temp_file, filename)
+
+
+def get_state_file(filename):
+    '''
+    Return the generation state filename correspondent to a data file
+    '''
+    return os.path.splitext(filename)[0] + '.state'
+
+
+def get_csv_text(attribute_list, record_list):
+    '''
+    Return the CSV text of a record list
+    '''
+    text_file = StringIO()
+    writer = csv.DictWriter(text_file, attribute_list, delimiter=',')
+    writer.writeheader()
+    writer.writerows(record_list)
+    return text_file.getvalue()
+
+
+def write_to_csv(filename, attribute_list, record_list, overwrite=False):
     '''
     Store record list into a CSV file
+    (existing files are kept unless overwrite is true)
     '''
     # Check if file does not exists
-    if not os.path.isfile(filename):
+    if overwrite or not os.path.isfile(filename):
         # Store data to file
-        out_file = open(filename, 'w')
-        out_file.write(text)
+        write_atomic(filename, get_csv_text(attribute_list, record_list))
+
+
+class CSVStreamWriter(object):
+    '''
+    Writer of data stream files using a single buffered file handle
+    (rows are lists of values in the order of attribute list)
+
+    When append_size is given, the existing file is truncated to that size
+    (discarding incomplete data) and rows are appended without header
+    '''
+
+    def __init__(self, filename, attribute_list, compression=None,
+                 skip_existing=True, append_size=None):
+        self.filename = get_compressed_file(filename, compression)
+        self._data_file = None
+        self._writer = None
+        # Check if file (or a compressed version) does not exists
+        self.skipped = skip_existing and append_size is None and \
+            find_file(filename) is not None
+        if self.skipped:
+            return
+        if append_size is not None:
+            truncate_file(self.filename, append_size)
+        self._data_file = open_write_file(self.filename, compression,
+                                          append_size is not None)
+        self._writer = csv.writer(self._data_file, delimiter=',')
+        if append_size is None:
+            self._writer.writerow(attribute_list)
+
+    def write_rows(self, row_list):
+        '''
+        Append rows to file
+        '''
+        if self._writer is not None:
+            # NumPy arrays
+            if hasattr(row_list, 'tolist'):
+                row_list = row_list.tolist()
+            self._writer.writerows(row_list)
+
+    def close(self):
+        '''
+        Flush buffer and close file
+        '''
+        if self._data_file is not None:
+            self._data_file.close()
+            self._data_file = None
+            self._writer = None
+
+
+class StreamWriterGroup(object):
+    '''
+    Group of writers receiving the same rows (skipped writers are ignored)
+    '''
+
+    def __init__(self, writer_list):
+        self._writer_list = [writer for writer in writer_list
+                             if not writer.skipped]
+        self.skipped = not self._writer_list
+
+    def write_rows(self, row_list):
+        '''
+        Append rows to every file
+        '''
+        if len(self._writer_list) > 1 and not hasattr(row_list, 'tolist'):
+            row_list = list(row_list)
+        for writer in self._writer_list:
+            writer.write_rows(row_list)
+
+    def close(self):
+        '''
+        Close every file
+        '''
+        for writer in self._writer_list:
+            writer.close()
+
+
+def write_to_txt(filename, text):
+    '''
+    Store text into a file with its metadata sidecar
+    (complete files with the same content are not written again)
+    '''
+    text_hash = hashlib.sha1(text).hexdigest()
+    # Check if file is complete and has the same content
+    meta_dict = get_valid_metadata(filename)
+    if meta_dict is not None and meta_dict[META_HASH] == text_hash:
+        return
+    # Store data to file
+    write_atomic(filename, text)
+    write_metadata(filename, {META_ROWS: text.count('\n')}, text_hash)
+
+
+def _get_file_size(filename):
+    '''
+    Return the size of a file (None if it does not exist)
+    '''
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return None
+
+
+def _is_same_file(filename, other_file):
+    '''
+    Return if two filenames refer to the same existing file
+    '''
+    try:
+        return os.path.samefile(filename, other_file)
+    except OSError:
+        return False
+
+
+class QueryFileBatch(object):
+    '''
+    Query files of a directory kept in memory and written in a single pass
+
+    Files are described by a single metadata file of the directory (instead
+    of one metadata file per query file), so unchanged files are checked by
+    their sizes only and are not written again.
+    With a query store, every distinct content is written once into the
+    store (filename is its hash) and files are links to the store.
+    In bundle mode, all files are stored into a single bundle file (tar
+    archive named after the directory) expanded only during the execution
+    of the experiment
+    '''
+
+    def __init__(self, directory, bundle=False, store=None):
+        self.directory = directory
+        self.bundle = bundle
+        self.store = store
+        self._text_dict = {}
+
+    def add(self, name, text):
+        '''
+        Add a query file (name inside the directory)
+        '''
+        self._text_dict[name] = text
+
+    def flush(self):
+        '''
+        Write all added files
+        '''
+        if self.bundle:
+            self._write_bundle()
+        else:
+            self._write_files()
+        self._text_dict = {}
+
+    def _write_files(self):
+        '''
+        Write changed, missing or partial files into the directory
+        '''
+        file_dict = get_directory_metadata(self.directory)
+        changed_list = []
+        for name, text in self._text_dict.items():
+            text_meta = get_text_metadata(text)
+            filename = self.directory + os.sep + name
+            if file_dict.get(name) != text_meta or \
+                    _get_file_size(filename) != text_meta[META_SIZE] or \
+                    (self.store is not None and not _is_same_file(
+                        self._get_store_file(name, text_meta), filename)):
+                changed_list.append(name)
+                file_dict[name] = text_meta
+        if not changed_list:
+            return
+        _create_directory(self.directory)
+        # Directory metadata is removed while files are written, so an
+        # interrupted batch is written again
+        meta_file = self.directory + META_EXT
+        if os.path.isfile(meta_file):
+            os.remove(meta_file)
+        for name in sorted(changed_list):
+            filename = self.directory + os.sep + name
+            if self.store is not None:
+                self._link_to_store(name, file_dict[name], filename)
+                continue
+            # Links to a query store are replaced (not written through)
+            if os.path.lexists(filename):
+                os.remove(filename)
+            out_file = open(filename, 'wb')
+            out_file.write(self._text_dict[name])
+            out_file.close()
+        write_directory_metadata(self.directory, file_dict)
+
+    def _get_store_file(self, name, text_meta):
+        '''
+        Return the filename of a content in the query store
+        '''
+        return self.store + os.sep + text_meta[META_HASH] + \
+            os.path.splitext(name)[1]
+
+    def _link_to_store(self, name, text_meta, filename):
+        '''
+        Write a content into the query store (if not there) and link a file
+        to it
+        '''
+        store_file = self._get_store_file(name, text_meta)
+        if _get_file_size(store_file) != text_meta[META_SIZE]:
+            write_atomic(store_file, self._text_dict[name])
+        link_to_file(store_file, filename)
+
+    def _write_bundle(self):
+        '''
+        Write all files into the bundle file
+        '''
+        bundle_data = StringIO()
+        bundle = tarfile.open(fileobj=bundle_data, mode='w')
+        for name, text in sorted(self._text_dict.items()):
+            # Default modification time and mode (same content for the
+            # same files)
+            info = tarfile.TarInfo(name)
+            info.size = len(text)
+            bundle.addfile(info, StringIO(text))
+        bundle.close()
+        bundle_file = self.directory + BUNDLE_EXT
+        bundle_text = bundle_data.getvalue()
+        bundle_hash = hashlib.sha1(bundle_text).hexdigest()
+        meta_dict = get_valid_metadata(bundle_file)
+        if meta_dict is not None and meta_dict[META_HASH] == bundle_hash:
+            return
+        write_atomic(bundle_file, bundle_text)
+        write_metadata(bundle_file, file_hash=bundle_hash)
+
+
+def get_query_batch(configuration, experiment_conf):
+    '''
+    Return a batch for the query files of an experiment
+    '''
+    return QueryFileBatch(get_query_dir(configuration, experiment_conf),
+                          configuration.get(QUERY_BUNDLE, False),
+                          configuration.get(QUERY_STORE))
+
+
+def expand_query_bundle(configuration, experiment_conf):
+    '''
+    Create the query files of an experiment from its bundle
+    (existing files, left by interrupted executions, are replaced)
+    Return the list of created files
+    '''
+    query_dir = get_query_dir(configuration, experiment_conf)
+    bundle_file = query_dir + BUNDLE_EXT
+    if not os.path.isfile(bundle_file):
+        return []
+    _create_directory(query_dir)
+    file_list = []
+    bundle = tarfile.open(bundle_file, 'r')
+    for info in bundle.getmembers():
+        filename = query_dir + os.sep + os.path.basename(info.name)
+        if os.path.lexists(filename):
+            os.remove(filename)
+        out_file = open(filename, 'wb')
+        out_file.write(bundle.extractfile(info).read())
         out_file.close()
+        file_list.append(filename)
+    bundle.close()
+    return file_list
 
 
 def get_out_file(configuration, experiment_conf):
@@ -191,6 +597,83 @@ def get_data_file(configuration, experiment_conf):
     return dir_dict[DATA_DIR] + os.sep + get_data_id(experiment_conf) + '.csv'
 
 
+def _get_data_store_prefix(configuration, experiment_conf):
+    '''
+    Return the prefix of the filenames of a data stream in the shared
+    data store (one file per maximum timestamp)
+    '''
+    key = get_data_key(configuration, experiment_conf)
+    return configuration[DATA_STORE] + os.sep + \
+        get_data_id(experiment_conf) + '_' + \
+        hashlib.sha1(key).hexdigest()[:16] + '_ts'
+
+
+def get_data_store_file(configuration, experiment_conf, max_timestamp=None):
+    '''
+    Return the correspondent filename in the shared data store
+    '''
+    if max_timestamp is None:
+        max_timestamp = get_max_data_timestamp(configuration[PARAMETER])
+    return _get_data_store_prefix(configuration, experiment_conf) + \
+        str(max_timestamp) + '.csv'
+
+
+def get_data_store_timestamps(configuration, experiment_conf):
+    '''
+    Return the sorted maximum timestamps of the files of a data stream in
+    the shared data store (files having a generation state)
+    '''
+    prefix = _get_data_store_prefix(configuration, experiment_conf)
+    ts_list = []
+    for state_file in glob.glob(prefix + '*.state'):
+        max_ts = state_file[len(prefix):-len('.state')]
+        if max_ts.isdigit():
+            ts_list.append(int(max_ts))
+    return sorted(ts_list)
+
+
+def link_to_file(source, target):
+    '''
+    Link target filename to an existing source file, using a hard link or a
+    symbolic link when hard links are not supported
+    (a target linked to another file is replaced)
+    '''
+    if os.path.lexists(target):
+        if os.path.exists(target) and os.path.samefile(source, target):
+            return
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        os.symlink(os.path.abspath(source), target)
+
+
+def get_fifo_file(configuration, experiment_conf):
+    '''
+    Return the correspondent named pipe (FIFO) filename
+    (one per experiment, so experiments sharing a data stream can run
+    concurrently)
+    '''
+    dir_dict = configuration[DIRECTORY]
+    if ALGORITHM in experiment_conf:
+        exp_id = experiment_conf[ALGORITHM] + '_' + \
+            get_id(experiment_conf, configuration[PARAMETER])
+    else:
+        exp_id = get_util_id(configuration, experiment_conf)
+    return dir_dict[DATA_DIR] + os.sep + get_data_id(experiment_conf) + \
+        '_' + exp_id + '.fifo'
+
+
+def get_stream_input_file(configuration, experiment_conf):
+    '''
+    Return the input filename of the data stream for StreamPref
+    (named pipe in FIFO mode)
+    '''
+    if configuration.get(FIFO_MODE, False):
+        return get_fifo_file(configuration, experiment_conf)
+    return get_data_file(configuration, experiment_conf)
+
+
 def get_query_dir(configuration, experiment_conf):
     '''
     Return the correspondent query directory
@@ -3,6 +3,10 @@
 Experiments
 '''
 
+import hashlib
+import itertools
+import random
+
 # =============================================================================
 # Experiment parameters
 # =============================================================================
@@ -57,6 +61,101 @@ OPERATOR_LIST = 'operator_list'
 MAX_VALUE = 'max_value'
 # Percent of sequence identifier per instant
 TUPLE_RATE = 'tup_rate'
+# Distribution of identifier popularity
+ID_DISTRIBUTION = 'id_dist'
+# Exponent of Zipf distribution
+ZIPF_EXPONENT = 'zipf_exp'
+# Fraction of identifiers in hot set
+HOT_SET = 'hot_set'
+# Fraction of popularity of hot set identifiers
+HOT_RATE = 'hot_rate'
+# Data generation engine
+DATA_ENGINE = 'data_engine'
+# Number of worker processes for data generation
+GEN_WORKERS = 'gen_workers'
+# Base seed for data generation
+SEED = 'seed'
+# Directory of data store shared by all generators
+DATA_STORE = 'data_store'
+# Project data streams with fewer attributes from the widest data stream
+ATT_PROJECTION = 'att_projection'
+# Store data streams also in binary columnar format
+COLUMNAR = 'columnar'
+# Compression of data, output and detail files
+COMPRESSION = 'compression'
+# Produce data streams into named pipes during experiments execution
+FIFO_MODE = 'fifo_mode'
+# Maximum number of rows generated in memory at once (large-scale mode)
+CHUNK_ROWS = 'chunk_rows'
+# Verify content hashes of existing data files (not only their sizes)
+VERIFY_HASH = 'verify_hash'
+# Store all query files of an experiment into a single bundle file
+QUERY_BUNDLE = 'query_bundle'
+# Directory of content-addressed query store shared by all generators
+QUERY_STORE = 'query_store'
+# Shape of CQL equivalent queries
+CQL_SHAPE = 'cql_shape'
+# Experiment design
+DESIGN = 'design'
+# Parameters combined by the experiment design
+DESIGN_PARAMETERS = 'design_par'
+# Maximum number of combinations of sampled experiment designs
+DESIGN_BUDGET = 'design_budget'
+# Target relative half-width of runtime confidence intervals (adaptive runs)
+CI_TARGET = 'ci_target'
+# Maximum number of runs of each experiment (adaptive runs)
+MAX_RUN_COUNT = 'max_run_count'
+# Modified z-score of runtime outliers run again (adaptive runs)
+OUTLIER_SCORE = 'outlier_score'
+# Number of experiment runs executed concurrently
+RUN_WORKERS = 'run_workers'
+# Number of CPUs bound to each concurrent run
+RUN_CPUS = 'run_cpus'
+
+# =============================================================================
+# Data generation engines
+# =============================================================================
+# Reference engine (tuples generated one by one)
+PYTHON_ENGINE = 'python'
+# Vectorized engine (integer arrays generated by NumPy)
+NUMPY_ENGINE = 'numpy'
+
+# =============================================================================
+# Identifier popularity distributions
+# =============================================================================
+UNIFORM_DIST = 'uniform'
+ZIPF_DIST = 'zipf'
+HOTSET_DIST = 'hotset'
+
+# =============================================================================
+# Shapes of CQL equivalent queries
+# =============================================================================
+# Original shape (flat unions and linear position chains)
+FLAT_SHAPE = 'flat'
+# Scalable shape (balanced union trees and logarithmic position chains)
+BALANCED_SHAPE = 'balanced'
+
+# =============================================================================
+# Experiment designs
+# =============================================================================
+# One parameter varied at a time around default values (original design)
+ONE_AT_A_TIME_DESIGN = 'one_at_a_time'
+# Every combination of parameter values
+FACTORIAL_DESIGN = 'factorial'
+# Latin hypercube sample of combinations
+LATIN_HYPERCUBE_DESIGN = 'lhs'
+# Random sample of combinations (without replacement)
+RANDOM_DESIGN = 'random'
+# Designs sampling combinations (limited by budget)
+SAMPLED_DESIGN_LIST = [LATIN_HYPERCUBE_DESIGN, RANDOM_DESIGN]
+# Identifier of summaries of designs with combined parameters
+DESIGN_ID = 'id'
+
+# =============================================================================
+# Compression formats
+# =============================================================================
+GZIP_COMPRESSION = 'gzip'
+ZSTD_COMPRESSION = 'zstd'
 
 # =============================================================================
 # Stream attributes and types
@@ -73,6 +172,8 @@ INTEGER = 'INTEGER'
 # =============================================================================
 # CQL equivalence
 CQL_ALG = 'cql'
+# CQL equivalence with semi-naive transitive closure (temporal preferences)
+CQL_DELTA_ALG = 'cql_delta'
 # =============================================================================
 # Algorithm SEQ operator
 SEQ_ALG = 'seq'
@@ -84,6 +185,10 @@ BNL_SEARCH_ALG = 'bnl_search'
 INC_PARTITION_SEQTREE_ALG = 'inc_partition_seqtree'
 # Incremental partition sequence tree (with pruning)
 INC_PARTITION_SEQTREE_PRUNING_ALG = 'inc_partition_seqtree_pruning'
+# Incremental partition list sequence tree
+INC_PARTITIONLIST_SEQTREE_ALG = 'inc_partitionlist_seqtree'
+# Incremental partition list sequence tree (with pruning)
+INC_PARTITIONLIST_SEQTREE_PRUNING_ALG = 'inc_partitionlist_seqtree_pruning'
 # =============================================================================
 # Algorithms for subsequence operators
 NAIVE_SUBSEQ_ALG = "naive"
@@ -154,22 +259,120 @@ UTIL_ATT_LIST = [UTIL_IN, UTIL_IN_MIN, UTIL_IN_MAX, UTIL_IN_AVG,
 # =============================================================================
 
 
-def add_experiment(experiment_list, experiment):
+class Experiment(object):
+    '''
+    Immutable experiment (parameter values and algorithm or operator list)
+
+    Experiments are read like dictionaries and are hashable (hash computed
+    once), so experiment lists are deduplicated through sets.
+    Experiments created with a parameter configuration also have their
+    identifier computed once
+    '''
+
+    __slots__ = ('_value_dict', '_hash', 'exp_id')
+
+    def __init__(self, value_dict, parameter_conf=None):
+        # Lists (operator lists) are stored as tuples
+        value_dict = {key: tuple(value) if isinstance(value, list) else value
+                      for key, value in value_dict.items()}
+        object.__setattr__(self, '_value_dict', value_dict)
+        object.__setattr__(self, '_hash',
+                           hash(frozenset(value_dict.items())))
+        exp_id = None
+        if parameter_conf is not None:
+            exp_id = get_id(self, parameter_conf)
+        object.__setattr__(self, 'exp_id', exp_id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Experiment is immutable')
+
+    def __reduce__(self):
+        return (_restore_experiment, (self._value_dict, self.exp_id))
+
+    def __getitem__(self, key):
+        return self._value_dict[key]
+
+    def __contains__(self, key):
+        return key in self._value_dict
+
+    def __iter__(self):
+        return iter(self._value_dict)
+
+    def __len__(self):
+        return len(self._value_dict)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return isinstance(other, Experiment) and \
+            self._hash == other._hash and \
+            self._value_dict == other._value_dict
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Experiment(' + repr(self._value_dict) + ')'
+
+    def get(self, key, default=None):
+        '''
+        Return the value of a key (default if experiment does not have it)
+        '''
+        return self._value_dict.get(key, default)
+
+    def keys(self):
+        '''
+        Return the list of keys
+        '''
+        return self._value_dict.keys()
+
+    def items(self):
+        '''
+        Return the list of (key, value) pairs
+        '''
+        return self._value_dict.items()
+
+    def updated(self, value_dict, parameter_conf=None):
+        '''
+        Return a new experiment with some values changed
+        '''
+        new_dict = self._value_dict.copy()
+        new_dict.update(value_dict)
+        return Experiment(new_dict, parameter_conf)
+
+
+def _restore_experiment(value_dict, exp_id):
     '''
-    Add an experiment into experiment list
+    Rebuild a pickled experiment
     '''
-    if experiment not in experiment_list:
-        experiment_list.append(experiment.copy())
+    experiment = Experiment(value_dict)
+    object.__setattr__(experiment, 'exp_id', exp_id)
+    return experiment
+
+
+def add_experiment(experiment_list, experiment_set, experiment):
+    '''
+    Add an experiment into experiment list (if it is not in experiment set)
+    '''
+    if experiment not in experiment_set:
+        experiment_set.add(experiment)
+        experiment_list.append(experiment)
 
 
 def gen_experiment_list(configuration):
     '''
     Generate the list of experiments
+    (lazy list for designs with combined parameters)
     '''
+    check_design(configuration)
+    if get_design(configuration) != ONE_AT_A_TIME_DESIGN:
+        return ExperimentDesign(configuration)
     exp_list = []
+    exp_set = set()
     parameter_conf = configuration[PARAMETER]
     # Default parameters configuration
-    def_conf = get_default_experiment(parameter_conf)
+    def_conf = Experiment(get_default_experiment(parameter_conf))
     # For every algorithm
     for alg in configuration[ALGORITHM_LIST]:
         # For every parameter
@@ -178,22 +381,216 @@ def gen_experiment_list(configuration):
             if VAR in parameter_conf[par]:
                 # For every value in the variation
                 for value in parameter_conf[par][VAR]:
-                    # Copy default values
-                    conf = def_conf.copy()
-                    # Set algorithm
-                    conf[ALGORITHM] = alg
-                    # Change parameter to current value
-                    conf[par] = value
+                    # Default values with algorithm and current value
+                    conf = def_conf.updated({ALGORITHM: alg, par: value},
+                                            parameter_conf)
                     # Add to experiment list
-                    add_experiment(exp_list, conf)
+                    add_experiment(exp_list, exp_set, conf)
     return exp_list
 
 
+def get_design(configuration):
+    '''
+    Return the experiment design of a configuration
+    '''
+    return configuration.get(DESIGN, ONE_AT_A_TIME_DESIGN)
+
+
+def get_design_parameters(configuration):
+    '''
+    Return the sorted list of parameters combined by the experiment design
+    (all parameters having variation by default)
+    '''
+    par_list = configuration.get(DESIGN_PARAMETERS)
+    if par_list is None:
+        return get_variated_parameters(configuration)
+    for par in par_list:
+        if par not in configuration[PARAMETER]:
+            raise ValueError('Invalid design parameter: ' + par)
+        if VAR not in configuration[PARAMETER][par]:
+            raise ValueError('Design parameter without variation: ' + par)
+    return sorted(par_list)
+
+
+def get_design_seed(configuration):
+    '''
+    Return the random seed of sampled experiment designs
+    (derived from base seed and design)
+    '''
+    seed_str = str(configuration.get(SEED, 0)) + ':' + \
+        get_design(configuration)
+    return int(hashlib.md5(seed_str).hexdigest()[:8], 16)
+
+
+def get_design_budget(configuration):
+    '''
+    Return the maximum number of combinations of a sampled experiment design
+    '''
+    budget = configuration.get(DESIGN_BUDGET)
+    if budget is None:
+        raise ValueError('Experiment design without budget: ' +
+                         get_design(configuration))
+    return budget
+
+
+def get_factorial_size(configuration):
+    '''
+    Return the number of combinations of values of design parameters
+    '''
+    par_conf = configuration[PARAMETER]
+    size = 1
+    for par in get_design_parameters(configuration):
+        size *= len(par_conf[par][VAR])
+    return size
+
+
+def get_design_size(configuration):
+    '''
+    Return the number of combinations of the experiment design
+    '''
+    design = get_design(configuration)
+    if design == FACTORIAL_DESIGN:
+        return get_factorial_size(configuration)
+    elif design == LATIN_HYPERCUBE_DESIGN:
+        # Repeated combinations are discarded
+        return sum(1 for _ in iter_latin_hypercube_points(configuration))
+    return min(get_factorial_size(configuration),
+               get_design_budget(configuration))
+
+
+def iter_factorial_points(configuration):
+    '''
+    Generate every combination of values of design parameters
+    '''
+    par_conf = configuration[PARAMETER]
+    par_list = get_design_parameters(configuration)
+    for value_tuple in itertools.product(*[par_conf[par][VAR]
+                                           for par in par_list]):
+        yield dict(zip(par_list, value_tuple))
+
+
+def iter_random_points(configuration):
+    '''
+    Generate a random sample (without replacement) of combinations of values
+    of design parameters
+    Combinations are sampled by their indexes in the full factorial design,
+    so the design is never built
+    '''
+    par_conf = configuration[PARAMETER]
+    par_list = get_design_parameters(configuration)
+    rand = random.Random(get_design_seed(configuration))
+    size = get_factorial_size(configuration)
+    # Floyd's sampling (memory proportional to budget, not to design size)
+    index_set = set()
+    for number in range(size - get_design_size(configuration), size):
+        index = rand.randrange(number + 1)
+        if index in index_set:
+            index = number
+        index_set.add(index)
+    # Combinations in the same order of the full factorial design
+    for index in sorted(index_set):
+        point = {}
+        # Last parameter varies faster
+        for par in reversed(par_list):
+            value_list = par_conf[par][VAR]
+            index, pos = divmod(index, len(value_list))
+            point[par] = value_list[pos]
+        yield point
+
+
+def iter_latin_hypercube_points(configuration):
+    '''
+    Generate a Latin hypercube sample of combinations of values of design
+    parameters
+    The value list of each parameter is split into as many strata as the
+    budget and every stratum is used once, so all values are equally
+    represented. Repeated combinations are generated only once
+    '''
+    par_conf = configuration[PARAMETER]
+    par_list = get_design_parameters(configuration)
+    budget = get_design_budget(configuration)
+    rand = random.Random(get_design_seed(configuration))
+    # Position of every value of each parameter
+    pos_dict = {}
+    for par in par_list:
+        value_count = len(par_conf[par][VAR])
+        strata_list = range(budget)
+        rand.shuffle(strata_list)
+        pos_dict[par] = [int((stratum + rand.random()) * value_count / budget)
+                         for stratum in strata_list]
+    point_set = set()
+    for number in range(budget):
+        value_tuple = tuple(par_conf[par][VAR][pos_dict[par][number]]
+                            for par in par_list)
+        if value_tuple not in point_set:
+            point_set.add(value_tuple)
+            yield dict(zip(par_list, value_tuple))
+
+
+# Dictionary of combination generators of experiment designs
+DESIGN_DICT = {
+    FACTORIAL_DESIGN: iter_factorial_points,
+    LATIN_HYPERCUBE_DESIGN: iter_latin_hypercube_points,
+    RANDOM_DESIGN: iter_random_points
+    }
+
+
+def iter_design_points(configuration):
+    '''
+    Generate the combinations of values of design parameters
+    '''
+    return DESIGN_DICT[get_design(configuration)](configuration)
+
+
+def check_design(configuration):
+    '''
+    Check the experiment design of a configuration, its parameters and its
+    budget (raise ValueError if invalid)
+    '''
+    design = get_design(configuration)
+    if design != ONE_AT_A_TIME_DESIGN and design not in DESIGN_DICT:
+        raise ValueError('Invalid experiment design: ' + design)
+    get_design_parameters(configuration)
+    if design in SAMPLED_DESIGN_LIST:
+        budget = get_design_budget(configuration)
+        if budget < 1:
+            raise ValueError('Invalid experiment design budget: ' +
+                             str(budget))
+
+
+class ExperimentDesign(object):
+    '''
+    Lazy list of experiments of a design with combined parameters
+
+    Experiments are generated again on every iteration (in the same order),
+    so the combinations of large designs are never stored. Parameters not
+    combined by the design keep their default values
+    '''
+
+    def __init__(self, configuration):
+        self._configuration = configuration
+
+    def __iter__(self):
+        parameter_conf = self._configuration[PARAMETER]
+        def_conf = Experiment(get_default_experiment(parameter_conf))
+        # For every algorithm
+        for alg in self._configuration[ALGORITHM_LIST]:
+            # For every combination of parameter values
+            for point in iter_design_points(self._configuration):
+                point[ALGORITHM] = alg
+                yield def_conf.updated(point, parameter_conf)
+
+    def __len__(self):
+        return len(self._configuration[ALGORITHM_LIST]) * \
+            get_design_size(self._configuration)
+
+
 def gen_util_experiment_list(configuration):
     '''
     Generate the list of statistical experiments
     '''
     exp_list = []
+    exp_set = set()
     parameter_conf = configuration[PARAMETER]
     # For every algorithm
     for op_list in configuration[OPERATOR_LIST]:
@@ -210,17 +607,14 @@ def gen_util_experiment_list(configuration):
                 par_list.remove(MAX)
             if MAX in def_conf:
                 del def_conf[MAX]
+        def_conf = Experiment(def_conf)
         for par in par_list:
             # For every value in the variation
             for value in parameter_conf[par][VAR]:
-                # Copy default values
-                conf = def_conf.copy()
-                # Set algorithm
-                conf[OPERATOR_LIST] = op_list
-                # Change parameter to current value
-                conf[par] = value
+                # Default values with operators and current value
+                conf = def_conf.updated({OPERATOR_LIST: op_list, par: value})
                 # Add to experiment list
-                add_experiment(exp_list, conf)
+                add_experiment(exp_list, exp_set, conf)
     return exp_list
 
 
@@ -248,6 +642,9 @@ def get_id(experiment_conf, parameter_conf):
     '''
     Return full experiment identifier
     '''
+    # Identifier computed once for generated experiments
+    if getattr(experiment_conf, 'exp_id', None) is not None:
+        return experiment_conf.exp_id
     id_str = ''
     parameter_list = get_varied_parameters(parameter_conf)
     # For every parameter
@@ -270,6 +667,88 @@ def get_data_id(experiment_conf):
     return id_str
 
 
+def get_data_seed(configuration, experiment_conf):
+    '''
+    Return the random seed of a data stream
+    (derived from base seed and experiment identifier for data)
+    '''
+    seed_str = str(configuration.get(SEED, 0)) + ':' + \
+        get_data_id(experiment_conf)
+    return int(hashlib.md5(seed_str).hexdigest()[:8], 16)
+
+
+def get_id_distribution(configuration):
+    '''
+    Return the identifier popularity distribution and a tuple with its
+    parameters
+    '''
+    distribution = configuration.get(ID_DISTRIBUTION, UNIFORM_DIST)
+    if distribution == ZIPF_DIST:
+        return distribution, (configuration.get(ZIPF_EXPONENT, 1.0),)
+    elif distribution == HOTSET_DIST:
+        return distribution, (configuration.get(HOT_SET, 0.2),
+                              configuration.get(HOT_RATE, 0.8))
+    return UNIFORM_DIST, ()
+
+
+def get_data_key(configuration, experiment_conf):
+    '''
+    Return the full identity of a data stream
+    (all values that affect the content of the generated data, except the
+    maximum timestamp, since streams are generated instant by instant and
+    longer streams extend shorter ones)
+    '''
+    # Projected streams are identified by their source stream
+    if is_projected_data(configuration, experiment_conf):
+        source_conf = get_projection_source(configuration, experiment_conf)
+        return get_data_key(configuration, source_conf) + \
+            ATT_PROJECTION + str(experiment_conf[ATT])
+    key_str = get_data_id(experiment_conf)
+    # Start timestamps of CONSEQ streams depend on range
+    if PCT in experiment_conf:
+        key_str += RAN + str(get_start_range(configuration[PARAMETER]))
+    key_str += MAX_VALUE + str(configuration[MAX_VALUE])
+    if TUPLE_RATE in configuration:
+        key_str += TUPLE_RATE + str(configuration[TUPLE_RATE])
+    # Identifiers of CONSEQ streams follow gap patterns
+    if PCT not in experiment_conf:
+        distribution, par_tuple = get_id_distribution(configuration)
+        if distribution != UNIFORM_DIST:
+            key_str += ID_DISTRIBUTION + distribution + str(par_tuple)
+    key_str += SEED + str(get_data_seed(configuration, experiment_conf))
+    key_str += DATA_ENGINE + str(configuration.get(DATA_ENGINE,
+                                                   PYTHON_ENGINE))
+    return key_str
+
+
+def get_projection_source(configuration, experiment_conf):
+    '''
+    Return the experiment having the source data stream for projection
+    (same experiment with the maximum number of attributes)
+    '''
+    return experiment_conf.updated(
+        {ATT: get_max_value(configuration[PARAMETER], ATT)},
+        configuration[PARAMETER])
+
+
+def is_projected_data(configuration, experiment_conf):
+    '''
+    Return if the data stream of an experiment is projected from the
+    widest data stream
+    '''
+    return configuration.get(ATT_PROJECTION, False) and \
+        VAR in configuration[PARAMETER][ATT] and \
+        experiment_conf[ATT] < get_max_value(configuration[PARAMETER], ATT)
+
+
+def get_start_range(parameter_conf):
+    '''
+    Return the range of start timestamps of identifiers in CONSEQ streams
+    (default range, so experiments with other ranges share the same stream)
+    '''
+    return parameter_conf[RAN][DEF]
+
+
 def get_max_data_timestamp(parameter_conf):
     '''
     Return the maximum timstamp for a generated data stream
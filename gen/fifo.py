@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+'''
+Data streams produced into named pipes (FIFO) during experiments execution
+'''
+
+import errno
+from multiprocessing import Process
+import os
+
+from gen.data import write_stream, write_conseq_stream
+from gen.directory import CSVStreamWriter, get_fifo_file
+from gen.experiment import ATT, PCT, get_attribute_list
+
+
+# Time (seconds) to wait for the producer after StreamPref finishes
+FIFO_JOIN_TIMEOUT = 1.0
+
+
+def _produce_stream(configuration, experiment_conf, fifo_file):
+    '''
+    Produce a data stream into a named pipe (child process)
+    '''
+    # Build attribute list
+    att_list = get_attribute_list(experiment_conf[ATT], include_timestamp=True)
+    try:
+        # Open blocks until StreamPref opens the named pipe for reading
+        writer = CSVStreamWriter(fifo_file, att_list, skip_existing=False)
+        # Streams for CONSEQ experiments
+        if PCT in experiment_conf:
+            write_conseq_stream(configuration, experiment_conf, writer)
+        else:
+            write_stream(configuration, experiment_conf, writer)
+        writer.close()
+    except IOError as err:
+        # StreamPref stopped reading before the end of stream
+        if err.errno != errno.EPIPE:
+            raise
+
+
+def start_fifo_producer(configuration, experiment_conf):
+    '''
+    Create the named pipe of an experiment and start a process producing
+    its data stream
+    '''
+    fifo_file = get_fifo_file(configuration, experiment_conf)
+    if not os.path.exists(fifo_file):
+        os.mkfifo(fifo_file)
+    producer = Process(target=_produce_stream,
+                       args=(configuration, experiment_conf, fifo_file))
+    producer.daemon = True
+    producer.start()
+    return producer
+
+
+def stop_fifo_producer(configuration, experiment_conf, producer):
+    '''
+    Wait for the producer of a data stream (terminate it if StreamPref did
+    not open the named pipe) and remove the named pipe of the experiment
+    '''
+    producer.join(FIFO_JOIN_TIMEOUT)
+    if producer.is_alive():
+        producer.terminate()
+        producer.join()
+    os.remove(get_fifo_file(configuration, experiment_conf))
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+'''
+Metadata sidecars of generated files
+
+Every generated file has a sidecar (filename with extension .meta appended)
+holding a JSON object with the file size, the SHA-1 hash of its content and
+file specific fields (number of rows, timestamp range, schema, seed and
+data key for data files, where projected data files have the seed of their
+source data stream). Sidecars are written after their files are complete,
+so a file without a consistent sidecar is partial or corrupted.
+
+Files of a directory written together (query files) share a single
+sidecar of the directory (directory name with extension .meta appended)
+holding the metadata of each file indexed by its name.
+'''
+
+import hashlib
+import json
+import os
+
+
+# Extension of metadata sidecars
+META_EXT = '.meta'
+# Block size for hashing files
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Metadata keys
+META_SIZE = 'size'
+META_HASH = 'sha1'
+META_ROWS = 'rows'
+META_TS_RANGE = 'ts_range'
+META_SCHEMA = 'schema'
+META_SEED = 'seed'
+META_KEY = 'key'
+META_FILES = 'files'
+
+
+def get_meta_file(filename):
+    '''
+    Return the metadata sidecar filename of a file
+    '''
+    return filename + META_EXT
+
+
+def get_file_hash(filename):
+    '''
+    Return the SHA-1 hash (hexadecimal) of the content of a file
+    '''
+    file_hash = hashlib.sha1()
+    in_file = open(filename, 'rb')
+    block = in_file.read(HASH_BLOCK_SIZE)
+    while block:
+        file_hash.update(block)
+        block = in_file.read(HASH_BLOCK_SIZE)
+    in_file.close()
+    return file_hash.hexdigest()
+
+
+def get_text_metadata(text):
+    '''
+    Return the metadata of a file content (size, hash and number of rows)
+    '''
+    return {META_SIZE: len(text),
+            META_HASH: hashlib.sha1(text).hexdigest(),
+            META_ROWS: text.count('\n')}
+
+
+def write_atomic(filename, text):
+    '''
+    Write text into a file through a temporary file renamed at the end
+    (the file is never partially written)
+    '''
+    temp_file = filename + '.tmp'
+    out_file = open(temp_file, 'wb')
+    out_file.write(text)
+    out_file.close()
+    os.rename(temp_file, filename)
+
+
+def write_metadata(filename, meta_dict=None, file_hash=None):
+    '''
+    Write the metadata sidecar of a complete file
+    (size and hash are added to the given metadata, hash is computed if not
+    given)
+    '''
+    meta_dict = dict(meta_dict or {})
+    meta_dict[META_SIZE] = os.path.getsize(filename)
+    if file_hash is None:
+        file_hash = get_file_hash(filename)
+    meta_dict[META_HASH] = file_hash
+    write_atomic(get_meta_file(filename),
+                 json.dumps(meta_dict, sort_keys=True) + '\n')
+
+
+def write_directory_metadata(directory, file_dict):
+    '''
+    Write the sidecar of the files of a directory written together
+    (metadata of each file indexed by its name)
+    '''
+    write_atomic(get_meta_file(directory),
+                 json.dumps({META_FILES: file_dict}, sort_keys=True) + '\n')
+
+
+def read_metadata(filename):
+    '''
+    Read the metadata sidecar of a file (None if missing or invalid)
+    '''
+    meta_file = get_meta_file(filename)
+    if not os.path.isfile(meta_file):
+        return None
+    in_file = open(meta_file, 'r')
+    try:
+        meta_dict = json.load(in_file)
+    except ValueError:
+        meta_dict = None
+    in_file.close()
+    return meta_dict
+
+
+def get_directory_metadata(directory):
+    '''
+    Read the metadata of the files of a directory written together
+    (empty if the sidecar is missing or invalid)
+    '''
+    meta_dict = read_metadata(directory)
+    if meta_dict is None:
+        return {}
+    return meta_dict.get(META_FILES, {})
+
+
+def get_valid_metadata(filename, verify_hash=False):
+    '''
+    Return the metadata of a complete file (None for missing, partial or
+    corrupted files)
+    Files are checked by size (without reading them) and also by content
+    hash if verify_hash is true
+    '''
+    meta_dict = read_metadata(filename)
+    if meta_dict is None or not os.path.isfile(filename) or \
+            os.path.getsize(filename) != meta_dict.get(META_SIZE):
+        return None
+    if verify_hash and get_file_hash(filename) != meta_dict.get(META_HASH):
+        return None
+    return meta_dict
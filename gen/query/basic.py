@@ -3,8 +3,9 @@
 Basic for queries modules
 '''
 
-from gen.directory import get_data_file, get_tup_file
-from gen.experiment import ATT, INTEGER, get_attribute_list
+from gen.directory import get_stream_input_file, get_tup_file
+from gen.experiment import ATT, INTEGER, CQL_SHAPE, BALANCED_SHAPE, \
+    get_attribute_list
 
 
 # =============================================================================
@@ -16,6 +17,12 @@ REG_Q_STR = "\n\nREGISTER QUERY {qname} \nINPUT '{qfile}';"
 REG_Q_OUTPUT_STR = \
     "\n\nREGISTER QUERY {qname} \nINPUT '{qfile}' \nOUTPUT '{ofile}';"
 
+# =============================================================================
+# Balanced union trees
+# =============================================================================
+# Maximum number of queries in each union of balanced union trees
+UNION_FANOUT = 10
+
 
 def get_register_stream(configuration, experiment_conf, include_tup=False):
     '''
@@ -25,8 +32,8 @@ def get_register_stream(configuration, experiment_conf, include_tup=False):
     att_list = get_attribute_list(experiment_conf[ATT])
     att_list = [att + ' ' + INTEGER for att in att_list]
     att_str = ', '.join(att_list)
-    # Get data filename
-    filename = get_data_file(configuration, experiment_conf)
+    # Get data filename (or named pipe)
+    filename = get_stream_input_file(configuration, experiment_conf)
     # Register stream
     text = REG_STREAM_STR.format(atts=att_str, dfile=filename)
     if include_tup:
@@ -36,3 +43,57 @@ def get_register_stream(configuration, experiment_conf, include_tup=False):
         text += REG_TUP_STR.format(dfile=filename)
     text += '\n\n' + '#' * 80 + '\n\n'
     return text
+
+
+def get_union_fanout(configuration):
+    '''
+    Return the maximum number of queries in each union of CQL equivalent
+    queries (None for flat unions)
+    '''
+    if configuration.get(CQL_SHAPE) == BALANCED_SHAPE:
+        return UNION_FANOUT
+    return None
+
+
+def get_union_tree(query_count, name, fanout=None):
+    '''
+    Return the union tree of a number of queries as a list of
+    (query name, children list) in registration order
+    Children of the first level are indexes of the united queries and
+    children of the next levels are names of previous unions.
+    The last union (root) is named name. Without fanout, the tree is a
+    single flat union.
+    '''
+    union_list = []
+    child_list = range(query_count)
+    level = 1
+    while fanout is not None and len(child_list) > fanout:
+        # Groups of (almost) the same size
+        group_count = (len(child_list) + fanout - 1) // fanout
+        name_list = []
+        for index in range(group_count):
+            first = index * len(child_list) // group_count
+            last = (index + 1) * len(child_list) // group_count
+            union_name = name + '_u' + str(level) + '_' + str(index + 1)
+            union_list.append((union_name, child_list[first:last]))
+            name_list.append(union_name)
+        child_list = name_list
+        level += 1
+    union_list.append((name, child_list))
+    return union_list
+
+
+def get_union_queries(query_list, name, fanout=None):
+    '''
+    Return the queries of the union tree of a query list as a list of
+    (query name, query) in registration order
+    '''
+    union_query_list = []
+    for union_name, child_list in \
+            get_union_tree(len(query_list), name, fanout):
+        sub_list = [query_list[child] if isinstance(child, int)
+                    else 'SELECT * FROM ' + child
+                    for child in child_list]
+        union_query_list.append((union_name,
+                                 '\nUNION\n'.join(sub_list) + ';'))
+    return union_query_list
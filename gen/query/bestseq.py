@@ -5,14 +5,14 @@ Queries for experiments with temporal preference operators
 
 import os
 
-from gen.directory import write_to_txt, write_to_csv, get_env_file, \
-    get_tup_file, get_query_dir, get_out_file
-from gen.experiment import ALGORITHM, CQL_ALG, TS_ATT, FL_ATT, \
-    RAN, SLI, ATT, LEV, get_attribute_list, MAX_VALUE
+from gen.directory import write_to_txt, get_csv_text, get_query_batch, \
+    get_env_file, get_tup_file, get_query_dir, get_out_file
+from gen.experiment import ALGORITHM, CQL_ALG, CQL_DELTA_ALG, TS_ATT, \
+    FL_ATT, RAN, SLI, ATT, LEV, get_attribute_list, MAX_VALUE
 from gen.query.basic import REG_Q_STR, \
     REG_Q_OUTPUT_STR, get_register_stream
-from gen.query.rule import gen_rules_dict, get_rule_list, \
-    get_temporal_preferences, TYPE, FIRST, PREV, COND_PREV, COND_SOMPREV, \
+from gen.query.rule import get_preferences, get_rule_list, \
+    TYPE, FIRST, PREV, COND_PREV, COND_SOMPREV, \
     COND_ALLPREV, COND_SIMPLE, PREF, NONPREF, get_ceteris_attributes
 
 
@@ -131,6 +131,35 @@ UNION
 SELECT * FROM t{prev_n};
 '''
 
+# Transitive comparisons (semi-naive closure, only new comparisons of each
+# level are joined)
+# Composition of comparisons
+TJ_QUERY = '''
+SELECT p._pos, p.x1, np.x2, {p_att}, p.t, {np_att}, np._t
+FROM {left} AS p, {right} AS np
+WHERE p._pos = np._pos AND p.x1 = np.x1 AND p.x2 = np.x2
+AND {p_np_join}
+'''
+# Candidate comparisons (new comparisons of previous level composed with
+# all comparisons of previous level)
+TC_QUERY = '''
+{delta_prev}
+UNION
+{prev_delta};
+'''
+# New comparisons
+TD_QUERY = '''
+SELECT * FROM tc{n}
+EXCEPT
+SELECT * FROM t{prev_n};
+'''
+# All comparisons
+TN_QUERY = '''
+SELECT * FROM t{prev_n}
+UNION
+SELECT * FROM td{n};
+'''
+
 # Identifiers of dominant sequences
 ID_QUERY = '''
 SELECT DISTINCT a1 FROM z
@@ -159,83 +188,74 @@ def gen_transitive_tup(configuration, tup_file):
             rec_list.append(rec)
     att_name_list = [TS_ATT, FL_ATT, 'a2', 'a3']
     # Store records on file
-    write_to_csv(tup_file, att_name_list, rec_list)
+    write_to_txt(tup_file, get_csv_text(att_name_list, rec_list))
 
 
 def gen_bestseq_query(configuration, experiment_conf):
     '''
     Generate StreamPref queries with BESTSEQ operator
     '''
-    filename = get_query_dir(configuration, experiment_conf) + \
-        os.sep + 'bestseq.cql'
-    rules_dict = gen_rules_dict(configuration, experiment_conf)
-    pref_str = get_temporal_preferences(rules_dict)
+    batch = get_query_batch(configuration, experiment_conf)
+    pref_str = get_preferences(configuration, experiment_conf)
     query = BESTSEQ_QUERY.format(ran=experiment_conf[RAN],
                                  sli=experiment_conf[SLI],
                                  pref=pref_str)
-    write_to_txt(filename, query)
+    batch.add('bestseq.cql', query)
+    batch.flush()
 
 
-def gen_first_rule_query(out_dir, rule_number):
+def gen_first_rule_query(batch, rule_number):
     '''
     Generate query for rule with first condition
     '''
-    filename = out_dir + os.sep + 'r' + str(rule_number) + '.cql'
-    write_to_txt(filename, FIRST_QUERY)
+    batch.add('r' + str(rule_number) + '.cql', FIRST_QUERY)
 
 
-def gen_prev_rule_query(out_dir, rule_number, rule, condition_number):
+def gen_prev_rule_query(batch, rule_number, rule, condition_number):
     '''
     Generate query for rule with previous condition
     '''
-    filename = out_dir + os.sep + \
-        'r' + str(rule_number) + '_f' + str(condition_number) + '.cql'
+    name = 'r' + str(rule_number) + '_f' + str(condition_number) + '.cql'
     query = PREV_QUERY.format(cond=rule[COND_PREV])
-    write_to_txt(filename, query)
+    batch.add(name, query)
 
 
-def gen_someprev_rule_query(out_dir, rule_number, rule, condition_number):
+def gen_someprev_rule_query(batch, rule_number, rule, condition_number):
     '''
     Generate query for rule with some previous condition
     '''
-    filename = out_dir + os.sep + 'm_sp' + str(rule_number) + '.cql'
     query = MIN_SOMEPREV_QUERY.format(cond=rule[COND_SOMPREV])
-    write_to_txt(filename, query)
-    filename = out_dir + os.sep + \
-        'r' + str(rule_number) + '_f' + str(condition_number) + '.cql'
+    batch.add('m_sp' + str(rule_number) + '.cql', query)
+    name = 'r' + str(rule_number) + '_f' + str(condition_number) + '.cql'
     query = SOMEPREV_QUERY.format(rn=rule_number)
-    write_to_txt(filename, query)
+    batch.add(name, query)
 
 
-def gen_allprev_rule_query(out_dir, rule_number, rule, condition_number):
+def gen_allprev_rule_query(batch, rule_number, rule, condition_number):
     '''
     Generate query for rule with all previous condition
     '''
-    filename = out_dir + os.sep + 'nv_ap' + str(rule_number) + '.cql'
     query = NONVALID_ALLPREV_QUERY.format(cond=rule[COND_ALLPREV])
-    write_to_txt(filename, query)
-    filename = out_dir + os.sep + 'm_ap' + str(rule_number) + '.cql'
+    batch.add('nv_ap' + str(rule_number) + '.cql', query)
     query = MIN_ALLPREV_QUERY.format(rn=rule_number)
-    write_to_txt(filename, query)
-    filename = out_dir + os.sep + \
-        'r' + str(rule_number) + '_f' + str(condition_number) + '.cql'
+    batch.add('m_ap' + str(rule_number) + '.cql', query)
+    name = 'r' + str(rule_number) + '_f' + str(condition_number) + '.cql'
     query = ALLPREV_QUERY.format(rn=rule_number)
-    write_to_txt(filename, query)
+    batch.add(name, query)
 
 
-def gen_rule_queries(query_dir, experiment_conf, rule_number, rule):
+def gen_rule_queries(batch, experiment_conf, rule_number, rule):
     '''
     Generate queries for all rules
     '''
     if rule[TYPE] == FIRST:
-        gen_first_rule_query(query_dir, rule_number)
+        gen_first_rule_query(batch, rule_number)
     elif rule[TYPE] == PREV:
-        gen_prev_rule_query(query_dir, rule_number, rule, 1)
-        gen_someprev_rule_query(query_dir, rule_number, rule, 2)
-        gen_allprev_rule_query(query_dir, rule_number, rule, 3)
+        gen_prev_rule_query(batch, rule_number, rule, 1)
+        gen_someprev_rule_query(batch, rule_number, rule, 2)
+        gen_allprev_rule_query(batch, rule_number, rule, 3)
         query = COND_QUERY.format(rn=rule_number)
-        filename = query_dir + os.sep + 'r' + str(rule_number) + '.cql'
-        write_to_txt(filename, query)
+        batch.add('r' + str(rule_number) + '.cql', query)
     # All input attributes (except identifier)
     # Get attribute list
     att_list = get_attribute_list(experiment_conf[ATT])
@@ -251,15 +271,13 @@ def gen_rule_queries(query_dir, experiment_conf, rule_number, rule):
     query = DI_PREF_QUERY.format(att=att_list, attnt=attnt_list,
                                  cond=rule[COND_SIMPLE],
                                  pref=rule[PREF], rn=rule_number)
-    filename = query_dir + os.sep + 'd' + str(rule_number) + '_pref.cql'
-    write_to_txt(filename, query)
+    batch.add('d' + str(rule_number) + '_pref.cql', query)
     # Generate D_i NonPref Queries
     query = \
         DI_NONPREF_QUERY.format(att=att_list, attnt=attnt_list,
                                 cond=rule[COND_SIMPLE],
                                 nonpref=rule[NONPREF], rn=rule_number)
-    filename = query_dir + os.sep + 'd' + str(rule_number) + '_nonpref.cql'
-    write_to_txt(filename, query)
+    batch.add('d' + str(rule_number) + '_nonpref.cql', query)
     # Generate D_i Queries
     # Get attribute list
     att_list = get_attribute_list(experiment_conf[ATT])
@@ -272,13 +290,77 @@ def gen_rule_queries(query_dir, experiment_conf, rule_number, rule):
     ceteris_cond = get_ceteris_attributes(experiment_conf)
     ceteris_cond = ['p.' + att + ' = np.' + att for att in ceteris_cond]
     ceteris_cond = ' AND '.join(ceteris_cond)
-    filename = query_dir + os.sep + 'd' + str(rule_number) + '.cql'
     query = DI_QUERY.format(p_att=p_att_list, np_att=np_att_list,
                             rn=rule_number, cet_cond=ceteris_cond)
-    write_to_txt(filename, query)
+    batch.add('d' + str(rule_number) + '.cql', query)
 
 
-def gen_cql_transitive_queries(experiment_conf, query_dir):
+def _get_delta_name(level_number):
+    '''
+    Return the name of the query with new comparisons of a level
+    (all comparisons of first level are new)
+    '''
+    if level_number == 1:
+        return 't1'
+    return 'td' + str(level_number)
+
+
+def get_transitive_query_names(experiment_conf, algorithm=CQL_ALG):
+    '''
+    Return the names of the queries for transitive comparisons
+    (in registration order)
+    '''
+    name_list = []
+    for level_number in range(2, experiment_conf[LEV] + 1):
+        if algorithm == CQL_DELTA_ALG:
+            name_list += ['tc' + str(level_number),
+                          'td' + str(level_number)]
+        name_list.append('t' + str(level_number))
+    return name_list
+
+
+def gen_cql_delta_queries(experiment_conf, batch):
+    '''
+    Generate CQL queries for transitive comparisons using semi-naive
+    closure (only new comparisons of each level are joined)
+    '''
+    # Get attribute list
+    att_list = get_attribute_list(experiment_conf[ATT])
+    # Exclude sequence identifier (A1)
+    att_list = att_list[1:]
+    p_att_list = ['p.' + att for att in att_list]
+    p_att_list = ', '.join(p_att_list)
+    np_att_list = ['np._' + att for att in att_list]
+    np_att_list = ', '.join(np_att_list)
+    join_att = ['p._' + att + ' = np.' + att for att in att_list]
+    join_att = ' AND '.join(join_att)
+    for level_number in range(2, experiment_conf[LEV] + 1):
+        prev_level = level_number - 1
+        prev_name = 't' + str(prev_level)
+        delta_name = _get_delta_name(prev_level)
+        # Candidates
+        delta_prev = TJ_QUERY.format(left=delta_name, right=prev_name,
+                                     p_att=p_att_list, np_att=np_att_list,
+                                     p_np_join=join_att)
+        if delta_name == prev_name:
+            query = '\n' + delta_prev.strip() + ';\n'
+        else:
+            prev_delta = TJ_QUERY.format(left=prev_name, right=delta_name,
+                                         p_att=p_att_list,
+                                         np_att=np_att_list,
+                                         p_np_join=join_att)
+            query = TC_QUERY.format(delta_prev=delta_prev.strip(),
+                                    prev_delta=prev_delta.strip())
+        batch.add('tc' + str(level_number) + '.cql', query)
+        # New comparisons
+        query = TD_QUERY.format(n=level_number, prev_n=prev_level)
+        batch.add('td' + str(level_number) + '.cql', query)
+        # All comparisons
+        query = TN_QUERY.format(n=level_number, prev_n=prev_level)
+        batch.add('t' + str(level_number) + '.cql', query)
+
+
+def gen_cql_transitive_queries(experiment_conf, batch):
     '''
     Generate CQL queries for transitive comparisons
     '''
@@ -294,11 +376,10 @@ def gen_cql_transitive_queries(experiment_conf, query_dir):
     join_att = ['p._' + att + ' = np.' + att for att in att_list]
     join_att = ' AND '.join(join_att)
     for level_number in range(2, experiment_conf[LEV] + 1):
-        filename = query_dir + os.sep + 't' + str(level_number) + '.cql'
         prev_level = level_number - 1
         query = TI_QUERY.format(prev_n=prev_level, p_att=p_att_list,
                                 np_att=np_att_list, p_np_join=join_att)
-        write_to_txt(filename, query)
+        batch.add('t' + str(level_number) + '.cql', query)
 
 
 def gen_cql_queries(configuration, experiment_conf):
@@ -307,12 +388,11 @@ def gen_cql_queries(configuration, experiment_conf):
     '''
     filename = get_tup_file(configuration)
     gen_transitive_tup(configuration, filename)
-    query_dir = get_query_dir(configuration, experiment_conf)
+    batch = get_query_batch(configuration, experiment_conf)
     # Generate z query (sequences)
     query = Z_QUERY.format(ran=experiment_conf[RAN],
                            sli=experiment_conf[SLI])
-    filename = query_dir + os.sep + 'z.cql'
-    write_to_txt(filename, query)
+    batch.add('z.cql', query)
     # Generate p_join query (join z positions)
     # Get attribute list
     att_list = get_attribute_list(experiment_conf[ATT])
@@ -323,14 +403,12 @@ def gen_cql_queries(configuration, experiment_conf):
     z2_att_list = ['z2.' + att + ' AS _' + att for att in att_list]
     z2_att_list = ', '.join(z2_att_list)
     query = P_JOIN_QUERY.format(z1_att=z1_att_list, z2_att=z2_att_list)
-    filename = query_dir + os.sep + 'p_join.cql'
-    write_to_txt(filename, query)
+    batch.add('p_join.cql', query)
     # Generate query p (positions to be compared)
     diff_filter = ['NOT ' + att + ' = _' + att for att in att_list]
     diff_filter = ' OR '.join(diff_filter)
     query = P_QUERY.format(p_filter=diff_filter)
-    filename = query_dir + os.sep + 'p.cql'
-    write_to_txt(filename, query)
+    batch.add('p.cql', query)
     # Get rule list
     rule_list = get_rule_list(configuration, experiment_conf)
     # Generate query t1 (identifier of dominant sequences) and
@@ -338,22 +416,23 @@ def gen_cql_queries(configuration, experiment_conf):
     query_list = []
     for index, rule in enumerate(rule_list):
         # Generates queries R_i and D_i for each rule
-        gen_rule_queries(query_dir, experiment_conf, index + 1, rule)
+        gen_rule_queries(batch, experiment_conf, index + 1, rule)
         query = 'SELECT * FROM d' + str(index + 1)
         query_list.append(query)
     query = '\nUNION\n'.join(query_list) + ';'
-    filename = query_dir + os.sep + 't1.cql'
-    write_to_txt(filename, query)
+    batch.add('t1.cql', query)
     # Generate T_i Queries
-    gen_cql_transitive_queries(experiment_conf, query_dir)
+    if experiment_conf[ALGORITHM] == CQL_DELTA_ALG:
+        gen_cql_delta_queries(experiment_conf, batch)
+    else:
+        gen_cql_transitive_queries(experiment_conf, batch)
     # Generate ID query
     query = ID_QUERY.format(rn=experiment_conf[LEV])
-    filename = query_dir + os.sep + 'id.cql'
-    write_to_txt(filename, query)
+    batch.add('id.cql', query)
     # Generate query for final result
     query = 'SELECT z.* FROM z, id WHERE z.a1 = id.a1;'
-    filename = query_dir + os.sep + 'equiv.cql'
-    write_to_txt(filename, query)
+    batch.add('equiv.cql', query)
+    batch.flush()
 
 
 def gen_all_queries(configuration, experiment_list):
@@ -361,7 +440,7 @@ def gen_all_queries(configuration, experiment_list):
     Generate all queries
     '''
     for exp_conf in experiment_list:
-        if exp_conf[ALGORITHM] == CQL_ALG:
+        if exp_conf[ALGORITHM] in [CQL_ALG, CQL_DELTA_ALG]:
             gen_cql_queries(configuration, exp_conf)
         else:
             gen_bestseq_query(configuration, exp_conf)
@@ -450,9 +529,8 @@ def gen_cql_env(configuration, experiment_conf, output):
     query_name = 't1'
     filename = query_dir + os.sep + query_name + '.cql'
     text += REG_Q_STR.format(qname=query_name, qfile=filename)
-    level = experiment_conf[LEV]
-    for number in range(2, level + 1):
-        query_name = 't' + str(number)
+    for query_name in get_transitive_query_names(experiment_conf,
+                                                 experiment_conf[ALGORITHM]):
         filename = query_dir + os.sep + query_name + '.cql'
         text += REG_Q_STR.format(qname=query_name, qfile=filename)
     query_name = 'id'
@@ -499,7 +577,7 @@ def gen_all_env(configuration, experiment_list, output=False):
     Generate all environment files
     '''
     for exp_conf in experiment_list:
-        if exp_conf[ALGORITHM] == CQL_ALG:
+        if exp_conf[ALGORITHM] in [CQL_ALG, CQL_DELTA_ALG]:
             gen_cql_env(configuration, exp_conf, output)
         else:
             gen_bestseq_env(configuration, exp_conf, output)
@@ -5,8 +5,8 @@ Queries for experiments with CONSEQ operator
 
 import os
 
-from gen.directory import write_to_txt, get_env_file, get_query_dir, \
-    get_out_file
+from gen.directory import write_to_txt, get_query_batch, get_env_file, \
+    get_query_dir, get_out_file
 from gen.experiment import SLI, RAN, ALGORITHM, CQL_ALG, ATT, \
     get_attribute_list
 from gen.query.basic import get_register_stream, REG_Q_OUTPUT_STR, REG_Q_STR
@@ -86,46 +86,39 @@ def gen_conseq_query(configuration, experiment_conf):
     '''
     Generate queries with CONSEQ operator
     '''
-    query_dir = get_query_dir(configuration, experiment_conf)
-    filename = query_dir + os.sep + 'conseq.cql'
+    batch = get_query_batch(configuration, experiment_conf)
     query = CONSEQ_QUERY.format(ran=experiment_conf[RAN],
                                 sli=experiment_conf[SLI])
-    write_to_txt(filename, query)
+    batch.add('conseq.cql', query)
+    batch.flush()
 
 
-def gen_cql_z_query(query_dir, experiment_conf):
+def gen_cql_z_query(batch, experiment_conf):
     '''
     Consider RANGE and SLIDE and generate Z relation
     '''
     query = CQL_Z.format(ran=experiment_conf[RAN],
                          sli=experiment_conf[SLI])
-    filename = query_dir + os.sep + 'z.cql'
-    write_to_txt(filename, query)
+    batch.add('z.cql', query)
 
 
 def gen_cql_queries(configuration, experiment_conf):
     '''
     Generate all CQL queries equivalent to CONSEQ operator
     '''
-    query_dir = get_query_dir(configuration, experiment_conf)
-    filename = query_dir + os.sep + 'table_ots.cql'
-    write_to_txt(filename, CQL_TABLE_OTS)
-    filename = query_dir + os.sep + 'stream_ots.cql'
-    write_to_txt(filename, CQL_STREAM_OTS)
-    gen_cql_z_query(query_dir, experiment_conf)
-    filename = query_dir + os.sep + 'z_prime.cql'
-    write_to_txt(filename, CQL_Z_PRIME)
-    filename = query_dir + os.sep + 'p_start.cql'
-    write_to_txt(filename, CQL_P_START)
-    filename = query_dir + os.sep + 'p_end.cql'
-    write_to_txt(filename, CQL_P_END)
-    filename = query_dir + os.sep + 'p_start_end.cql'
-    write_to_txt(filename, CQL_P_START_END)
-    filename = query_dir + os.sep + 'equiv.cql'
+    batch = get_query_batch(configuration, experiment_conf)
+    batch.add('table_ots.cql', CQL_TABLE_OTS)
+    batch.add('stream_ots.cql', CQL_STREAM_OTS)
+    gen_cql_z_query(batch, experiment_conf)
+    batch.add('z_prime.cql', CQL_Z_PRIME)
+    batch.add('p_start.cql', CQL_P_START)
+    batch.add('p_end.cql', CQL_P_END)
+    batch.add('p_start_end.cql', CQL_P_START_END)
     att_list = get_attribute_list(experiment_conf[ATT], 'z.')
     att_list = ', '.join(att_list)
     query = CQL_EQUIV.format(zatt=att_list)
-    write_to_txt(filename, query)
+    batch.add('equiv.cql', query)
+    batch.flush()
 
 
 def gen_all_queries(configuration, experiment_list):
@@ -5,11 +5,12 @@ Queries for experiments with ENDSEQ operator
 
 import os
 
-from gen.directory import write_to_txt, get_env_file, get_query_dir, \
-    get_out_file
+from gen.directory import write_to_txt, get_query_batch, get_env_file, \
+    get_query_dir, get_out_file
 from gen.experiment import SLI, RAN, ALGORITHM, CQL_ALG, ATT, \
     get_attribute_list
-from gen.query.basic import get_register_stream, REG_Q_OUTPUT_STR, REG_Q_STR
+from gen.query.basic import get_register_stream, REG_Q_OUTPUT_STR, \
+    REG_Q_STR, get_union_fanout, get_union_queries, get_union_tree
 
 
 # =============================================================================
@@ -40,20 +41,18 @@ def gen_endseq_query(configuration, experiment_conf):
     '''
     Generate queries with ENDSEQ operator
     '''
-    query_dir = get_query_dir(configuration, experiment_conf)
-    filename = query_dir + os.sep + 'endseq.cql'
+    batch = get_query_batch(configuration, experiment_conf)
     query = ENDSEQ_QUERY.format(ran=experiment_conf[RAN],
                                 sli=experiment_conf[SLI])
-    write_to_txt(filename, query)
+    batch.add('endseq.cql', query)
+    batch.flush()
 
 
-def gen_cql_final_query(query_dir, experiment_conf):
+def gen_cql_final_query(batch, experiment_conf, fanout=None):
     '''
     Generate final query equivalent to ENDSEQ operator
+    (union tree with fanout queries in each union, flat union without it)
     '''
-    filename = query_dir + os.sep + 'equiv.cql'
-    if os.path.isfile(filename):
-        return
     range_value = experiment_conf[RAN]
     att_list = get_attribute_list(experiment_conf[ATT])
     att_str = ', '.join(att_list)
@@ -61,22 +60,22 @@ def gen_cql_final_query(query_dir, experiment_conf):
     for position in range(1, range_value + 1):
         pos_query = CQL_EQUIV.format(att=att_str, ran=position)
         pos_query_list.append(pos_query)
-    query = '\nUNION\n'.join(pos_query_list) + ';'
-    out_file = open(filename, 'w')
-    out_file.write(query)
-    out_file.close()
+    for query_name, query in \
+            get_union_queries(pos_query_list, 'equiv', fanout):
+        batch.add(query_name + '.cql', query)
 
 
 def gen_cql_queries(configuration, experiment_conf):
     '''
     Generate all CQL queries equivalent to ENDSEQ operator
     '''
-    query_dir = get_query_dir(configuration, experiment_conf)
+    batch = get_query_batch(configuration, experiment_conf)
     query = CQL_Z.format(ran=experiment_conf[RAN],
                          sli=experiment_conf[SLI])
-    filename = query_dir + os.sep + 'z.cql'
-    write_to_txt(filename, query)
-    gen_cql_final_query(query_dir, experiment_conf)
+    batch.add('z.cql', query)
+    gen_cql_final_query(batch, experiment_conf,
+                        get_union_fanout(configuration))
+    batch.flush()
 #     filename = query_dir + os.sep + 'equiv.cql'
 #     att_list = get_attribute_list(experiment_conf[ATT])
 #     att_list = ', '.join(att_list)
@@ -125,6 +124,12 @@ def gen_cql_env(configuration, experiment_conf, output):
     # Environment files for equivalent CQL queries
     filename = query_dir + os.sep + 'z.cql'
     text += REG_Q_STR.format(qname='z', qfile=filename)
+    # Unions of final positions (balanced shape)
+    union_list = get_union_tree(experiment_conf[RAN], 'equiv',
+                                get_union_fanout(configuration))
+    for query_name, _ in union_list[:-1]:
+        filename = query_dir + os.sep + query_name + '.cql'
+        text += REG_Q_STR.format(qname=query_name, qfile=filename)
     # Final equivalent query
     filename = query_dir + os.sep + 'equiv.cql'
     if output:
@@ -5,8 +5,8 @@ Queries for experiments with MINSEQ operator
 
 import os
 
-from gen.directory import write_to_txt, get_env_file, get_query_dir, \
-    get_out_file
+from gen.directory import write_to_txt, get_query_batch, get_env_file, \
+    get_query_dir, get_out_file
 from gen.experiment import SLI, RAN, MIN, ALGORITHM, CQL_ALG
 from gen.query.basic import get_register_stream, REG_Q_OUTPUT_STR, REG_Q_STR
 
@@ -45,28 +45,26 @@ def gen_minseq_query(configuration, experiment_conf):
     '''
     Generate queries with MINSEQ operator
     '''
-    query_dir = get_query_dir(configuration, experiment_conf)
-    filename = query_dir + os.sep + 'minseq.cql'
+    batch = get_query_batch(configuration, experiment_conf)
     query = MINSEQ_QUERY.format(min=experiment_conf[MIN],
                                 ran=experiment_conf[RAN],
                                 sli=experiment_conf[SLI])
-    write_to_txt(filename, query)
+    batch.add('minseq.cql', query)
+    batch.flush()
 
 
 def gen_cql_queries(configuration, experiment_conf):
     '''
     Generate all CQL queries equivalent to MINSEQ operator
     '''
-    query_dir = get_query_dir(configuration, experiment_conf)
+    batch = get_query_batch(configuration, experiment_conf)
     query = CQL_Z.format(ran=experiment_conf[RAN],
                          sli=experiment_conf[SLI])
-    filename = query_dir + os.sep + 'z.cql'
-    write_to_txt(filename, query)
+    batch.add('z.cql', query)
     query = CQL_ZMIN.format(min=experiment_conf[MIN])
-    filename = query_dir + os.sep + 'zmin.cql'
-    write_to_txt(filename, query)
-    filename = query_dir + os.sep + 'equiv.cql'
-    write_to_txt(filename, CQL_EQUIV)
+    batch.add('zmin.cql', query)
+    batch.add('equiv.cql', CQL_EQUIV)
+    batch.flush()
 
 
 def gen_all_queries(configuration, experiment_list):
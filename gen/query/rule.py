@@ -2,6 +2,8 @@
 '''
 Rules for queries with temporal preference operators
 '''
+from collections import namedtuple
+
 from gen.experiment import LEV, RUL, IND, ATT, PARAMETER, MAX_VALUE
 
 # =============================================================================
@@ -24,6 +26,17 @@ FIRST = 'first'
 PREV = 'prev'
 TYPE_LIST = [FIRST, PREV]
 
+# =============================================================================
+# Compiled rules
+# =============================================================================
+# Rules of a rule configuration (immutable rule list in the order of
+# TYPE_LIST and rendered preference clause)
+CompiledRules = namedtuple('CompiledRules', ['rule_list', 'preferences'])
+# Cache of compiled rules indexed by (RUL, LEV, IND, MAX_VALUE)
+_RULES_CACHE = {}
+# Cache of ceteris paribus attributes indexed by (ATT, IND)
+_CETERIS_CACHE = {}
+
 
 def gen_rule(configuration, experiment_conf, rule_type, pref_value):
     '''
@@ -117,12 +130,16 @@ def get_rule_string(rule):
 
 def get_ceteris_attributes(experiment_conf):
     '''
-    Get the list of ceteris paribus attributes
+    Get the list of ceteris paribus attributes (memoized, immutable)
     '''
-    # Ceteris paribus attributes does no include not include identifier (A1),
-    # preference attribute (A2) and indifferent attributes
-    return['a'+str(att)
-           for att in range(3, experiment_conf[ATT]-experiment_conf[IND]+1)]
+    key = (experiment_conf[ATT], experiment_conf[IND])
+    if key not in _CETERIS_CACHE:
+        # Ceteris paribus attributes does no include not include identifier
+        # (A1), preference attribute (A2) and indifferent attributes
+        _CETERIS_CACHE[key] = tuple(
+            'a'+str(att)
+            for att in range(3, experiment_conf[ATT]-experiment_conf[IND]+1))
+    return _CETERIS_CACHE[key]
 
 
 def get_temporal_preferences(rules_dict):
@@ -136,12 +153,32 @@ def get_temporal_preferences(rules_dict):
     return '\nAND\n'.join(rule_str_list)
 
 
+def compile_rules(configuration, experiment_conf):
+    '''
+    Return the compiled rules of an experiment
+    (memoized, rules depend only on RUL, LEV, IND and MAX_VALUE)
+    '''
+    key = (experiment_conf[RUL], experiment_conf[LEV], experiment_conf[IND],
+           configuration[MAX_VALUE])
+    if key not in _RULES_CACHE:
+        rule_dict = gen_rules_dict(configuration, experiment_conf)
+        rule_list = []
+        for rule_type in TYPE_LIST:
+            rule_list += rule_dict[rule_type]
+        _RULES_CACHE[key] = CompiledRules(
+            tuple(rule_list), get_temporal_preferences(rule_dict))
+    return _RULES_CACHE[key]
+
+
 def get_rule_list(configuration, experiment_conf):
     '''
-    Get rule list from rule dictionary
+    Get rule list (compiled rules)
     '''
-    rule_dict = gen_rules_dict(configuration, experiment_conf)
-    rule_list = []
-    for rule_type in TYPE_LIST:
-        rule_list += rule_dict[rule_type]
-    return rule_list
+    return compile_rules(configuration, experiment_conf).rule_list
+
+
+def get_preferences(configuration, experiment_conf):
+    '''
+    Get string for preference clause (compiled rules)
+    '''
+    return compile_rules(configuration, experiment_conf).preferences
@@ -5,12 +5,12 @@ Queries for experiments with SEQ operator
 
 import os
 
-from gen.directory import write_to_txt, \
+from gen.directory import write_to_txt, get_query_batch, \
     get_env_file, get_query_dir, get_out_file
 from gen.experiment import SLI, RAN, ATT, ALGORITHM, \
-    CQL_ALG, get_attribute_list
+    CQL_ALG, CQL_SHAPE, FLAT_SHAPE, BALANCED_SHAPE, get_attribute_list
 from gen.query.basic import REG_Q_OUTPUT_STR, REG_Q_STR, \
-    get_register_stream
+    get_register_stream, get_union_fanout, get_union_queries, get_union_tree
 
 
 # =============================================================================
@@ -50,41 +50,107 @@ CQL_PI_FINAL = '''
     SELECT {pos} AS _pos, {att} FROM p{pos}, w
     WHERE p{pos}.a1 = w.a1 AND p{pos}._pos = w._pos
     '''
+# Balanced shape (positions reached by jumps of 2^k positions)
+# J0_JOIN (later positions of the same identifier)
+CQL_J0_JOIN = '''
+    SELECT wa._pos, wa.a1, wb._pos AS _next
+    FROM w AS wa, w AS wb
+    WHERE wa.a1 = wb.a1 AND wa._pos < wb._pos;
+    '''
+# J0 (next position of each position)
+CQL_J0 = '''
+    SELECT MIN(_next) AS _next, _pos, a1 FROM j0_join
+    GROUP BY _pos, a1;
+    '''
+# J_k (position 2^k positions after each position, j_(k-1) twice)
+CQL_JK = '''
+    SELECT jb._next, ja._pos, ja.a1 FROM j{prev} AS ja, j{prev} AS jb
+    WHERE ja.a1 = jb.a1 AND ja._next = jb._pos;
+    '''
+# P_i (p_(i-2^k) followed by a jump of 2^k positions)
+CQL_PI_JUMP = '''
+    SELECT jp._next AS _pos, jp.a1 FROM p{prev} AS pp, j{jump} AS jp
+    WHERE pp.a1 = jp.a1 AND pp._pos = jp._pos;
+    '''
 
 
 def gen_seq_query(configuration, experiment_conf):
     '''
     Generate queries with SEQ operator
     '''
-    query_dir = get_query_dir(configuration, experiment_conf)
-    filename = query_dir + os.sep + 'seq.cql'
+    batch = get_query_batch(configuration, experiment_conf)
     query = SEQ_QUERY.format(ran=experiment_conf[RAN],
                              sli=experiment_conf[SLI])
-    write_to_txt(filename, query)
+    batch.add('seq.cql', query)
+    batch.flush()
+
+
+def _get_jump(position):
+    '''
+    Return the largest jump (k for 2^k positions) used to reach a position
+    from a previous one (-1 for first position)
+    '''
+    return (position - 1).bit_length() - 1
+
+
+def get_position_query_names(experiment_conf, shape=FLAT_SHAPE):
+    '''
+    Return the names of the queries to get each position
+    (in registration order)
+    '''
+    range_value = experiment_conf[RAN]
+    name_list = ['w1', 'p1']
+    if shape == BALANCED_SHAPE:
+        name_list += ['j0_join', 'j0']
+        name_list += ['j' + str(jump)
+                      for jump in range(1, _get_jump(range_value) + 1)]
+        name_list += ['p' + str(pos) for pos in range(2, range_value + 1)]
+    else:
+        for pos in range(2, range_value + 1):
+            name_list += ['w' + str(pos), 'p' + str(pos)]
+    return name_list
+
+
+def gen_cql_jump_queries(batch, experiment_conf):
+    '''
+    Generate queries to get each position through jumps of 2^k positions
+    (position chains with logarithmic depth)
+    '''
+    range_value = experiment_conf[RAN]
+    batch.add('j0_join.cql', CQL_J0_JOIN)
+    batch.add('j0.cql', CQL_J0)
+    # J_k
+    for jump in range(1, _get_jump(range_value) + 1):
+        query = CQL_JK.format(prev=jump - 1)
+        batch.add('j' + str(jump) + '.cql', query)
+    # P_i
+    for position in range(2, range_value + 1):
+        jump = _get_jump(position)
+        query = CQL_PI_JUMP.format(prev=position - 2 ** jump, jump=jump)
+        batch.add('p' + str(position) + '.cql', query)
 
 
-def gen_cql_position_queries(query_dir, experiment_conf):
+def gen_cql_position_queries(batch, experiment_conf, shape=FLAT_SHAPE):
     '''
     Generate queries to get each position
     '''
     # Generate W_1
-    filename = query_dir + os.sep + 'w1.cql'
-    write_to_txt(filename, CQL_W1)
+    batch.add('w1.cql', CQL_W1)
+    if shape == BALANCED_SHAPE:
+        batch.add('p1.cql', CQL_PI.format(pos=1))
+        gen_cql_jump_queries(batch, experiment_conf)
+        return
     # W_i
     for range_value in range(2, experiment_conf[RAN] + 1):
         query = CQL_WI.format(prev=range_value - 1)
-        filename = query_dir + os.sep + \
-            'w' + str(range_value) + '.cql'
-        write_to_txt(filename, query)
+        batch.add('w' + str(range_value) + '.cql', query)
     # P_i
     for range_value in range(1, experiment_conf[RAN] + 1):
         query = CQL_PI.format(pos=range_value)
-        filename = query_dir + os.sep + \
-            'p' + str(range_value) + '.cql'
-        write_to_txt(filename, query)
+        batch.add('p' + str(range_value) + '.cql', query)
 
 
-def gen_cql_w_query(query_dir, experiment_conf):
+def gen_cql_w_query(batch, experiment_conf):
     '''
     Consider RANGE and SLIDE and generate W relation
     '''
@@ -94,13 +160,13 @@ def gen_cql_w_query(query_dir, experiment_conf):
     # W
     query = CQL_W.format(att=att_str, ran=experiment_conf[RAN],
                          sli=experiment_conf[SLI])
-    filename = query_dir + os.sep + 'w.cql'
-    write_to_txt(filename, query)
+    batch.add('w.cql', query)
 
 
-def gen_cql_final_query(query_dir, experiment_conf):
+def gen_cql_final_query(batch, experiment_conf, fanout=None):
     '''
     Generate final query equivalent to SEQ operator for a range parameter
+    (union tree with fanout queries in each union, flat union without it)
     '''
     # Get attribute list
     att_list = get_attribute_list(experiment_conf[ATT], prefix='w.')
@@ -111,30 +177,31 @@ def gen_cql_final_query(query_dir, experiment_conf):
         pos_query = CQL_PI_FINAL.format(pos=position, att=att_str)
         pos_query_list.append(pos_query)
     # Equivalent is the union of final positions
-    query = '\nUNION\n'.join(pos_query_list) + ';'
-    filename = query_dir + os.sep + 'equiv.cql'
-    write_to_txt(filename, query)
+    for query_name, query in \
+            get_union_queries(pos_query_list, 'equiv', fanout):
+        batch.add(query_name + '.cql', query)
 
 
-def gen_cql_rpos_spos_queries(query_dir):
+def gen_cql_rpos_spos_queries(batch):
     '''
     Generate RPOS and SPOS queries
     '''
-    filename = query_dir + os.sep + 'rpos.cql'
-    write_to_txt(filename, CQL_RPOS)
-    filename = query_dir + os.sep + 'spos.cql'
-    write_to_txt(filename, CQL_SPOS)
+    batch.add('rpos.cql', CQL_RPOS)
+    batch.add('spos.cql', CQL_SPOS)
 
 
 def gen_cql_queries(configuration, experiment_conf):
     '''
     Generate all CQL queries equivalent to SEQ operator
     '''
-    query_dir = get_query_dir(configuration, experiment_conf)
-    gen_cql_rpos_spos_queries(query_dir)
-    gen_cql_position_queries(query_dir, experiment_conf)
-    gen_cql_w_query(query_dir, experiment_conf)
-    gen_cql_final_query(query_dir, experiment_conf)
+    batch = get_query_batch(configuration, experiment_conf)
+    gen_cql_rpos_spos_queries(batch)
+    gen_cql_position_queries(batch, experiment_conf,
+                             configuration.get(CQL_SHAPE, FLAT_SHAPE))
+    gen_cql_w_query(batch, experiment_conf)
+    gen_cql_final_query(batch, experiment_conf,
+                        get_union_fanout(configuration))
+    batch.flush()
 
 
 def gen_all_queries(configuration, experiment_list):
@@ -185,18 +252,17 @@ def gen_cql_env(configuration, experiment_conf, output):
     # W
     filename = query_dir + os.sep + 'w.cql'
     text += REG_Q_STR.format(qname='w', qfile=filename)
-    # W1 and P1
-    filename = query_dir + os.sep + 'w1.cql'
-    text += REG_Q_STR.format(qname='w1', qfile=filename)
-    filename = query_dir + os.sep + 'p1.cql'
-    text += REG_Q_STR.format(qname='p1', qfile=filename)
-    # W_i and P_i
-    range_value = experiment_conf[RAN]
-    for pos in range(2, range_value + 1):
-        filename = query_dir + os.sep + 'w' + str(pos) + '.cql'
-        text += REG_Q_STR.format(qname='w' + str(pos), qfile=filename)
-        filename = query_dir + os.sep + 'p' + str(pos) + '.cql'
-        text += REG_Q_STR.format(qname='p' + str(pos), qfile=filename)
+    # Positions (W_i and P_i or jumps and P_i)
+    shape = configuration.get(CQL_SHAPE, FLAT_SHAPE)
+    for query_name in get_position_query_names(experiment_conf, shape):
+        filename = query_dir + os.sep + query_name + '.cql'
+        text += REG_Q_STR.format(qname=query_name, qfile=filename)
+    # Unions of final positions (balanced shape)
+    union_list = get_union_tree(experiment_conf[RAN], 'equiv',
+                                get_union_fanout(configuration))
+    for query_name, _ in union_list[:-1]:
+        filename = query_dir + os.sep + query_name + '.cql'
+        text += REG_Q_STR.format(qname=query_name, qfile=filename)
     # Final equivalent query
     filename = query_dir + os.sep + 'equiv.cql'
     if output:
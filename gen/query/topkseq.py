@@ -5,13 +5,12 @@ Queries for experiments with temporal preference operators
 
 import os
 
-from gen.directory import write_to_txt, get_env_file, \
+from gen.directory import write_to_txt, get_query_batch, get_env_file, \
     get_query_dir, get_out_file
 from gen.experiment import RAN, SLI, TOP
 from gen.query.basic import REG_Q_STR, \
     REG_Q_OUTPUT_STR, get_register_stream
-from gen.query.rule import gen_rules_dict, \
-    get_temporal_preferences
+from gen.query.rule import get_preferences
 
 
 # =============================================================================
@@ -29,15 +28,14 @@ def gen_topkseq_query(configuration, experiment_conf):
     '''
     Generate StreamPref queries with TOPKSEQ operator
     '''
-    filename = get_query_dir(configuration, experiment_conf) + \
-        os.sep + 'topkseq.cql'
-    rules_dict = gen_rules_dict(configuration, experiment_conf)
-    pref_str = get_temporal_preferences(rules_dict)
+    batch = get_query_batch(configuration, experiment_conf)
+    pref_str = get_preferences(configuration, experiment_conf)
     query = TOPKSEQ_QUERY.format(top=experiment_conf[TOP],
                                  ran=experiment_conf[RAN],
                                  sli=experiment_conf[SLI],
                                  pref=pref_str)
-    write_to_txt(filename, query)
+    batch.add('topkseq.cql', query)
+    batch.flush()
 
 
 def gen_all_queries(configuration, experiment_list):
@@ -4,7 +4,7 @@ Queries for experiments with statistics operators
 '''
 from gen.experiment import OPERATOR_LIST, ENDSEQ, CONSEQ, RAN, SLI, MINSEQ, \
     MIN, MAXSEQ, MAX
-from gen.query.rule import gen_rules_dict, get_temporal_preferences
+from gen.query.rule import get_preferences
 from gen.directory import get_query_util_file, write_to_txt, \
     get_env_util_file
 from gen.query.basic import get_register_stream, REG_Q_STR
@@ -65,8 +65,7 @@ def gen_util_query(configuration, experiment_conf):
     if len(where_list):
         query += '\nWHERE ' + ' AND '.join(where_list)
     # Select correct query
-    rules_dict = gen_rules_dict(configuration, experiment_conf)
-    pref_str = get_temporal_preferences(rules_dict)
+    pref_str = get_preferences(configuration, experiment_conf)
     query += Q_BESTSEQ.format(pref=pref_str)
     # Store query code
     filename = get_query_util_file(configuration, experiment_conf)
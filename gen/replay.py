@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+'''
+Replay of generated data streams through local sockets
+'''
+
+import math
+import os
+import socket
+import time
+
+from gen.directory import find_file, open_read_file
+
+
+# Interval (seconds) between throughput reports during replay
+REPORT_INTERVAL = 5.0
+
+
+def parse_stream_file(text):
+    '''
+    Parse a data stream file argument (plain or compressed file)
+    '''
+    if find_file(text) is None:
+        raise ValueError('Data stream file not found: ' + text)
+    return text
+
+
+def parse_rate(text):
+    '''
+    Parse a rate argument (positive number of tuples per second)
+    '''
+    rate = float(text)
+    if rate <= 0:
+        raise ValueError('Invalid rate (must be positive): ' + text)
+    return rate
+
+
+def parse_burst(text):
+    '''
+    Parse a burst argument (at least one tuple per burst)
+    '''
+    burst = int(text)
+    if burst < 1:
+        raise ValueError('Invalid burst (must be at least 1): ' + text)
+    return burst
+
+
+def open_server_socket(address):
+    '''
+    Open a listening socket
+    (TCP for addresses 'host:port', Unix socket for paths)
+    '''
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, int(port)))
+    else:
+        if os.path.exists(address):
+            os.remove(address)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(address)
+    server.listen(1)
+    return server
+
+
+def get_send_time(tuples, rate, ramp):
+    '''
+    Return the time (seconds since replay start) to send a number of tuples
+    (rate grows linearly from zero to target rate during warm-up ramp)
+    '''
+    # Tuples sent during warm-up ramp
+    ramp_tuples = rate * ramp / 2.0
+    if tuples < ramp_tuples:
+        return math.sqrt(2.0 * ramp * tuples / rate)
+    return ramp / 2.0 + float(tuples) / rate
+
+
+def report_throughput(tuples, elapsed, rate=None, ramp_tuples=0,
+                      ramp_elapsed=0.0):
+    '''
+    Print achieved throughput (and target throughput if any)
+    Tuples sent during a finished warm-up ramp (ramp_tuples in ramp_elapsed
+    seconds) are reported apart, so the achieved throughput is the steady
+    one
+    '''
+    steady_elapsed = elapsed - ramp_elapsed
+    achieved = (tuples - ramp_tuples) / steady_elapsed \
+        if steady_elapsed > 0 else float('NaN')
+    text = 'Tuples: {tup}, time: {tim:.3f}s'.format(tup=tuples, tim=elapsed)
+    if ramp_tuples > 0:
+        text += ' (warm-up: {tup} tuples, {tim:.3f}s)'.format(
+            tup=ramp_tuples, tim=ramp_elapsed)
+    text += ', achieved: {ach:.1f} tuples/s'.format(ach=achieved)
+    if rate is not None:
+        text += ', target: {rat:.1f} tuples/s ({pct:.1f}%)'.format(
+            rat=rate, pct=100.0 * achieved / rate)
+    print text
+
+
+def _read_instants(in_file):
+    '''
+    Read tuples of a data stream file grouped by instant
+    (list of CSV lines for every timestamp)
+    '''
+    instant = None
+    line_list = []
+    for line in in_file:
+        timestamp = line.split(',', 1)[0]
+        if timestamp != instant and line_list:
+            yield line_list
+            line_list = []
+        instant = timestamp
+        line_list.append(line)
+    if line_list:
+        yield line_list
+
+
+def _read_bursts(in_file, burst):
+    '''
+    Read tuples of a data stream file grouped in bursts
+    '''
+    line_list = []
+    for line in in_file:
+        line_list.append(line)
+        if len(line_list) == burst:
+            yield line_list
+            line_list = []
+    if line_list:
+        yield line_list
+
+
+def replay_stream(connection, filename, rate=None, interval=None, burst=1,
+                  ramp=0.0):
+    '''
+    Send a data stream file through a connection
+    Tuples are paced by rate (tuples per second, sent in bursts, with
+    optional warm-up ramp in seconds) or by timestamp (all tuples of an
+    instant together, interval seconds between consecutive timestamps).
+    Without rate and interval, tuples are sent as fast as possible.
+    Return the number of tuples sent and the elapsed time, in total and
+    during the warm-up ramp
+    '''
+    in_file = open_read_file(find_file(filename))
+    # Header
+    connection.sendall(in_file.readline())
+    if interval is not None:
+        group_iter = _read_instants(in_file)
+    else:
+        group_iter = _read_bursts(in_file, burst)
+    tuples = 0
+    first_ts = None
+    # Tuples sent and elapsed time when the warm-up ramp ends
+    ramp_tuples = 0
+    ramp_elapsed = 0.0
+    in_ramp = rate is not None and ramp > 0
+    start = time.time()
+    next_report = start + REPORT_INTERVAL
+    for line_list in group_iter:
+        # Scheduled time of current group (from replay start to avoid drift)
+        if interval is not None:
+            timestamp = int(line_list[0].split(',', 1)[0])
+            if first_ts is None:
+                first_ts = timestamp
+            delay = start + (timestamp - first_ts) * interval - time.time()
+        elif rate is not None:
+            delay = start + get_send_time(tuples, rate, ramp) - time.time()
+        else:
+            delay = 0
+        if delay > 0:
+            time.sleep(delay)
+        if in_ramp and tuples >= rate * ramp / 2.0:
+            ramp_tuples = tuples
+            ramp_elapsed = time.time() - start
+            in_ramp = False
+        connection.sendall(''.join(line_list))
+        tuples += len(line_list)
+        now = time.time()
+        if now >= next_report:
+            report_throughput(tuples, now - start, rate, ramp_tuples,
+                              ramp_elapsed)
+            next_report += REPORT_INTERVAL
+    in_file.close()
+    return tuples, time.time() - start, ramp_tuples, ramp_elapsed
+
+
+def serve_stream(filename, address, rate=None, interval=None, burst=1,
+                 ramp=0.0, clients=1):
+    '''
+    Replay a data stream file to every client connecting to a local socket
+    '''
+    server = open_server_socket(address)
+    for _ in range(clients):
+        print 'Waiting for connection on ' + address
+        connection, _ = server.accept()
+        try:
+            tuples, elapsed, ramp_tuples, ramp_elapsed = \
+                replay_stream(connection, filename, rate, interval, burst,
+                              ramp)
+            report_throughput(tuples, elapsed, rate, ramp_tuples,
+                              ramp_elapsed)
+        except socket.error as err:
+            print 'Connection closed by client: ' + str(err)
+        connection.close()
+    server.close()
+    if ':' not in address:
+        os.remove(address)
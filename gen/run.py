@@ -4,18 +4,31 @@ Experiments execution
 '''
 
 import csv
+import math
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 import os
+from Queue import Queue
+import subprocess
+import threading
+import time
 
 from gen.directory import get_detail_file, get_env_file, write_result_file, \
     get_summary_file, get_result_file, get_env_util_file, \
-    get_detail_util_file
-from gen.experiment import PARAMETER, RAN, VAR, SLI, CQL_ALG, \
+    get_detail_util_file, get_data_file, get_out_file, get_compression, \
+    find_file, open_read_file, compress_file, expand_file, \
+    expand_query_bundle
+from gen.fifo import start_fifo_producer, stop_fifo_producer
+from gen.experiment import PARAMETER, RAN, VAR, SLI, CQL_ALG, CQL_DELTA_ALG, \
     SEQ_ALG, RUNTIME, MEMORY, SUM_RUN, SUM_MEM, BNL_SEARCH_ALG, \
     INC_PARTITION_SEQTREE_ALG, INC_PARTITIONLIST_SEQTREE_ALG, \
     INC_PARTITION_SEQTREE_PRUNING_ALG, INC_PARTITIONLIST_SEQTREE_PRUNING_ALG, \
     ALGORITHM, ALGORITHM_LIST, get_varied_parameters, get_default_experiment,\
     NAIVE_SUBSEQ_ALG, INC_SUBSEQ_ALG, MINSEQ_ALG, MAXSEQ_ALG,\
-    get_variated_parameters, OPERATOR_LIST, UTIL_ATT_LIST, UTIL_IN, DEF
+    get_variated_parameters, OPERATOR_LIST, UTIL_ATT_LIST, UTIL_IN, DEF, \
+    FIFO_MODE, Experiment, DESIGN_ID, ONE_AT_A_TIME_DESIGN, get_design, \
+    get_id, get_util_id, iter_design_points, CI_TARGET, MAX_RUN_COUNT, \
+    OUTLIER_SCORE, RUN_WORKERS, RUN_CPUS
 
 
 # Command for experiment run (without parameters for algorithms)
@@ -28,11 +41,14 @@ SUBSEQ_RUN_COMMAND = "streampref -e {env} -d {det} -m {max} -s {alg}"
 UTIL_RUN_COMMAND = "streampref -e {env} -o {det} -m {max}"
 # Command for calculation of confidence interval
 CONFINTERVAL_COMMAND = "confinterval -i {inf} -o {outf} -k {keyf}"
+# Command binding an experiment run to a list of CPUs
+TASKSET_COMMAND = "taskset -c {cpus} {cmd}"
 
 # Dictionary of run commands
 RUN_DICT = {}
 # CQL run command
 RUN_DICT[CQL_ALG] = SIMPLE_RUN_COMMAND
+RUN_DICT[CQL_DELTA_ALG] = SIMPLE_RUN_COMMAND
 # SEQ run command
 RUN_DICT[SEQ_ALG] = SIMPLE_RUN_COMMAND
 # Temporal preference run commands
@@ -48,10 +64,125 @@ RUN_DICT[INC_SUBSEQ_ALG] = SUBSEQ_RUN_COMMAND
 RUN_DICT[MINSEQ_ALG] = SIMPLE_RUN_COMMAND
 RUN_DICT[MAXSEQ_ALG] = SIMPLE_RUN_COMMAND
 
+# Critical values of Student's t distribution (95% confidence, two-sided)
+# for 1 to 30 degrees of freedom
+T_VALUE_LIST = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306,
+                2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120,
+                2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064,
+                2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+# Critical value of normal distribution (95% confidence, two-sided)
+NORMAL_VALUE = 1.960
+# Default maximum number of runs of each experiment (adaptive runs)
+DEF_MAX_RUN_COUNT = 10
+# Default modified z-score of runtime outliers (adaptive runs)
+DEF_OUTLIER_SCORE = 3.5
 
-def run(configuration, experiment_conf, count):
+# Lock for output of concurrent runs
+_PRINT_LOCK = threading.Lock()
+# Data files expanded for running experiments (number of runs using them)
+_EXPANDED_DICT = {}
+_EXPANDED_LOCK = threading.Lock()
+
+
+def report(text):
+    '''
+    Print progress output (lines of concurrent runs are not mixed)
+    '''
+    with _PRINT_LOCK:
+        print text
+
+
+def _acquire_data_file(data_file):
+    '''
+    Expand a compressed data file for a run
+    (expanded once for concurrent runs)
+    '''
+    with _EXPANDED_LOCK:
+        if data_file in _EXPANDED_DICT:
+            _EXPANDED_DICT[data_file] += 1
+        elif expand_file(data_file):
+            _EXPANDED_DICT[data_file] = 1
+
+
+def _release_data_file(data_file):
+    '''
+    Remove an expanded data file after its last run
+    '''
+    with _EXPANDED_LOCK:
+        if data_file not in _EXPANDED_DICT:
+            return
+        _EXPANDED_DICT[data_file] -= 1
+        if _EXPANDED_DICT[data_file] == 0:
+            del _EXPANDED_DICT[data_file]
+            os.remove(data_file)
+
+
+def execute(configuration, experiment_conf, command, concurrent=False):
+    '''
+    Execute a StreamPref command providing the data stream of experiment
+    (compressed data files are expanded during execution and streams are
+    produced on demand in FIFO mode)
+    Output of concurrent runs is printed at once when they finish
+    '''
+    producer = None
+    data_file = get_data_file(configuration, experiment_conf)
+    if configuration.get(FIFO_MODE, False):
+        producer = start_fifo_producer(configuration, experiment_conf)
+    else:
+        # Expand compressed data file for streampref
+        _acquire_data_file(data_file)
+    if concurrent:
+        process = subprocess.Popen(command, shell=True,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT)
+        output = process.communicate()[0]
+        if output:
+            report(output.rstrip('\n'))
+    else:
+        os.system(command)
+    if producer is not None:
+        stop_fifo_producer(configuration, experiment_conf, producer)
+    else:
+        _release_data_file(data_file)
+
+
+def get_run_workers(configuration):
+    '''
+    Return the number of concurrent runs
+    (limited to the runs having their own CPUs when runs are bound to CPUs)
+    '''
+    workers = configuration.get(RUN_WORKERS, 1)
+    cpus = configuration.get(RUN_CPUS)
+    if cpus is None:
+        return workers
+    if cpus > cpu_count():
+        raise ValueError('CPUs per run (' + str(cpus) + ') greater than '
+                         'available CPUs (' + str(cpu_count()) + ')')
+    if workers * cpus > cpu_count():
+        report('Concurrent runs limited to ' + str(cpu_count() // cpus) +
+               ' (' + str(cpus) + ' CPUs per run, ' + str(cpu_count()) +
+               ' available)')
+        workers = cpu_count() // cpus
+    return workers
+
+
+def get_cpu_list(configuration, slot):
+    '''
+    Return the list of CPUs of a slot of concurrent runs
+    (empty if runs are not bound to CPUs)
+    '''
+    cpus = configuration.get(RUN_CPUS)
+    if cpus is None:
+        return []
+    return range(slot * cpus, (slot + 1) * cpus)
+
+
+def run(configuration, experiment_conf, count, slot=None):
     '''
     Run an experiment
+    (slot is the number of the concurrent run, if any)
+    Return if the experiment was executed (it is skipped if its detail file
+    exists)
     '''
     parameter_conf = configuration[PARAMETER]
     # Get iteration number
@@ -60,7 +191,7 @@ def run(configuration, experiment_conf, count):
     env_file = get_env_file(configuration, experiment_conf)
     # Get detail file
     detail_file = get_detail_file(configuration, experiment_conf, count)
-    if not os.path.isfile(detail_file):
+    if find_file(detail_file) is None:
         command = RUN_DICT[experiment_conf[ALGORITHM]]
         if command == SIMPLE_RUN_COMMAND:
             command = command.format(env=env_file, det=detail_file,
@@ -69,31 +200,289 @@ def run(configuration, experiment_conf, count):
             command = command.format(env=env_file, det=detail_file,
                                      max=iterations,
                                      alg=experiment_conf[ALGORITHM])
-        print command
-        os.system(command)
+        if slot is not None and get_cpu_list(configuration, slot):
+            cpus = ','.join(str(cpu) for cpu in
+                            get_cpu_list(configuration, slot))
+            command = TASKSET_COMMAND.format(cpus=cpus, cmd=command)
+        report(command)
+        # Expand query bundle for streampref
+        query_list = expand_query_bundle(configuration, experiment_conf)
+        execute(configuration, experiment_conf, command,
+                concurrent=slot is not None)
+        for query_file in query_list:
+            os.remove(query_file)
         if not os.path.isfile(detail_file):
-            print 'Detail results file not found: ' + detail_file
-            print "Check if 'streampref' is in path"
+            report('Detail results file not found: ' + detail_file + '\n' +
+                   "Check if 'streampref' is in path")
+        # Compress detail and output files
+        compression = get_compression(configuration)
+        compress_file(detail_file, compression)
+        compress_file(get_out_file(configuration, experiment_conf),
+                      compression)
+        return True
+    return False
+
+
+def _get_run_groups(run_list):
+    '''
+    Return the groups of runs executed in sequence by concurrent runs
+    (runs of the same experiment share its query directory, output file and
+    named pipe, so they are in the same group)
+    '''
+    group_dict = {}
+    group_list = []
+    for exp_conf, count in run_list:
+        if exp_conf not in group_dict:
+            group_dict[exp_conf] = []
+            group_list.append(group_dict[exp_conf])
+        group_dict[exp_conf].append((exp_conf, count))
+    return group_list
+
+
+def run_all(configuration, run_list):
+    '''
+    Run a list of runs (tuples with experiment and run number)
+
+    With more than one worker (RUN_WORKERS), runs are executed concurrently
+    by a pool of threads, each one waiting for its StreamPref process, and
+    every finished run is reported with the number of finished runs
+    '''
+    workers = get_run_workers(configuration)
+    if workers <= 1:
+        for exp_conf, count in run_list:
+            run(configuration, exp_conf, count)
+        return
+    group_list = _get_run_groups(run_list)
+    total = sum(len(group) for group in group_list)
+    # Free slots of concurrent runs (bound to distinct CPUs)
+    slot_queue = Queue()
+    for slot in range(workers):
+        slot_queue.put(slot)
+
+    def run_group(group):
+        '''
+        Run a group of runs in sequence
+        Return a list of tuples with experiment, run number, if it was
+        executed and elapsed time
+        '''
+        slot = slot_queue.get()
+        result_list = []
+        for exp_conf, count in group:
+            start = time.time()
+            executed = run(configuration, exp_conf, count, slot)
+            result_list.append((exp_conf, count, executed,
+                                time.time() - start))
+        slot_queue.put(slot)
+        return result_list
+
+    pool = ThreadPool(workers)
+    done = 0
+    for result_list in pool.imap_unordered(run_group, group_list):
+        for exp_conf, count, executed, elapsed in result_list:
+            done += 1
+            if executed:
+                status = 'finished in {el:.1f}s'.format(el=elapsed)
+            else:
+                status = 'skipped (detail file exists)'
+            report('[{done}/{tot}] {alg} {id}:{cnt} {st}'.format(
+                done=done, tot=total, alg=exp_conf[ALGORITHM],
+                id=get_id(exp_conf, configuration[PARAMETER]), cnt=count,
+                st=status))
+    pool.close()
+    pool.join()
 
 
 def run_experiments(configuration, experiment_list, run_count):
     '''
     Run all experiments
+    (adaptive number of runs if a confidence interval target is configured)
     '''
+    if configuration.get(CI_TARGET) is not None:
+        run_adaptive_experiments(configuration, experiment_list, run_count)
+        return
     for count in range(1, run_count + 1):
-        for exp_conf in experiment_list:
-            run(configuration, exp_conf, count)
+        run_all(configuration, [(exp_conf, count)
+                                for exp_conf in experiment_list])
+
+
+def get_max_run_count(configuration, run_count):
+    '''
+    Return the maximum number of runs of each experiment
+    '''
+    if configuration.get(CI_TARGET) is None:
+        return run_count
+    return max(configuration.get(MAX_RUN_COUNT, DEF_MAX_RUN_COUNT),
+               run_count)
+
+
+def get_run_count(configuration, experiment_conf, run_count):
+    '''
+    Return the number of runs of an experiment
+    (number of existing runs for adaptive runs)
+    '''
+    if configuration.get(CI_TARGET) is None:
+        return run_count
+    count = 0
+    while count < get_max_run_count(configuration, run_count) and \
+            find_file(get_detail_file(configuration, experiment_conf,
+                                      count + 1)) is not None:
+        count += 1
+    return count
+
+
+def _get_median(value_list):
+    '''
+    Return the median of a value list
+    '''
+    value_list = sorted(value_list)
+    middle = len(value_list) // 2
+    if len(value_list) % 2:
+        return value_list[middle]
+    return (value_list[middle - 1] + value_list[middle]) / 2.0
+
+
+def get_relative_half_width(value_list):
+    '''
+    Return the half-width of the 95% confidence interval of the mean of a
+    value list relative to the mean (infinite for less than two values)
+    '''
+    count = len(value_list)
+    if count < 2:
+        return float('inf')
+    mean = float(sum(value_list)) / count
+    variance = sum((value - mean) ** 2 for value in value_list) / (count - 1)
+    if variance == 0:
+        return 0.0
+    if mean <= 0:
+        return float('inf')
+    if count - 1 <= len(T_VALUE_LIST):
+        t_value = T_VALUE_LIST[count - 2]
+    else:
+        t_value = NORMAL_VALUE
+    return t_value * math.sqrt(variance / count) / mean
+
+
+def get_outlier_list(value_dict, score):
+    '''
+    Return the keys of the outliers of a value dictionary
+    (values with modified z-score, based on median absolute deviation, above
+    score)
+    '''
+    if len(value_dict) < 3:
+        return []
+    median = _get_median(value_dict.values())
+    deviation = _get_median([abs(value - median)
+                             for value in value_dict.values()])
+    if deviation == 0:
+        return []
+    return sorted(key for key, value in value_dict.items()
+                  if 0.6745 * abs(value - median) / deviation > score)
+
+
+def _get_runtime(configuration, experiment_conf, count):
+    '''
+    Return the total runtime of a run of an experiment
+    '''
+    return get_summaries(get_detail_file(configuration, experiment_conf,
+                                         count))[0]
+
+
+def _remove_run(configuration, experiment_conf, count):
+    '''
+    Remove the results of a run of an experiment
+    '''
+    detail_file = get_detail_file(configuration, experiment_conf, count)
+    existing_file = find_file(detail_file)
+    if existing_file is not None:
+        os.remove(existing_file)
+
+
+def _update_runtime(configuration, experiment_conf, count, time_dict):
+    '''
+    Store the total runtime of a run of an experiment into a dictionary
+    '''
+    runtime = _get_runtime(configuration, experiment_conf, count)
+    if not math.isnan(runtime):
+        time_dict[count] = runtime
+
+
+def run_adaptive_experiments(configuration, experiment_list, run_count):
+    '''
+    Run all experiments until the confidence interval of their runtimes is
+    narrow enough
+
+    Every round runs once all experiments not finished yet (as fixed runs
+    do). After the minimum number of runs (run count), outlier runs of an
+    experiment are run again (once) and the experiment finishes when the
+    relative half-width of the confidence interval of its runtimes reaches
+    the target or when it reaches the maximum number of runs.
+    Existing runs are not executed again, so interrupted executions are
+    resumed
+    '''
+    target = configuration[CI_TARGET]
+    score = configuration.get(OUTLIER_SCORE, DEF_OUTLIER_SCORE)
+    max_count = get_max_run_count(configuration, run_count)
+    # Runtimes of every run of unfinished experiments
+    runtime_dict = {}
+    # Runs executed again
+    rerun_set = set()
+    active_list = list(experiment_list)
+    for count in range(1, max_count + 1):
+        run_all(configuration, [(exp_conf, count)
+                                for exp_conf in active_list])
+        for exp_conf in active_list:
+            _update_runtime(configuration, exp_conf, count,
+                            runtime_dict.setdefault(exp_conf, {}))
+        if count < run_count:
+            continue
+        # Run outliers again
+        rerun_list = []
+        for exp_conf in active_list:
+            for out_count in get_outlier_list(runtime_dict[exp_conf], score):
+                if (exp_conf, out_count) not in rerun_set:
+                    rerun_set.add((exp_conf, out_count))
+                    report('Running again outlier run {cnt} of {alg} '
+                           '{id}'.format(cnt=out_count,
+                                         alg=exp_conf[ALGORITHM],
+                                         id=get_id(exp_conf,
+                                                   configuration[PARAMETER])))
+                    _remove_run(configuration, exp_conf, out_count)
+                    rerun_list.append((exp_conf, out_count))
+        run_all(configuration, rerun_list)
+        for exp_conf, out_count in rerun_list:
+            _update_runtime(configuration, exp_conf, out_count,
+                            runtime_dict[exp_conf])
+        next_list = []
+        for exp_conf in active_list:
+            exp_id = get_id(exp_conf, configuration[PARAMETER])
+            half_width = get_relative_half_width(
+                runtime_dict[exp_conf].values())
+            if half_width <= target:
+                report('Finished {alg} {id} after {cnt} runs '
+                       '(half-width {hw:.2%})'.format(alg=exp_conf[ALGORITHM],
+                                                      id=exp_id, cnt=count,
+                                                      hw=half_width))
+                del runtime_dict[exp_conf]
+            elif count == max_count:
+                report('Maximum runs of {alg} {id} reached '
+                       '(half-width {hw:.2%})'.format(alg=exp_conf[ALGORITHM],
+                                                      id=exp_id,
+                                                      hw=half_width))
+            else:
+                next_list.append(exp_conf)
+        active_list = next_list
 
 
 def get_summaries(detail_file):
     '''
     Read results from a detail file
     '''
-    # Check if file exists
-    if not os.path.isfile(detail_file):
+    # Check if file (or a compressed version) exists
+    existing_file = find_file(detail_file)
+    if existing_file is None:
         print 'File does not exists: ' + detail_file
         return (float('NaN'), float('NaN'))
-    in_file = open(detail_file, 'r')
+    in_file = open_read_file(existing_file)
     reader = csv.DictReader(in_file, skipinitialspace=True)
     sum_time = 0.0
     sum_memory = 0.0
@@ -107,9 +496,10 @@ def get_summaries(detail_file):
     return (sum_time, sum_memory / count)
 
 
-def summarize(configuration, parameter, run_count):
+def summarize(configuration, parameter, run_count, experiment_set=None):
     '''
     Summarize experiments about range variation
+    (only experiments in experiment set, if given, have values)
     '''
     # Result lists
     time_list = []
@@ -117,23 +507,35 @@ def summarize(configuration, parameter, run_count):
     # Get parameter configurations
     par_conf = configuration[PARAMETER]
     # Get default parameter values
-    exp_conf = get_default_experiment(par_conf)
+    def_conf = Experiment(get_default_experiment(par_conf))
     # For every value of current attributes
     for value in par_conf[parameter][VAR]:
-        # Get experiment configuration for current value
-        exp_conf[parameter] = value
+        # Get experiment configuration of every algorithm for current value
+        exp_list = [def_conf.updated({parameter: value, ALGORITHM: alg},
+                                     par_conf)
+                    for alg in configuration[ALGORITHM_LIST]]
+        count_dict = {exp_conf: get_run_count(configuration, exp_conf,
+                                              run_count)
+                      for exp_conf in exp_list}
         # For every execution
-        for count in range(1, run_count + 1):
+        for count in range(1, max(count_dict.values()) + 1):
             # Creates record for current parameter and value
             time_rec = {parameter: value}
             mem_rec = {parameter: value}
             # For every algorithm
-            for alg in configuration[ALGORITHM_LIST]:
-                exp_conf[ALGORITHM] = alg
+            for exp_conf in exp_list:
+                alg = exp_conf[ALGORITHM]
                 # Get detail file
                 filename = get_detail_file(configuration, exp_conf, count)
                 # Get summarized results
-                runtime, memory = get_summaries(filename)
+                # (experiments of other shards and runs not executed by
+                # adaptive runs are not summarized)
+                if experiment_set is not None and \
+                        exp_conf not in experiment_set or \
+                        count > count_dict[exp_conf]:
+                    runtime, memory = '', ''
+                else:
+                    runtime, memory = get_summaries(filename)
                 time_rec[alg] = runtime
                 mem_rec[alg] = memory
             # Append to result lists
@@ -146,14 +548,78 @@ def summarize(configuration, parameter, run_count):
     write_result_file(filename, mem_list, parameter)
 
 
-def summarize_all(configuration, run_count):
+def summarize_design(configuration, run_count, experiment_set=None):
+    '''
+    Summarize experiments of a design with combined parameters
+    (records identified by experiment identifier, with the values of every
+    design parameter, and only experiments in experiment set, if given,
+    have values)
+    '''
+    # Result lists
+    time_list = []
+    mem_list = []
+    # Get parameter configurations
+    par_conf = configuration[PARAMETER]
+    # Get default parameter values
+    def_conf = Experiment(get_default_experiment(par_conf))
+    # For every combination of parameter values
+    for point in iter_design_points(configuration):
+        point_conf = def_conf.updated(point, par_conf)
+        point[DESIGN_ID] = get_id(point_conf, par_conf)
+        # Get experiment configuration of every algorithm
+        exp_list = [point_conf.updated({ALGORITHM: alg}, par_conf)
+                    for alg in configuration[ALGORITHM_LIST]]
+        count_dict = {exp_conf: get_run_count(configuration, exp_conf,
+                                              run_count)
+                      for exp_conf in exp_list}
+        # For every execution
+        for count in range(1, max(count_dict.values()) + 1):
+            # Creates record for current combination
+            time_rec = point.copy()
+            mem_rec = point.copy()
+            # For every algorithm
+            for exp_conf in exp_list:
+                alg = exp_conf[ALGORITHM]
+                # Get detail file
+                filename = get_detail_file(configuration, exp_conf, count)
+                # Get summarized results
+                # (experiments of other shards and runs not executed by
+                # adaptive runs are not summarized)
+                if experiment_set is not None and \
+                        exp_conf not in experiment_set or \
+                        count > count_dict[exp_conf]:
+                    runtime, memory = '', ''
+                else:
+                    runtime, memory = get_summaries(filename)
+                time_rec[alg] = runtime
+                mem_rec[alg] = memory
+            # Append to result lists
+            time_list.append(time_rec)
+            mem_list.append(mem_rec)
+    # Store summarized results
+    design = get_design(configuration)
+    filename = get_summary_file(configuration, SUM_RUN, design)
+    write_result_file(filename, time_list, DESIGN_ID)
+    filename = get_summary_file(configuration, SUM_MEM, design)
+    write_result_file(filename, mem_list, DESIGN_ID)
+
+
+def summarize_all(configuration, run_count, experiment_list=None):
     '''
     Summarize all results
+    (only experiments in experiment list, if given, have values)
     '''
+    experiment_set = None
+    if experiment_list is not None:
+        experiment_set = set(experiment_list)
+    # Designs with combined parameters have a single summary
+    if get_design(configuration) != ONE_AT_A_TIME_DESIGN:
+        summarize_design(configuration, run_count, experiment_set)
+        return
     # Get parameter having variation
     par_list = get_varied_parameters(configuration[PARAMETER])
     for par in par_list:
-        summarize(configuration, par, run_count)
+        summarize(configuration, par, run_count, experiment_set)
 
 
 def confidence_interval(parameter, in_file, out_file):
@@ -176,6 +642,14 @@ def confidence_interval_all(configuration):
     '''
     Calculate confidence interval for all summarized results
     '''
+    # Designs with combined parameters have a single summary
+    design = get_design(configuration)
+    if design != ONE_AT_A_TIME_DESIGN:
+        for summary in [SUM_RUN, SUM_MEM]:
+            in_file = get_summary_file(configuration, summary, design)
+            out_file = get_result_file(configuration, summary, design)
+            confidence_interval(DESIGN_ID, in_file, out_file)
+        return
     par_list = get_varied_parameters(configuration[PARAMETER])
     # For every parameter
     for parameter in par_list:
@@ -201,15 +675,17 @@ def run_util(configuration, experiment_conf):
     env_file = get_env_util_file(configuration, experiment_conf)
     detail_file = get_detail_util_file(configuration, experiment_conf)
     detail_tmp = detail_file + '.tmp'
-    if not os.path.isfile(detail_file):
+    if find_file(detail_file) is None:
         command = UTIL_RUN_COMMAND.format(env=env_file, det=detail_tmp,
                                           max=iterations)
         print command
-        os.system(command)
+        execute(configuration, experiment_conf, command)
         os.rename(detail_tmp, detail_file)
         if not os.path.isfile(detail_file):
             print 'Detail results file not found: ' + detail_file
             print "Check if 'streampref' is in path"
+        # Compress detail file
+        compress_file(detail_file, get_compression(configuration))
 
 
 def run_util_experiments(configuration, experiment_list):
@@ -224,12 +700,13 @@ def get_util_summaries(detail_file):
     '''
     Read statistical results from a detail file
     '''
-    # Check if file exists
-    if not os.path.isfile(detail_file):
+    # Check if file (or a compressed version) exists
+    existing_file = find_file(detail_file)
+    if existing_file is None:
         print 'File does not exists: ' + detail_file
         return {att: float('NaN') for att in UTIL_ATT_LIST}
     rec_out = {att: 0.0 for att in UTIL_ATT_LIST}
-    in_file = open(detail_file, 'r')
+    in_file = open_read_file(existing_file)
     reader = csv.DictReader(in_file, skipinitialspace=True)
     count = 0
     for rec in reader:
@@ -243,25 +720,39 @@ def get_util_summaries(detail_file):
     return rec_out
 
 
-def summarize_util(configuration, parameter):
+def _get_util_summaries(configuration, experiment_conf, detail_file,
+                        id_set):
+    '''
+    Read statistical results of an experiment
+    (empty values for experiments of other shards)
+    '''
+    if id_set is not None and \
+            get_util_id(configuration, experiment_conf) not in id_set:
+        return {att: '' for att in UTIL_ATT_LIST}
+    return get_util_summaries(detail_file)
+
+
+def summarize_util(configuration, parameter, id_set=None):
     '''
     Summarize statistical experiments
+    (only experiments with identifier in id set, if given, have values)
     '''
     # Result lists
     rec_list = []
     # Get parameter configurations
     par_conf = configuration[PARAMETER]
     # Get default parameter values
-    exp_conf = get_default_experiment(par_conf)
+    def_conf = Experiment(get_default_experiment(par_conf))
     # For every value of current attributes
     for value in par_conf[parameter][VAR]:
         rec = {parameter: value}
-        # Get experiment configuration for current value
-        exp_conf[parameter] = value
         for op_list in configuration[OPERATOR_LIST]:
-            exp_conf[OPERATOR_LIST] = op_list
+            # Get experiment configuration for current value and operators
+            exp_conf = def_conf.updated({parameter: value,
+                                         OPERATOR_LIST: op_list})
             dfile = get_detail_util_file(configuration, exp_conf)
-            rec_util = get_util_summaries(dfile)
+            rec_util = _get_util_summaries(configuration, exp_conf, dfile,
+                                           id_set)
             ope = op_list[-1]
             for att in rec_util:
                 rec[ope+att] = rec_util[att]
@@ -271,17 +762,19 @@ def summarize_util(configuration, parameter):
     write_result_file(filename, rec_list, parameter)
 
 
-def summarize_util_operators(configuration):
+def summarize_util_operators(configuration, id_set=None):
     '''
     Summarize statistical experiments of operators
+    (only experiments with identifier in id set, if given, have values)
     '''
     # Result lists
     rec_list = []
+    # Get default parameter values
+    def_conf = Experiment(get_default_experiment(configuration[PARAMETER]))
     for op_list in configuration[OPERATOR_LIST]:
-        exp_conf = get_default_experiment(configuration[PARAMETER])
-        exp_conf[OPERATOR_LIST] = op_list
+        exp_conf = def_conf.updated({OPERATOR_LIST: op_list})
         dfile = get_detail_util_file(configuration, exp_conf)
-        rec_util = get_util_summaries(dfile)
+        rec_util = _get_util_summaries(configuration, exp_conf, dfile, id_set)
         rec_util['operators'] = str(len(op_list))
         rec_list.append(rec_util)
     # Store summarized results
@@ -289,11 +782,16 @@ def summarize_util_operators(configuration):
     write_result_file(filename, rec_list, 'operators')
 
 
-def summarize_all_util(configuration):
+def summarize_all_util(configuration, experiment_list=None):
     '''
     Summarize all statistical results
+    (only experiments in experiment list, if given, have values)
     '''
+    id_set = None
+    if experiment_list is not None:
+        id_set = set(get_util_id(configuration, exp_conf)
+                     for exp_conf in experiment_list)
     # Get parameter having variation
     for par in get_variated_parameters(configuration):
-        summarize_util(configuration, par)
-        summarize_util_operators(configuration)
+        summarize_util(configuration, par, id_set)
+        summarize_util_operators(configuration, id_set)
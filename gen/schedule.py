@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+'''
+Scheduling of sequence identifiers per instant
+'''
+
+from array import array
+import heapq
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Maximum period of gap patterns of consecutive instants (patterns must be
+# short compared to streams)
+MAX_GAP_PERIOD = 40
+# Maximum difference between a percentage of consecutive instants and the
+# percentage of its gap pattern
+GAP_TOLERANCE = 0.5 / MAX_GAP_PERIOD
+
+
+def gen_id_array(sequence_number):
+    '''
+    Generate a compact array with all possible identifiers for sequences
+    '''
+    return array('l', range(sequence_number))
+
+
+def schedule_ids(id_array, count):
+    '''
+    Move a random choice of identifiers to the first positions of array
+
+    A partial Fisher-Yates shuffle over the first positions gives the same
+    distribution as shuffling the whole array and taking the first
+    identifiers, but costs only O(count) and does not allocate records
+    '''
+    last = len(id_array) - 1
+    for pos in range(count):
+        other = random.randint(pos, last)
+        id_array[pos], id_array[other] = id_array[other], id_array[pos]
+
+
+def gen_zipf_weights(sequence_number, exponent):
+    '''
+    Generate popularity weights of identifiers following a Zipf law
+    (identifier i has rank i + 1)
+    '''
+    return [1.0 / (rank ** exponent)
+            for rank in range(1, sequence_number + 1)]
+
+
+def gen_hotset_weights(sequence_number, hot_set, hot_rate):
+    '''
+    Generate popularity weights of identifiers with a hot set
+    (the first identifiers, a fraction hot_set of all identifiers, receive
+    a fraction hot_rate of the weight)
+    '''
+    hot_number = min(max(int(round(sequence_number * hot_set)), 1),
+                     sequence_number)
+    cold_number = sequence_number - hot_number
+    if cold_number == 0:
+        return [1.0] * sequence_number
+    return [hot_rate / hot_number] * hot_number + \
+        [(1.0 - hot_rate) / cold_number] * cold_number
+
+
+def schedule_weighted_ids(weight_list, count):
+    '''
+    Return a random choice of identifiers (without replacement) where the
+    probability of every identifier is proportional to its weight
+
+    Every identifier draws an exponential variable divided by its weight
+    and the identifiers with the smallest values are chosen, in increasing
+    order of value (exponential race)
+    '''
+    key_list = [random.expovariate(1.0) / weight if weight > 0
+                else float('inf') for weight in weight_list]
+    return heapq.nsmallest(count, range(len(key_list)),
+                           key=key_list.__getitem__)
+
+
+def schedule_id_block(rand_state, id_array, id_block, weight_array=None):
+    '''
+    Fill every line of a NumPy block (one line per instant) with a random
+    choice of identifiers
+
+    Without weights, the NumPy identifier array is shuffled in place at
+    every instant. Otherwise, identifiers are chosen by an exponential race
+    (see schedule_weighted_ids) computed for all instants at once
+    '''
+    count = id_block.shape[1]
+    if weight_array is None:
+        for instant in range(id_block.shape[0]):
+            rand_state.shuffle(id_array)
+            id_block[instant] = id_array[:count]
+        return
+    with numpy.errstate(divide='ignore'):
+        key_block = rand_state.standard_exponential(
+            size=(id_block.shape[0], len(weight_array))) / weight_array
+    if count == 0:
+        return
+    # Smallest values of every instant, in increasing order
+    choice_block = key_block.argpartition(count - 1, axis=1)[:, :count]
+    line_index = numpy.arange(id_block.shape[0])[:, numpy.newaxis]
+    order_block = key_block[line_index, choice_block].argsort(axis=1)
+    id_block[:] = id_array[choice_block[line_index, order_block]]
+
+
+def get_gap_percent(period, absent):
+    '''
+    Return the percentage of consecutive instants of a gap pattern
+    '''
+    if absent == 0:
+        return 1.0
+    return float(period - absent - 1) / period
+
+
+def get_gap_period(conseq_percent):
+    '''
+    Return the period and the number of absent instants per period of the
+    gap pattern for a percentage of consecutive instants
+
+    Every period has a single block of absent instants followed by present
+    instants, so the percentage of instants followed by a consecutive
+    instant of the same identifier is (present - 1) / period.
+    Below 1.0, the pattern with the nearest percentage (shortest period on
+    ties) is chosen among patterns with at least one absent and one present
+    instant and period up to MAX_GAP_PERIOD
+    '''
+    if conseq_percent < 0.0 or conseq_percent > 1.0:
+        raise ValueError('Invalid percentage of consecutive instants: ' +
+                         str(conseq_percent))
+    if conseq_percent == 1.0:
+        return (1, 0)
+    best = None
+    best_error = None
+    for period in range(2, MAX_GAP_PERIOD + 1):
+        for absent in range(1, period):
+            error = abs(get_gap_percent(period, absent) - conseq_percent)
+            if best is None or error < best_error:
+                best = (period, absent)
+                best_error = error
+    if best_error > GAP_TOLERANCE:
+        raise ValueError('Percentage of consecutive instants without gap '
+                         'pattern: ' + str(conseq_percent) + ' (nearest: ' +
+                         str(get_gap_percent(*best)) + ')')
+    return best
+
+
+def gen_gap_pattern(conseq_percent):
+    '''
+    Generate the present/absent pattern of a period as a bit array
+    (one byte per instant, identifier with start s is present at instant t
+    if pattern[(t + s) modulo period] is set)
+    '''
+    period, absent = get_gap_period(conseq_percent)
+    return bytearray([0] * absent + [1] * (period - absent))
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+'''
+Sharding of experiments across machines
+
+Every machine runs the same generator with a different shard (i/N) and
+gets a deterministic part of the experiments, balanced by estimated cost.
+Detail and summary files of all shards are merged afterwards into a single
+directory tree.
+'''
+
+import csv
+import os
+import shutil
+
+from gen.directory import MAIN_DIR, DETAIL_DIR, SUMMARY_DIR, write_to_csv
+from gen.experiment import ATT, NSQ, RAN, RUL, LEV, DIRECTORY, \
+    OPERATOR_LIST
+
+
+# Parameters multiplying the estimated cost of an experiment
+COST_PAR_LIST = [ATT, NSQ, RAN, RUL, LEV]
+# Summary values of experiments not summarized by a shard
+MISSING_VALUE_LIST = ['', 'nan']
+
+
+def parse_shard(text):
+    '''
+    Parse a shard argument (i/N, with i from 1 to N)
+    Return a tuple (i, N)
+    '''
+    try:
+        index, count = [int(number) for number in text.split('/')]
+    except ValueError:
+        raise ValueError('Invalid shard (expected i/N): ' + text)
+    if count < 1 or index < 1 or index > count:
+        raise ValueError('Invalid shard (expected i/N): ' + text)
+    return index, count
+
+
+def get_experiment_cost(experiment_conf):
+    '''
+    Return the estimated cost of an experiment
+    (product of attributes, sequences, range, rules, preference levels and
+    number of operators)
+    '''
+    cost = 1
+    for par in COST_PAR_LIST:
+        if par in experiment_conf:
+            cost *= experiment_conf[par]
+    if OPERATOR_LIST in experiment_conf:
+        cost *= len(experiment_conf[OPERATOR_LIST])
+    return cost
+
+
+class ExperimentShard(object):
+    '''
+    Lazy list of the experiments of a shard
+
+    Experiments are assigned in order to the shard with the lowest total
+    cost so far (lowest shard on ties), so every machine computes the same
+    partition without coordination and without storing the experiments of
+    other shards
+    '''
+
+    def __init__(self, experiment_list, shard):
+        self._experiment_list = experiment_list
+        self._index, self._count = shard
+
+    def __iter__(self):
+        cost_list = [0] * self._count
+        for exp_conf in self._experiment_list:
+            shard = cost_list.index(min(cost_list))
+            cost_list[shard] += get_experiment_cost(exp_conf)
+            if shard == self._index - 1:
+                yield exp_conf
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def get_shard_list(experiment_list, shard):
+    '''
+    Return the experiments of a shard (all experiments if shard is None)
+    '''
+    if shard is None:
+        return experiment_list
+    return ExperimentShard(experiment_list, shard)
+
+
+def _get_shard_directory(configuration, shard_dir, directory):
+    '''
+    Return the directory of a shard (shard_dir is its main directory)
+    '''
+    dir_dict = configuration[DIRECTORY]
+    return os.path.join(shard_dir, os.path.relpath(dir_dict[directory],
+                                                   dir_dict[MAIN_DIR]))
+
+
+def merge_details(configuration, shard_dir):
+    '''
+    Copy the detail files of a shard missing in the local detail directory
+    '''
+    detail_dir = configuration[DIRECTORY][DETAIL_DIR]
+    source_dir = _get_shard_directory(configuration, shard_dir, DETAIL_DIR)
+    for root, _, file_list in os.walk(source_dir):
+        target_dir = os.path.join(detail_dir,
+                                  os.path.relpath(root, source_dir))
+        if not os.path.exists(target_dir):
+            os.makedirs(target_dir)
+        for filename in sorted(file_list):
+            target_file = os.path.join(target_dir, filename)
+            # Partial files of interrupted executions are skipped
+            if filename.endswith('.tmp') or os.path.exists(target_file):
+                continue
+            shutil.copyfile(os.path.join(root, filename),
+                            target_file + '.tmp')
+            os.rename(target_file + '.tmp', target_file)
+
+
+def _read_summary(filename):
+    '''
+    Read a summary file
+    Return its field list and record list
+    '''
+    in_file = open(filename, 'r')
+    reader = csv.DictReader(in_file)
+    record_list = list(reader)
+    in_file.close()
+    return reader.fieldnames, record_list
+
+
+def merge_summary_files(filename, shard_file_list):
+    '''
+    Merge summary files of shards into a summary file
+    Records are matched by their key (first field) and position among the
+    records with the same key, and every value is taken from the first shard
+    having it (shards have values only for their own experiments)
+    '''
+    field_list = []
+    # Keys in order of first occurrence
+    key_list = []
+    record_dict = {}
+    for shard_file in shard_file_list:
+        shard_field_list, shard_list = _read_summary(shard_file)
+        field_list += [field for field in shard_field_list
+                       if field not in field_list]
+        key_field = shard_field_list[0]
+        position_dict = {}
+        for shard_rec in shard_list:
+            key = shard_rec[key_field]
+            if key not in position_dict:
+                position_dict[key] = 0
+                if key not in key_list:
+                    key_list.append(key)
+            rec = record_dict.setdefault((key, position_dict[key]), {})
+            position_dict[key] += 1
+            for field, value in shard_rec.items():
+                if rec.get(field, '') in MISSING_VALUE_LIST:
+                    rec[field] = value
+    record_list = []
+    for key in key_list:
+        position = 0
+        while (key, position) in record_dict:
+            record_list.append(record_dict[(key, position)])
+            position += 1
+    write_to_csv(filename, field_list, record_list, overwrite=True)
+
+
+def merge_summaries(configuration, shard_dir_list):
+    '''
+    Merge the summary files of all shards into the local summary directory
+    (local summary files are merged too)
+    '''
+    summary_dir = configuration[DIRECTORY][SUMMARY_DIR]
+    dir_list = [summary_dir] + \
+        [_get_shard_directory(configuration, shard_dir, SUMMARY_DIR)
+         for shard_dir in shard_dir_list]
+    # Summary files of every shard
+    file_dict = {}
+    for directory in dir_list:
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith('.csv'):
+                file_dict.setdefault(filename, []).append(
+                    os.path.join(directory, filename))
+    for filename in sorted(file_dict):
+        merge_summary_files(os.path.join(summary_dir, filename),
+                            file_dict[filename])
+
+
+def merge_shards(configuration, shard_dir_list):
+    '''
+    Merge detail and summary files of shards into the local directories
+    (shard_dir_list has the main directory of every shard)
+    '''
+    summary_dir = configuration[DIRECTORY][SUMMARY_DIR]
+    if not os.path.exists(summary_dir):
+        os.makedirs(summary_dir)
+    for shard_dir in shard_dir_list:
+        merge_details(configuration, shard_dir)
+    merge_summaries(configuration, shard_dir_list)
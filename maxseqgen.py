@@ -11,6 +11,7 @@ from gen.experiment import VAR, DEF, ATT, NSQ, RAN, SLI, MAX, ALGORITHM_LIST, \
     gen_experiment_list
 from gen.query.maxseq import gen_all_queries, gen_all_env
 from gen.run import run_experiments, summarize_all, confidence_interval_all
+from gen.shard import parse_shard, get_shard_list, merge_shards
 
 
 # Parameters configuration
@@ -77,6 +78,11 @@ def get_arguments(print_help=False):
     parser.add_argument('-s', '--summarize', action="store_true",
                         default=False,
                         help='Summarize results')
+    parser.add_argument('--shard', type=parse_shard, default=None,
+                        help='Shard of experiments (i/N, from 1/N to N/N)')
+    parser.add_argument('--merge', nargs='+', default=None, metavar='DIR',
+                        help='Merge details and summaries of shards '
+                        '(main directories of shards)')
     args = parser.parse_args()
     if print_help:
         parser.print_help()
@@ -88,7 +94,7 @@ def main():
     Main routine
     '''
     args = get_arguments()
-    exp_list = gen_experiment_list(MAXSEQ_CONF)
+    exp_list = get_shard_list(gen_experiment_list(MAXSEQ_CONF), args.shard)
     if args.gen:
         create_directories(MAXSEQ_CONF, exp_list)
         print 'Generating stream data'
@@ -102,7 +108,15 @@ def main():
         run_experiments(MAXSEQ_CONF, exp_list, RUN_COUNT)
     elif args.summarize:
         print 'Summarizing results'
-        summarize_all(MAXSEQ_CONF, RUN_COUNT)
+        if args.shard is None:
+            summarize_all(MAXSEQ_CONF, RUN_COUNT)
+            print 'Calculating confidence intervals'
+            confidence_interval_all(MAXSEQ_CONF)
+        else:
+            summarize_all(MAXSEQ_CONF, RUN_COUNT, exp_list)
+    elif args.merge:
+        print 'Merging shards'
+        merge_shards(MAXSEQ_CONF, args.merge)
         print 'Calculating confidence intervals'
         confidence_interval_all(MAXSEQ_CONF)
     else:
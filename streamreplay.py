@@ -0,0 +1,54 @@
+#!/usr/bin/python -u
+# -*- coding: utf-8 -*-
+'''
+Replay of generated data streams through a local socket
+'''
+
+from gen.replay import serve_stream, parse_stream_file, parse_rate, \
+    parse_burst
+
+
+def get_arguments(print_help=False):
+    '''
+    Get arguments
+    '''
+    import argparse
+    parser = argparse.ArgumentParser('StreamReplay')
+    parser.add_argument('-f', '--file', type=parse_stream_file, default=None,
+                        help='Data stream file (CSV)')
+    parser.add_argument('-a', '--address', default=None,
+                        help='Socket address (host:port for TCP, '
+                        'path for Unix socket)')
+    parser.add_argument('-t', '--rate', type=parse_rate, default=None,
+                        help='Target rate (tuples per second)')
+    parser.add_argument('-i', '--interval', type=float, default=None,
+                        help='Interval between instants (seconds), '
+                        'replay paced by timestamp')
+    parser.add_argument('-b', '--burst', type=parse_burst, default=1,
+                        help='Tuples per burst (rate pacing)')
+    parser.add_argument('-w', '--warmup', type=float, default=0.0,
+                        help='Warm-up ramp duration (seconds, rate pacing)')
+    parser.add_argument('-c', '--clients', type=int, default=1,
+                        help='Number of clients to serve')
+    args = parser.parse_args()
+    if print_help:
+        parser.print_help()
+    return args
+
+
+def main():
+    '''
+    Main routine
+    '''
+    args = get_arguments()
+    if args.file is None or args.address is None or \
+            (args.rate is not None and args.interval is not None):
+        get_arguments(True)
+        return
+    serve_stream(args.file, args.address, rate=args.rate,
+                 interval=args.interval, burst=args.burst,
+                 ramp=args.warmup, clients=args.clients)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+'''
+Small configurations of experiments shared by tests
+'''
+
+import csv
+
+import pytest
+
+from gen.directory import DIR_LIST, MAIN_DIR, create_directories
+from gen.experiment import ATT, NSQ, PCT, RAN, SLI, VAR, DEF, PARAMETER, \
+    DIRECTORY, ALGORITHM_LIST, MAX_VALUE, TUPLE_RATE, CQL_ALG, SEQ_ALG, \
+    INC_SUBSEQ_ALG, Experiment, get_default_experiment
+
+
+def get_configuration(main_dir, conseq=False):
+    '''
+    Return a small configuration of SEQ experiments (CONSEQ experiments
+    if conseq is true) with directories inside main_dir
+    '''
+    dir_dict = {dire: main_dir + '/' + dire for dire in DIR_LIST}
+    dir_dict[MAIN_DIR] = main_dir
+    parameter_conf = {
+        ATT: {VAR: [2, 3], DEF: 3},
+        NSQ: {VAR: [4, 8], DEF: 4},
+        RAN: {VAR: [2, 4], DEF: 4},
+        SLI: {VAR: [1, 2], DEF: 1}
+        }
+    configuration = {
+        ALGORITHM_LIST: [CQL_ALG, SEQ_ALG],
+        DIRECTORY: dir_dict,
+        PARAMETER: parameter_conf,
+        MAX_VALUE: 8,
+        TUPLE_RATE: 0.5
+        }
+    if conseq:
+        parameter_conf[PCT] = {VAR: [0.0, 0.5, 1.0], DEF: 0.5}
+        configuration[ALGORITHM_LIST] = [CQL_ALG, INC_SUBSEQ_ALG]
+        del configuration[TUPLE_RATE]
+    return configuration
+
+
+def get_default(configuration, value_dict=None):
+    '''
+    Return the experiment with default parameter values
+    (and the values of value_dict, if given)
+    '''
+    parameter_conf = configuration[PARAMETER]
+    exp_dict = get_default_experiment(parameter_conf)
+    exp_dict.update(value_dict or {})
+    return Experiment(exp_dict, parameter_conf)
+
+
+def read_rows(filename):
+    '''
+    Read the rows of a CSV file (header included)
+    '''
+    in_file = open(filename, 'r')
+    row_list = list(csv.reader(in_file))
+    in_file.close()
+    return row_list
+
+
+@pytest.fixture
+def configuration(tmpdir):
+    '''
+    Configuration of SEQ experiments with directories already created
+    '''
+    conf = get_configuration(str(tmpdir))
+    create_directories(conf, [])
+    return conf
+
+
+@pytest.fixture
+def conseq_configuration(tmpdir):
+    '''
+    Configuration of CONSEQ experiments with directories already created
+    '''
+    conf = get_configuration(str(tmpdir), conseq=True)
+    create_directories(conf, [])
+    return conf
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of CQL queries equivalent to BESTSEQ operator
+'''
+
+import re
+
+from gen.experiment import ATT, CQL_ALG, CQL_DELTA_ALG, LEV
+from gen.query.bestseq import gen_cql_delta_queries, \
+    gen_cql_transitive_queries, get_transitive_query_names
+
+
+class DictBatch(object):
+    '''
+    Query batch kept in a dictionary
+    '''
+
+    def __init__(self):
+        self.text_dict = {}
+
+    def add(self, name, text):
+        '''
+        Add a query file
+        '''
+        self.text_dict[name] = text
+
+
+def get_source_set(query):
+    '''
+    Return the names of the queries read by a query
+    '''
+    return set(re.findall(r'FROM (\w+)', query) +
+               re.findall(r', (\w+) AS np', query))
+
+
+def test_transitive_names():
+    exp_conf = {ATT: 4, LEV: 3}
+    assert get_transitive_query_names(exp_conf) == ['t2', 't3']
+    assert get_transitive_query_names(exp_conf, CQL_DELTA_ALG) == \
+        ['tc2', 'td2', 't2', 'tc3', 'td3', 't3']
+    assert get_transitive_query_names({ATT: 4, LEV: 1}, CQL_DELTA_ALG) == []
+
+
+def test_transitive_files():
+    exp_conf = {ATT: 4, LEV: 3}
+    for algorithm, gen_queries in \
+            [(CQL_ALG, gen_cql_transitive_queries),
+             (CQL_DELTA_ALG, gen_cql_delta_queries)]:
+        batch = DictBatch()
+        gen_queries(exp_conf, batch)
+        assert sorted(batch.text_dict) == sorted(
+            name + '.cql'
+            for name in get_transitive_query_names(exp_conf, algorithm))
+
+
+def test_delta_queries():
+    exp_conf = {ATT: 4, LEV: 3}
+    batch = DictBatch()
+    gen_cql_delta_queries(exp_conf, batch)
+    # Queries read only queries registered before them
+    registered = set(['t1'])
+    for name in get_transitive_query_names(exp_conf, CQL_DELTA_ALG):
+        assert get_source_set(batch.text_dict[name + '.cql']) <= registered
+        registered.add(name)
+    # Level 2 joins first level only, next levels join new comparisons
+    assert get_source_set(batch.text_dict['tc2.cql']) == set(['t1'])
+    assert get_source_set(batch.text_dict['tc3.cql']) == \
+        set(['t2', 'td2'])
+    assert get_source_set(batch.text_dict['td3.cql']) == \
+        set(['tc3', 't2'])
+    assert get_source_set(batch.text_dict['t3.cql']) == set(['t2', 'td3'])
+    assert 'UNION' not in batch.text_dict['tc2.cql']
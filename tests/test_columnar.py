@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of the binary columnar format of data streams
+'''
+
+import numpy
+import pytest
+
+from gen.columnar import ColumnarStreamWriter, get_columnar_file, \
+    read_columnar_stream, get_timestamp_range
+from gen.data import gen_stream
+from gen.experiment import COLUMNAR
+from tests.conftest import get_default, read_rows
+
+
+def test_round_trip(tmpdir):
+    filename = str(tmpdir.join('stream.col'))
+    writer = ColumnarStreamWriter(filename, ['_TS', 'A1', 'A2'])
+    writer.write_rows([[0, 1, 7], [0, 2, 5]])
+    writer.write_rows(numpy.array([[1, 3, -4], [2, 1, 9]]))
+    writer.close()
+    att_list, data = read_columnar_stream(filename)
+    assert att_list == ['_TS', 'A1', 'A2']
+    assert data.tolist() == [[0, 1, 7], [0, 2, 5], [1, 3, -4], [2, 1, 9]]
+    assert get_timestamp_range(data, 1, 2).tolist() == [[1, 3, -4],
+                                                        [2, 1, 9]]
+    assert get_timestamp_range(data, 3, 5).shape == (0, 3)
+
+
+def test_empty_stream(tmpdir):
+    filename = str(tmpdir.join('stream.col'))
+    ColumnarStreamWriter(filename, ['_TS', 'A1']).close()
+    att_list, data = read_columnar_stream(filename)
+    assert att_list == ['_TS', 'A1']
+    assert data.shape == (0, 2)
+
+
+def test_invalid_file(tmpdir):
+    filename = str(tmpdir.join('stream.col'))
+    tmpdir.join('stream.col').write('x' * 64)
+    with pytest.raises(ValueError):
+        read_columnar_stream(filename)
+
+
+def test_same_content_as_csv(configuration, tmpdir):
+    configuration[COLUMNAR] = True
+    filename = str(tmpdir.join('stream.csv'))
+    gen_stream(configuration, get_default(configuration), filename)
+    row_list = read_rows(filename)
+    att_list, data = read_columnar_stream(get_columnar_file(filename))
+    assert att_list == row_list[0]
+    assert data.tolist() == [[int(value) for value in row]
+                             for row in row_list[1:]]
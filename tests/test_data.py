@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of data stream generation
+'''
+
+import filecmp
+import os
+
+import pytest
+
+from gen.data import gen_stream, gen_conseq_stream, gen_all_streams
+from gen.columnar import get_columnar_file
+from gen.directory import create_directories, get_data_file, \
+    get_data_store_file
+from gen.experiment import DATA_ENGINE, PYTHON_ENGINE, NUMPY_ENGINE, \
+    PARAMETER, GEN_WORKERS, SEED, ATT, NSQ, RAN, DATA_STORE, MAX_VALUE, \
+    ATT_PROJECTION, CHUNK_ROWS, COLUMNAR, VAR, get_max_data_timestamp, \
+    get_data_seed, get_data_key, gen_experiment_list
+from gen.metadata import META_SEED, META_KEY, read_metadata
+from tests.conftest import get_configuration, get_default, read_rows
+
+
+ENGINE_LIST = [PYTHON_ENGINE, NUMPY_ENGINE]
+
+
+@pytest.mark.parametrize('engine', ENGINE_LIST)
+def test_stream_structure(configuration, tmpdir, engine):
+    configuration[DATA_ENGINE] = engine
+    filename = str(tmpdir.join('stream.csv'))
+    gen_stream(configuration, get_default(configuration), filename)
+    row_list = read_rows(filename)
+    assert row_list[0] == ['_TS', 'A1', 'A2', 'A3']
+    max_ts = get_max_data_timestamp(configuration[PARAMETER])
+    ts_dict = {}
+    for row in row_list[1:]:
+        ts_dict.setdefault(int(row[0]), []).append(int(row[1]))
+        assert all(0 <= int(value) < 8 for value in row[2:])
+    assert sorted(ts_dict) == range(max_ts + 1)
+    # Two distinct identifiers (4 sequences, tuple rate 0.5) per instant
+    for id_list in ts_dict.values():
+        assert len(set(id_list)) == 2
+        assert all(0 <= id_value < 4 for id_value in id_list)
+
+
+@pytest.mark.parametrize('engine', ENGINE_LIST)
+def test_stream_is_deterministic(configuration, tmpdir, engine):
+    configuration[DATA_ENGINE] = engine
+    first_file = str(tmpdir.join('first.csv'))
+    second_file = str(tmpdir.join('second.csv'))
+    gen_stream(configuration, get_default(configuration), first_file)
+    gen_stream(configuration, get_default(configuration), second_file)
+    assert filecmp.cmp(first_file, second_file, shallow=False)
+
+
+def test_data_seed(configuration):
+    exp_conf = get_default(configuration)
+    seed = get_data_seed(configuration, exp_conf)
+    # Seed depends only on base seed and data parameters
+    assert get_data_seed(configuration, exp_conf.updated({RAN: 2})) == seed
+    assert get_data_seed(configuration, exp_conf.updated({NSQ: 8})) != seed
+    assert get_data_seed(configuration, exp_conf.updated({ATT: 2})) != seed
+    configuration[SEED] = 1
+    assert get_data_seed(configuration, exp_conf) != seed
+
+
+def test_parallel_generation(tmpdir):
+    conf_list = []
+    for workers in [1, 3]:
+        conf = get_configuration(str(tmpdir.join(str(workers))))
+        conf[GEN_WORKERS] = workers
+        exp_list = gen_experiment_list(conf)
+        create_directories(conf, exp_list)
+        gen_all_streams(conf, exp_list)
+        conf_list.append(conf)
+    # Files do not depend on the number of workers
+    for exp_conf in exp_list:
+        file_list = [get_data_file(conf, exp_conf) for conf in conf_list]
+        assert filecmp.cmp(file_list[0], file_list[1], shallow=False)
+
+
+def test_data_key(configuration):
+    exp_conf = get_default(configuration)
+    key = get_data_key(configuration, exp_conf)
+    assert get_data_key(configuration, exp_conf.updated({RAN: 2})) == key
+    assert get_data_key(configuration, exp_conf.updated({NSQ: 8})) != key
+    configuration[MAX_VALUE] = 16
+    assert get_data_key(configuration, exp_conf) != key
+
+
+def test_shared_data_store(tmpdir):
+    store = str(tmpdir.join('store'))
+    conf_list = []
+    for name in ['first', 'second']:
+        conf = get_configuration(str(tmpdir.join(name)))
+        conf[DATA_STORE] = store
+        exp_list = gen_experiment_list(conf)
+        create_directories(conf, exp_list)
+        gen_all_streams(conf, exp_list)
+        conf_list.append(conf)
+        if name == 'first':
+            store_list = sorted(os.listdir(store))
+    # Second generator reuses the streams of the store
+    assert sorted(os.listdir(store)) == store_list
+    for exp_conf in exp_list:
+        store_file = get_data_store_file(conf_list[0], exp_conf)
+        for conf in conf_list:
+            assert os.path.samefile(get_data_file(conf, exp_conf),
+                                    store_file)
+
+
+def test_projection(configuration):
+    configuration[ATT_PROJECTION] = True
+    exp_list = gen_experiment_list(configuration)
+    gen_all_streams(configuration, exp_list)
+    narrow_conf = get_default(configuration, {ATT: 2})
+    wide_conf = get_default(configuration)
+    narrow_file = get_data_file(configuration, narrow_conf)
+    wide_file = get_data_file(configuration, wide_conf)
+    # Narrow stream has the leading attributes of the widest stream
+    assert read_rows(narrow_file) == \
+        [row[:3] for row in read_rows(wide_file)]
+    # Metadata identify the source stream
+    meta_dict = read_metadata(narrow_file)
+    assert meta_dict[META_SEED] == get_data_seed(configuration, wide_conf)
+    assert meta_dict[META_KEY] == get_data_key(configuration, narrow_conf)
+    assert meta_dict[META_KEY].startswith(
+        get_data_key(configuration, wide_conf))
+
+
+@pytest.mark.parametrize('engine', ENGINE_LIST)
+@pytest.mark.parametrize('chunk_rows', [1, 3, 100])
+def test_chunked_generation(configuration, conseq_configuration, tmpdir,
+                            engine, chunk_rows):
+    for conf, gen_function in [(configuration, gen_stream),
+                               (conseq_configuration, gen_conseq_stream)]:
+        conf[DATA_ENGINE] = engine
+        exp_conf = get_default(conf)
+        full_file = str(tmpdir.join(gen_function.__name__ + '_full.csv'))
+        gen_function(conf, exp_conf, full_file)
+        conf[CHUNK_ROWS] = chunk_rows
+        chunk_file = str(tmpdir.join(gen_function.__name__ + '_chunk.csv'))
+        gen_function(conf, exp_conf, chunk_file)
+        # Chunks do not change generated data
+        assert filecmp.cmp(full_file, chunk_file, shallow=False)
+
+
+@pytest.mark.parametrize('engine', ENGINE_LIST)
+def test_extension(configuration, conseq_configuration, tmpdir, engine):
+    for conf, gen_function in [(configuration, gen_stream),
+                               (conseq_configuration, gen_conseq_stream)]:
+        conf[DATA_ENGINE] = engine
+        conf[COLUMNAR] = True
+        exp_conf = get_default(conf)
+        name = gen_function.__name__
+        extended_file = str(tmpdir.join(name + '_extended.csv'))
+        gen_function(conf, exp_conf, extended_file)
+        # Larger range increases the maximum timestamp
+        conf[PARAMETER][RAN][VAR] = [2, 4, 8]
+        gen_function(conf, exp_conf, extended_file)
+        full_file = str(tmpdir.join(name + '_full.csv'))
+        gen_function(conf, exp_conf, full_file)
+        # Extended files have the content of a full generation
+        assert filecmp.cmp(full_file, extended_file, shallow=False)
+        assert filecmp.cmp(get_columnar_file(full_file),
+                           get_columnar_file(extended_file), shallow=False)
+        max_ts = get_max_data_timestamp(conf[PARAMETER])
+        assert int(read_rows(extended_file)[-1][0]) == max_ts
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of files and directories of experiments
+'''
+
+import os
+
+import pytest
+
+from gen.data import gen_stream
+from gen.directory import CSVStreamWriter, get_compressed_file, find_file, \
+    open_write_file, open_read_file, compress_file, expand_file
+from gen.experiment import GZIP_COMPRESSION, ZSTD_COMPRESSION, COMPRESSION
+from tests.conftest import get_default, read_rows
+
+
+COMPRESSION_LIST = [GZIP_COMPRESSION, ZSTD_COMPRESSION]
+
+
+def test_csv_stream_writer(tmpdir):
+    filename = str(tmpdir.join('stream.csv'))
+    writer = CSVStreamWriter(filename, ['_TS', 'A1'])
+    writer.write_rows([[0, 1], [0, 2]])
+    writer.write_rows([[1, 3]])
+    writer.close()
+    assert read_rows(filename) == [['_TS', 'A1'], ['0', '1'], ['0', '2'],
+                                   ['1', '3']]
+
+
+def test_csv_stream_writer_skips_existing_files(tmpdir):
+    filename = str(tmpdir.join('stream.csv'))
+    tmpdir.join('stream.csv').write('old\n')
+    writer = CSVStreamWriter(filename, ['_TS', 'A1'])
+    assert writer.skipped
+    writer.write_rows([[0, 1]])
+    writer.close()
+    assert tmpdir.join('stream.csv').read() == 'old\n'
+
+
+def test_csv_stream_writer_appends(tmpdir):
+    filename = str(tmpdir.join('stream.csv'))
+    writer = CSVStreamWriter(filename, ['_TS', 'A1'])
+    writer.write_rows([[0, 1]])
+    writer.close()
+    size = os.path.getsize(filename)
+    # Incomplete data after the given size is discarded
+    tmpdir.join('stream.csv').write('1,', mode='a')
+    writer = CSVStreamWriter(filename, ['_TS', 'A1'], append_size=size)
+    writer.write_rows([[1, 2]])
+    writer.close()
+    assert read_rows(filename) == [['_TS', 'A1'], ['0', '1'], ['1', '2']]
+
+
+@pytest.mark.parametrize('compression', COMPRESSION_LIST)
+def test_compressed_round_trip(tmpdir, compression):
+    filename = get_compressed_file(str(tmpdir.join('file.csv')),
+                                   compression)
+    out_file = open_write_file(filename, compression)
+    out_file.write('first\n')
+    out_file.close()
+    # Appended data is a new gzip member or zstd frame
+    out_file = open_write_file(filename, compression, append=True)
+    out_file.write('second\n')
+    out_file.close()
+    in_file = open_read_file(filename)
+    assert in_file.read() == 'first\nsecond\n'
+    in_file.close()
+
+
+@pytest.mark.parametrize('compression', COMPRESSION_LIST)
+def test_compress_and_expand_file(tmpdir, compression):
+    filename = str(tmpdir.join('file.csv'))
+    tmpdir.join('file.csv').write('a,b\n1,2\n')
+    assert find_file(filename) == filename
+    compress_file(filename, compression)
+    assert not os.path.exists(filename)
+    assert find_file(filename) == get_compressed_file(filename, compression)
+    assert expand_file(filename)
+    assert tmpdir.join('file.csv').read() == 'a,b\n1,2\n'
+    # Existing files are not expanded again
+    assert not expand_file(filename)
+    assert find_file(str(tmpdir.join('missing.csv'))) is None
+
+
+@pytest.mark.parametrize('compression', COMPRESSION_LIST)
+def test_compressed_stream(configuration, tmpdir, compression):
+    plain_file = str(tmpdir.join('plain.csv'))
+    gen_stream(configuration, get_default(configuration), plain_file)
+    configuration[COMPRESSION] = compression
+    filename = str(tmpdir.join('stream.csv'))
+    gen_stream(configuration, get_default(configuration), filename)
+    in_file = open_read_file(find_file(filename))
+    assert in_file.read() == tmpdir.join('plain.csv').read_binary()
+    in_file.close()
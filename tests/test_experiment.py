@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of experiments and experiment lists
+'''
+
+import pickle
+
+import pytest
+
+from gen.experiment import ALGORITHM, ATT, CQL_ALG, DESIGN, \
+    DESIGN_BUDGET, DESIGN_PARAMETERS, FACTORIAL_DESIGN, \
+    LATIN_HYPERCUBE_DESIGN, NSQ, PARAMETER, RAN, RANDOM_DESIGN, SEED, \
+    SEQ_ALG, SLI, VAR, Experiment, add_experiment, check_design, \
+    gen_experiment_list, get_design_size, get_id, iter_design_points
+from tests.conftest import get_default
+
+
+def test_experiment_immutable(configuration):
+    experiment = get_default(configuration, {ALGORITHM: CQL_ALG})
+    with pytest.raises(AttributeError):
+        experiment.exp_id = 'other'
+    with pytest.raises(TypeError):
+        experiment[ATT] = 2
+    other = experiment.updated({ATT: 2}, configuration[PARAMETER])
+    assert experiment[ATT] == 3
+    assert other[ATT] == 2
+    assert other.exp_id == get_id(other, configuration[PARAMETER])
+
+
+def test_experiment_hash(configuration):
+    experiment = get_default(configuration, {ALGORITHM: CQL_ALG})
+    same = Experiment(dict(experiment.items()))
+    assert same == experiment
+    assert hash(same) == hash(experiment)
+    assert experiment != experiment.updated({ALGORITHM: SEQ_ALG})
+    # Lists are stored as tuples
+    assert Experiment({'a': [1, 2]}) == Experiment({'a': (1, 2)})
+    assert len(set([experiment, same])) == 1
+
+
+def test_experiment_pickle(configuration):
+    experiment = get_default(configuration, {ALGORITHM: CQL_ALG})
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        copy = pickle.loads(pickle.dumps(experiment, protocol))
+        assert copy == experiment
+        assert hash(copy) == hash(experiment)
+        assert copy.exp_id == experiment.exp_id
+
+
+def test_add_experiment():
+    exp_list = []
+    exp_set = set()
+    for value in [1, 2, 1, 3, 2]:
+        add_experiment(exp_list, exp_set, Experiment({ATT: value}))
+    assert exp_list == [Experiment({ATT: value}) for value in [1, 2, 3]]
+
+
+def test_experiment_list(configuration):
+    exp_list = gen_experiment_list(configuration)
+    # Default experiment appears once for each algorithm
+    assert len(exp_list) == len(set(exp_list)) == 2 * (2 + 2 + 2 + 2 - 3)
+    for experiment in exp_list:
+        assert experiment.exp_id == \
+            get_id(experiment, configuration[PARAMETER])
+
+
+def get_design_conf(configuration, design, budget=None):
+    '''
+    Return a configuration with an experiment design
+    '''
+    design_conf = dict(configuration)
+    design_conf[DESIGN] = design
+    if budget is not None:
+        design_conf[DESIGN_BUDGET] = budget
+    return design_conf
+
+
+def get_point_set(design_conf):
+    '''
+    Return the combinations of an experiment design as a set of tuples
+    '''
+    return set(tuple(sorted(point.items()))
+               for point in iter_design_points(design_conf))
+
+
+def test_factorial_design(configuration):
+    design_conf = get_design_conf(configuration, FACTORIAL_DESIGN)
+    point_list = list(iter_design_points(design_conf))
+    assert len(point_list) == len(get_point_set(design_conf)) == 16
+    assert get_design_size(design_conf) == 16
+    assert point_list[0] == {ATT: 2, NSQ: 4, RAN: 2, SLI: 1}
+    assert point_list[1] == {ATT: 2, NSQ: 4, RAN: 2, SLI: 2}
+    exp_list = gen_experiment_list(design_conf)
+    assert len(exp_list) == len(list(exp_list)) == 32
+    design_conf[DESIGN_PARAMETERS] = [RAN, ATT]
+    assert list(iter_design_points(design_conf)) == [
+        {ATT: 2, RAN: 2}, {ATT: 2, RAN: 4}, {ATT: 3, RAN: 2},
+        {ATT: 3, RAN: 4}]
+
+
+def test_random_design(configuration):
+    design_conf = get_design_conf(configuration, RANDOM_DESIGN, 5)
+    full_set = get_point_set(get_design_conf(configuration,
+                                             FACTORIAL_DESIGN))
+    point_set = get_point_set(design_conf)
+    assert len(point_set) == get_design_size(design_conf) == 5
+    assert point_set <= full_set
+    # Deterministic for the same seed
+    assert get_point_set(design_conf) == point_set
+    design_conf[SEED] = 1
+    assert get_point_set(design_conf) != point_set
+    # Budget larger than the design
+    design_conf[DESIGN_BUDGET] = 100
+    assert get_point_set(design_conf) == full_set
+
+
+def test_latin_hypercube_design(configuration):
+    design_conf = get_design_conf(configuration, LATIN_HYPERCUBE_DESIGN, 4)
+    point_list = list(iter_design_points(design_conf))
+    assert len(point_list) == get_design_size(design_conf)
+    assert list(iter_design_points(design_conf)) == point_list
+    # Every value is used by the same number of strata
+    design_conf[DESIGN_BUDGET] = 2
+    point_list = list(iter_design_points(design_conf))
+    assert len(point_list) == 2
+    for par in [ATT, NSQ, RAN, SLI]:
+        assert sorted(point[par] for point in point_list) == \
+            configuration[PARAMETER][par][VAR]
+
+
+@pytest.mark.parametrize('design_dict', [
+    {DESIGN: 'other'},
+    {DESIGN: FACTORIAL_DESIGN, DESIGN_PARAMETERS: ['other']},
+    {DESIGN: RANDOM_DESIGN},
+    {DESIGN: LATIN_HYPERCUBE_DESIGN, DESIGN_BUDGET: 0}])
+def test_invalid_design(configuration, design_dict):
+    configuration.update(design_dict)
+    with pytest.raises(ValueError):
+        check_design(configuration)
+    with pytest.raises(ValueError):
+        gen_experiment_list(configuration)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of data streams produced into named pipes
+'''
+
+import os
+
+from gen.data import gen_all_streams, gen_all_conseq_streams
+from gen.directory import get_data_file, get_fifo_file
+from gen.experiment import FIFO_MODE, ALGORITHM, RAN, gen_experiment_list
+from gen.fifo import start_fifo_producer, stop_fifo_producer
+from tests.conftest import get_default
+
+
+def _check_fifo_streams(configuration, gen_function):
+    '''
+    Check that the streams produced into named pipes are the data files of
+    file mode
+    '''
+    exp_list = gen_experiment_list(configuration)
+    gen_function(configuration, exp_list)
+    configuration[FIFO_MODE] = True
+    for exp_conf in exp_list:
+        producer = start_fifo_producer(configuration, exp_conf)
+        fifo_file = open(get_fifo_file(configuration, exp_conf), 'rb')
+        text = fifo_file.read()
+        fifo_file.close()
+        stop_fifo_producer(configuration, exp_conf, producer)
+        data_file = open(get_data_file(configuration, exp_conf), 'rb')
+        assert text == data_file.read()
+        data_file.close()
+        assert not os.path.exists(get_fifo_file(configuration, exp_conf))
+
+
+def test_fifo_stream(configuration):
+    _check_fifo_streams(configuration, gen_all_streams)
+
+
+def test_fifo_conseq_stream(conseq_configuration):
+    _check_fifo_streams(conseq_configuration, gen_all_conseq_streams)
+
+
+def test_fifo_per_experiment(configuration):
+    fifo_set = set(get_fifo_file(configuration, get_default(configuration,
+                                                            value_dict))
+                   for value_dict in [{ALGORITHM: 'cql'}, {ALGORITHM: 'seq'},
+                                      {ALGORITHM: 'cql', RAN: 2}])
+    # Experiments sharing a data stream have their own named pipes
+    assert len(fifo_set) == 3
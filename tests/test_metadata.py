@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of metadata sidecars of generated files
+'''
+
+import hashlib
+
+from gen.data import gen_stream
+from gen.directory import write_to_csv, write_to_txt
+from gen.experiment import PARAMETER, get_max_data_timestamp
+from gen.metadata import META_HASH, META_ROWS, META_SCHEMA, META_SIZE, \
+    META_TS_RANGE, get_meta_file, get_text_metadata, get_valid_metadata, \
+    read_metadata, write_metadata
+from tests.conftest import get_default, read_rows
+
+
+def test_valid_metadata(tmpdir):
+    filename = str(tmpdir.join('file.txt'))
+    tmpdir.join('file.txt').write('abc\n')
+    assert get_valid_metadata(filename) is None
+    write_metadata(filename, {META_ROWS: 1})
+    meta_dict = get_valid_metadata(filename, verify_hash=True)
+    assert meta_dict[META_ROWS] == 1
+    assert meta_dict[META_SIZE] == 4
+    assert meta_dict[META_HASH] == hashlib.sha1('abc\n').hexdigest()
+
+
+def test_invalid_metadata(tmpdir):
+    filename = str(tmpdir.join('file.txt'))
+    tmpdir.join('file.txt').write('abc\n')
+    write_metadata(filename)
+    # Same size, other content (detected only by hash)
+    tmpdir.join('file.txt').write('abd\n')
+    assert get_valid_metadata(filename) is not None
+    assert get_valid_metadata(filename, verify_hash=True) is None
+    # Partial file
+    tmpdir.join('file.txt').write('ab')
+    assert get_valid_metadata(filename) is None
+    # Corrupted sidecar
+    tmpdir.join('file.txt.meta').write('{')
+    assert read_metadata(filename) is None
+
+
+def test_text_metadata():
+    assert get_text_metadata('a\nb\n') == {
+        META_SIZE: 4, META_HASH: hashlib.sha1('a\nb\n').hexdigest(),
+        META_ROWS: 2}
+
+
+def test_write_to_txt(tmpdir):
+    filename = str(tmpdir.join('file.txt'))
+    write_to_txt(filename, 'a\nb\n')
+    assert tmpdir.join('file.txt').read() == 'a\nb\n'
+    assert get_valid_metadata(filename, verify_hash=True)[META_ROWS] == 2
+    write_to_txt(filename, 'c\n')
+    assert tmpdir.join('file.txt').read() == 'c\n'
+
+
+def test_write_to_csv(tmpdir):
+    filename = str(tmpdir.join('file.csv'))
+    write_to_csv(filename, ['a'], [{'a': 1}])
+    # Existing files are kept unless overwrite is true
+    write_to_csv(filename, ['a'], [{'a': 2}])
+    assert read_rows(filename) == [['a'], ['1']]
+    write_to_csv(filename, ['a'], [{'a': 3}], overwrite=True)
+    assert read_rows(filename) == [['a'], ['3']]
+    # Summary files have no sidecar
+    assert not tmpdir.join('file.csv.meta').exists()
+
+
+def test_data_metadata(configuration, tmpdir):
+    filename = str(tmpdir.join('stream.csv'))
+    gen_stream(configuration, get_default(configuration), filename)
+    meta_dict = get_valid_metadata(filename, verify_hash=True)
+    max_ts = get_max_data_timestamp(configuration[PARAMETER])
+    assert meta_dict[META_ROWS] == len(read_rows(filename)) - 1
+    assert meta_dict[META_TS_RANGE] == [0, max_ts]
+    assert meta_dict[META_SCHEMA] == ['_TS', 'A1', 'A2', 'A3']
+    # Partial data files are generated again
+    tmpdir.join('stream.csv').write('_TS,A1,A2,A3\r\n')
+    gen_stream(configuration, get_default(configuration), filename)
+    assert get_valid_metadata(filename, verify_hash=True) == meta_dict
+    assert get_meta_file(filename) == filename + '.meta'
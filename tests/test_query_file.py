@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of query files written in batches
+'''
+
+import os
+import tarfile
+
+from gen.directory import BUNDLE_EXT, QueryFileBatch, expand_query_bundle, \
+    get_query_batch, get_query_dir
+from gen.experiment import ALGORITHM, CQL_ALG, QUERY_BUNDLE
+from gen.metadata import META_EXT, META_HASH, get_directory_metadata, \
+    get_text_metadata
+from tests.conftest import get_default
+
+TEXT_DICT = {'q1.cql': 'SELECT 1;\n', 'q2.cql': 'SELECT 2;\n'}
+
+
+def get_batch(directory, text_dict, bundle=False, store=None):
+    '''
+    Return a query batch with the files of text_dict
+    '''
+    batch = QueryFileBatch(directory, bundle, store)
+    for name, text in text_dict.items():
+        batch.add(name, text)
+    return batch
+
+
+def read_files(directory):
+    '''
+    Return the content of the files of a directory
+    '''
+    text_dict = {}
+    for name in os.listdir(directory):
+        in_file = open(directory + os.sep + name, 'rb')
+        text_dict[name] = in_file.read()
+        in_file.close()
+    return text_dict
+
+
+def test_batch(tmpdir):
+    directory = str(tmpdir.join('queries'))
+    get_batch(directory, TEXT_DICT).flush()
+    assert read_files(directory) == TEXT_DICT
+    assert get_directory_metadata(directory) == \
+        {name: get_text_metadata(text) for name, text in TEXT_DICT.items()}
+    # Single metadata file for the directory
+    assert os.path.isfile(directory + META_EXT)
+
+
+def test_batch_unchanged(tmpdir):
+    directory = str(tmpdir.join('queries'))
+    get_batch(directory, TEXT_DICT).flush()
+    os.utime(directory + os.sep + 'q1.cql', (0, 0))
+    get_batch(directory, TEXT_DICT).flush()
+    # Unchanged files are not written again
+    assert os.path.getmtime(directory + os.sep + 'q1.cql') == 0
+
+
+def test_batch_partial(tmpdir):
+    directory = str(tmpdir.join('queries'))
+    get_batch(directory, TEXT_DICT).flush()
+    tmpdir.join('queries', 'q1.cql').write('SEL')
+    get_batch(directory, TEXT_DICT).flush()
+    assert read_files(directory) == TEXT_DICT
+    # Changed contents are written again
+    text_dict = dict(TEXT_DICT, **{'q2.cql': 'SELECT 3;\n'})
+    get_batch(directory, text_dict).flush()
+    assert read_files(directory) == text_dict
+    assert get_directory_metadata(directory)['q2.cql'] == \
+        get_text_metadata('SELECT 3;\n')
+
+
+def test_batch_flush_clears(tmpdir):
+    directory = str(tmpdir.join('queries'))
+    batch = get_batch(directory, TEXT_DICT)
+    batch.flush()
+    batch.add('q3.cql', 'SELECT 3;\n')
+    batch.flush()
+    assert read_files(directory) == \
+        dict(TEXT_DICT, **{'q3.cql': 'SELECT 3;\n'})
+
+
+def test_bundle(configuration):
+    configuration[QUERY_BUNDLE] = True
+    exp_conf = get_default(configuration, {ALGORITHM: CQL_ALG})
+    batch = get_query_batch(configuration, exp_conf)
+    for name, text in TEXT_DICT.items():
+        batch.add(name, text)
+    batch.flush()
+    query_dir = get_query_dir(configuration, exp_conf)
+    assert not os.path.exists(query_dir)
+    bundle = tarfile.open(query_dir + BUNDLE_EXT, 'r')
+    assert sorted(bundle.getnames()) == sorted(TEXT_DICT)
+    bundle.close()
+    # Stale files of interrupted executions are replaced
+    os.makedirs(query_dir)
+    out_file = open(query_dir + os.sep + 'q1.cql', 'w')
+    out_file.write('stale')
+    out_file.close()
+    file_list = expand_query_bundle(configuration, exp_conf)
+    assert sorted(file_list) == \
+        [query_dir + os.sep + name for name in sorted(TEXT_DICT)]
+    assert read_files(query_dir) == TEXT_DICT
+
+
+def test_bundle_missing(configuration):
+    exp_conf = get_default(configuration, {ALGORITHM: CQL_ALG})
+    assert expand_query_bundle(configuration, exp_conf) == []
+
+
+def test_store(tmpdir):
+    store = str(tmpdir.join('store'))
+    os.makedirs(store)
+    dir1 = str(tmpdir.join('q1'))
+    dir2 = str(tmpdir.join('q2'))
+    get_batch(dir1, TEXT_DICT, store=store).flush()
+    get_batch(dir2, {'q3.cql': 'SELECT 1;\n'}, store=store).flush()
+    assert read_files(dir1) == TEXT_DICT
+    # Every distinct content is stored once
+    assert len(os.listdir(store)) == 2
+    assert os.path.samefile(dir1 + os.sep + 'q1.cql',
+                            dir2 + os.sep + 'q3.cql')
+
+
+def test_store_replaced(tmpdir):
+    store = str(tmpdir.join('store'))
+    os.makedirs(store)
+    directory = str(tmpdir.join('queries'))
+    # Files written without a store are linked to the store
+    get_batch(directory, TEXT_DICT).flush()
+    get_batch(directory, TEXT_DICT, store=store).flush()
+    text_hash = get_text_metadata(TEXT_DICT['q1.cql'])[META_HASH]
+    assert os.path.samefile(directory + os.sep + 'q1.cql',
+                            store + os.sep + text_hash + '.cql')
+    # Files linked to the store are replaced without changing the store
+    get_batch(directory, {'q1.cql': 'SELECT 3;\n'}).flush()
+    assert read_files(directory)['q1.cql'] == 'SELECT 3;\n'
+    assert sorted(read_files(store).values()) == sorted(TEXT_DICT.values())
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of replay of data streams through sockets
+'''
+
+import socket
+import threading
+
+import pytest
+
+from gen.replay import get_send_time, parse_burst, parse_rate, \
+    parse_stream_file, report_throughput, replay_stream
+
+
+def test_send_time_without_ramp():
+    assert get_send_time(0, 100.0, 0.0) == 0.0
+    assert get_send_time(50, 100.0, 0.0) == 0.5
+
+
+def test_send_time_with_ramp():
+    # Rate grows from 0 to 100 tuples/s in 2 seconds (100 tuples)
+    assert get_send_time(25, 100.0, 2.0) == pytest.approx(1.0)
+    assert get_send_time(100, 100.0, 2.0) == pytest.approx(2.0)
+    assert get_send_time(200, 100.0, 2.0) == pytest.approx(3.0)
+
+
+def test_parse_arguments(tmpdir):
+    assert parse_rate('2.5') == 2.5
+    assert parse_burst('3') == 3
+    tmpdir.join('stream.csv').write('_TS,A1\n')
+    filename = str(tmpdir.join('stream.csv'))
+    assert parse_stream_file(filename) == filename
+    for function, text in [(parse_rate, '0'), (parse_rate, '-1'),
+                           (parse_burst, '0'), (parse_burst, '1.5'),
+                           (parse_stream_file, filename + '.missing')]:
+        with pytest.raises(ValueError):
+            function(text)
+
+
+def test_steady_throughput(capsys):
+    # 100 tuples in 1 second of ramp and 400 tuples in 2 seconds after it
+    report_throughput(500, 3.0, 200.0, 100, 1.0)
+    out = capsys.readouterr()[0]
+    assert 'warm-up: 100 tuples' in out
+    assert 'achieved: 200.0 tuples/s' in out
+    assert '(100.0%)' in out
+
+
+def _read_all(client, received):
+    '''
+    Read a socket until it is closed
+    '''
+    data = client.recv(4096)
+    while data:
+        received.append(data)
+        data = client.recv(4096)
+    client.close()
+
+
+def test_replay_stream(tmpdir):
+    lines = ''.join('{ts},{id}\n'.format(ts=number // 4, id=number % 4)
+                    for number in range(400))
+    tmpdir.join('stream.csv').write('_TS,A1\n' + lines)
+    connection, client = socket.socketpair()
+    received = []
+    reader = threading.Thread(target=_read_all, args=(client, received))
+    reader.start()
+    tuples, elapsed, ramp_tuples, ramp_elapsed = replay_stream(
+        connection, str(tmpdir.join('stream.csv')), rate=2000.0, burst=10,
+        ramp=0.1)
+    connection.close()
+    reader.join()
+    assert ''.join(received) == '_TS,A1\n' + lines
+    assert tuples == 400
+    # Ramp ends after 100 tuples (0.1 seconds)
+    assert 100 <= ramp_tuples < 110
+    assert ramp_elapsed >= 0.1 * 0.99
+    assert elapsed >= get_send_time(390, 2000.0, 0.1) * 0.99
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of rules for queries with temporal preferences
+'''
+
+from gen.experiment import ATT, IND, LEV, MAX_VALUE, RUL
+from gen.query.rule import FIRST, PREV, PREF, NONPREF, TYPE, \
+    compile_rules, gen_rules_dict, get_ceteris_attributes, \
+    get_preferences, get_rule_list, get_temporal_preferences
+
+
+def get_rule_conf(rules, levels, indiff, attributes=6):
+    '''
+    Return an experiment configuration with rule parameters
+    '''
+    return {RUL: rules, LEV: levels, IND: indiff, ATT: attributes}
+
+
+def test_compile_rules():
+    configuration = {MAX_VALUE: 16}
+    exp_conf = get_rule_conf(4, 2, 1)
+    compiled = compile_rules(configuration, exp_conf)
+    rule_dict = gen_rules_dict(configuration, exp_conf)
+    assert compiled.rule_list == tuple(rule_dict[FIRST] + rule_dict[PREV])
+    assert compiled.preferences == get_temporal_preferences(rule_dict)
+    assert [rule[TYPE] for rule in compiled.rule_list] == \
+        [FIRST, FIRST, PREV, PREV]
+    assert [(rule[PREF], rule[NONPREF]) for rule in compiled.rule_list] == \
+        [(0, 1), (1, 2), (0, 1), (1, 2)]
+    assert compiled.preferences.count('\nAND\n') == 3
+    assert get_rule_list(configuration, exp_conf) == compiled.rule_list
+    assert get_preferences(configuration, exp_conf) == compiled.preferences
+
+
+def test_compile_rules_cache():
+    configuration = {MAX_VALUE: 16}
+    compiled = compile_rules(configuration, get_rule_conf(4, 2, 1))
+    # Attributes do not change rules
+    assert compile_rules(configuration, get_rule_conf(4, 2, 1, 8)) \
+        is compiled
+    assert compile_rules(configuration, get_rule_conf(4, 1, 1)) \
+        is not compiled
+    assert compile_rules({MAX_VALUE: 32}, get_rule_conf(4, 2, 1)) \
+        is not compiled
+
+
+def test_ceteris_attributes():
+    assert get_ceteris_attributes(get_rule_conf(4, 2, 1)) == \
+        ('a3', 'a4', 'a5')
+    assert get_ceteris_attributes(get_rule_conf(4, 2, 0, 4)) == ('a3', 'a4')
+    assert get_ceteris_attributes(get_rule_conf(4, 2, 2, 4)) == ()
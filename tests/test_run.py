@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of execution of experiments
+'''
+
+import math
+import os
+
+import pytest
+
+import gen.run
+from gen.directory import get_detail_file
+from gen.experiment import ALGORITHM, ATT, CI_TARGET, CQL_ALG, \
+    MAX_RUN_COUNT, RUN_CPUS, RUN_WORKERS, SEQ_ALG
+from gen.run import DEF_MAX_RUN_COUNT, NORMAL_VALUE, _get_median, \
+    _get_run_groups, get_cpu_list, get_max_run_count, get_outlier_list, \
+    get_relative_half_width, get_run_count, get_run_workers
+from tests.conftest import get_default
+
+
+def test_median():
+    assert _get_median([3, 1, 2]) == 2
+    assert _get_median([4, 1, 3, 2]) == 2.5
+    assert _get_median([5]) == 5
+
+
+def test_relative_half_width():
+    assert get_relative_half_width([]) == float('inf')
+    assert get_relative_half_width([1.0]) == float('inf')
+    assert get_relative_half_width([2.0, 2.0, 2.0]) == 0.0
+    assert get_relative_half_width([-1.0, 1.0]) == float('inf')
+    # Mean 2, standard deviation 1, t value of 2 degrees of freedom
+    assert abs(get_relative_half_width([1.0, 2.0, 3.0]) -
+               4.303 / math.sqrt(3) / 2) < 1e-9
+    # Normal value for many runs
+    value_list = [1.0, 3.0] * 20
+    assert abs(get_relative_half_width(value_list) -
+               NORMAL_VALUE * math.sqrt(40.0 / 39 / 40) / 2) < 1e-9
+
+
+def test_outlier_list():
+    value_dict = {1: 10.0, 2: 10.5, 3: 9.5, 4: 10.2, 5: 30.0}
+    assert get_outlier_list(value_dict, 3.5) == [5]
+    assert get_outlier_list(value_dict, 100) == []
+    # Few values or no deviation
+    assert get_outlier_list({1: 1.0, 2: 100.0}, 3.5) == []
+    assert get_outlier_list({1: 1.0, 2: 1.0, 3: 1.0, 4: 9.0}, 3.5) == []
+
+
+def test_max_run_count():
+    assert get_max_run_count({}, 3) == 3
+    assert get_max_run_count({CI_TARGET: 0.05}, 3) == DEF_MAX_RUN_COUNT
+    assert get_max_run_count({CI_TARGET: 0.05, MAX_RUN_COUNT: 5}, 3) == 5
+    assert get_max_run_count({CI_TARGET: 0.05, MAX_RUN_COUNT: 2}, 3) == 3
+
+
+def test_run_count(configuration):
+    exp_conf = get_default(configuration, {ALGORITHM: CQL_ALG})
+    assert get_run_count(configuration, exp_conf, 3) == 3
+    configuration[CI_TARGET] = 0.05
+    configuration[MAX_RUN_COUNT] = 3
+    assert get_run_count(configuration, exp_conf, 2) == 0
+    # Number of consecutive existing runs (up to maximum)
+    for count in [1, 2, 4]:
+        detail_file = get_detail_file(configuration, exp_conf, count)
+        if not os.path.isdir(os.path.dirname(detail_file)):
+            os.makedirs(os.path.dirname(detail_file))
+        open(detail_file, 'w').close()
+    assert get_run_count(configuration, exp_conf, 2) == 2
+    detail_file = get_detail_file(configuration, exp_conf, 3)
+    open(detail_file, 'w').close()
+    assert get_run_count(configuration, exp_conf, 2) == 3
+
+
+def test_cpu_list():
+    assert get_cpu_list({}, 2) == []
+    assert get_cpu_list({RUN_CPUS: 2}, 0) == [0, 1]
+    assert get_cpu_list({RUN_CPUS: 2}, 3) == [6, 7]
+
+
+def test_run_workers(monkeypatch):
+    monkeypatch.setattr(gen.run, 'cpu_count', lambda: 8)
+    assert get_run_workers({}) == 1
+    assert get_run_workers({RUN_WORKERS: 16}) == 16
+    assert get_run_workers({RUN_WORKERS: 3, RUN_CPUS: 2}) == 3
+    # Concurrent runs limited to the runs having their own CPUs
+    assert get_run_workers({RUN_WORKERS: 3, RUN_CPUS: 3}) == 2
+    with pytest.raises(ValueError):
+        get_run_workers({RUN_WORKERS: 1, RUN_CPUS: 9})
+
+
+def test_run_groups(configuration):
+    exp1 = get_default(configuration, {ALGORITHM: CQL_ALG})
+    exp2 = exp1.updated({ALGORITHM: SEQ_ALG})
+    exp3 = exp1.updated({ATT: 2})
+    run_list = [(exp1, 1), (exp2, 1), (exp1, 2), (exp3, 1), (exp2, 2)]
+    # Runs of the same experiment in the same group (in order)
+    assert _get_run_groups(run_list) == [
+        [(exp1, 1), (exp1, 2)], [(exp2, 1), (exp2, 2)], [(exp3, 1)]]
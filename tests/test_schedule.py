@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of scheduling of sequence identifiers
+'''
+
+import random
+
+import numpy
+import pytest
+
+from gen.schedule import GAP_TOLERANCE, gen_id_array, schedule_ids, \
+    schedule_id_block, get_gap_period, get_gap_percent, gen_gap_pattern, \
+    gen_zipf_weights, gen_hotset_weights, schedule_weighted_ids
+
+
+def test_id_array():
+    assert list(gen_id_array(5)) == [0, 1, 2, 3, 4]
+
+
+def test_schedule_ids_keeps_permutation():
+    random.seed(1)
+    id_array = gen_id_array(10)
+    for _ in range(100):
+        schedule_ids(id_array, 4)
+        assert sorted(id_array) == range(10)
+
+
+def test_schedule_ids_chooses_every_identifier():
+    random.seed(2)
+    id_array = gen_id_array(10)
+    count_list = [0] * 10
+    for _ in range(2000):
+        schedule_ids(id_array, 3)
+        for id_value in id_array[:3]:
+            count_list[id_value] += 1
+    # Every identifier is chosen with probability 3/10
+    assert all(abs(count - 600) < 120 for count in count_list)
+
+
+def test_schedule_id_block():
+    rand_state = numpy.random.RandomState(3)
+    id_array = numpy.arange(6)
+    id_block = numpy.empty((20, 4), dtype=numpy.int64)
+    schedule_id_block(rand_state, id_array, id_block)
+    for line in id_block:
+        assert len(set(line)) == 4
+        assert set(line) <= set(range(6))
+
+
+@pytest.mark.parametrize('conseq_percent, gap_period', [
+    (0.0, (2, 1)), (0.25, (4, 2)), (0.5, (4, 1)), (0.75, (8, 1)),
+    (1.0, (1, 0))])
+def test_legacy_gap_periods(conseq_percent, gap_period):
+    assert get_gap_period(conseq_percent) == gap_period
+
+
+def test_gap_period_tolerance():
+    for step in range(0, 961):
+        conseq_percent = step / 1000.0
+        period, absent = get_gap_period(conseq_percent)
+        assert 1 <= absent < period
+        assert abs(get_gap_percent(period, absent) - conseq_percent) <= \
+            GAP_TOLERANCE
+
+
+@pytest.mark.parametrize('conseq_percent', [-0.1, 0.97, 0.99, 1.5])
+def test_invalid_gap_percent(conseq_percent):
+    with pytest.raises(ValueError):
+        get_gap_period(conseq_percent)
+
+
+@pytest.mark.parametrize('conseq_percent', [0.0, 0.3, 0.5, 0.75, 0.95])
+def test_gap_pattern(conseq_percent):
+    pattern = gen_gap_pattern(conseq_percent)
+    period = len(pattern)
+    # Instants followed by a consecutive instant of the same identifier
+    consecutive = sum(1 for pos in range(period)
+                      if pattern[pos] and pattern[(pos + 1) % period])
+    assert abs(float(consecutive) / period - conseq_percent) <= \
+        GAP_TOLERANCE
+
+
+def test_zipf_weights():
+    assert gen_zipf_weights(3, 1.0) == [1.0, 0.5, 1.0 / 3]
+    assert gen_zipf_weights(3, 0.0) == [1.0, 1.0, 1.0]
+
+
+def test_hotset_weights():
+    # 2 hot identifiers receive 80% of the weight
+    weight_list = gen_hotset_weights(10, 0.2, 0.8)
+    assert weight_list[:2] == [0.4, 0.4]
+    assert sum(weight_list[2:]) == pytest.approx(0.2)
+    # At least one hot identifier
+    assert gen_hotset_weights(3, 0.01, 0.5)[0] == 0.5
+    assert gen_hotset_weights(2, 1.0, 0.8) == [1.0, 1.0]
+
+
+def test_schedule_weighted_ids():
+    random.seed(4)
+    weight_list = [8.0, 1.0, 1.0, 0.0]
+    count_list = [0] * 4
+    for _ in range(2000):
+        id_list = schedule_weighted_ids(weight_list, 2)
+        assert len(set(id_list)) == 2
+        for id_value in id_list:
+            count_list[id_value] += 1
+    # Identifiers without weight are never chosen
+    assert count_list[3] == 0
+    assert count_list[0] > 1900
+    assert abs(count_list[1] - count_list[2]) < 200
+
+
+def test_schedule_weighted_id_block():
+    rand_state = numpy.random.RandomState(5)
+    id_array = numpy.arange(4)
+    id_block = numpy.empty((2000, 2), dtype=numpy.int64)
+    weight_array = numpy.array([8.0, 1.0, 1.0, 0.0])
+    schedule_id_block(rand_state, id_array, id_block, weight_array)
+    for line in id_block:
+        assert line[0] != line[1]
+    count_list = numpy.bincount(id_block.ravel(), minlength=4)
+    assert count_list[3] == 0
+    assert count_list[0] > 1900
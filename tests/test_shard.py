@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of sharding of experiments
+'''
+
+import pytest
+
+from gen.directory import write_to_csv
+from gen.experiment import ALGORITHM, ATT, NSQ, OPERATOR_LIST, \
+    gen_experiment_list
+from gen.shard import get_experiment_cost, get_shard_list, \
+    merge_summary_files, parse_shard
+from tests.conftest import read_rows
+
+
+def test_parse_shard():
+    assert parse_shard('1/1') == (1, 1)
+    assert parse_shard('2/3') == (2, 3)
+    for text in ['0/2', '3/2', '1/0', '1', 'a/2', '1/2/3']:
+        with pytest.raises(ValueError):
+            parse_shard(text)
+
+
+def test_experiment_cost():
+    assert get_experiment_cost({ALGORITHM: 'cql'}) == 1
+    assert get_experiment_cost({ATT: 3, NSQ: 4}) == 12
+    assert get_experiment_cost({ATT: 3, OPERATOR_LIST: ('a', 'b')}) == 6
+
+
+def test_shard_partition(configuration):
+    exp_list = gen_experiment_list(configuration)
+    shard_list = [list(get_shard_list(exp_list, (index, 3)))
+                  for index in range(1, 4)]
+    # Shards are disjoint and complete (in the order of the experiments)
+    assert sorted(sum(shard_list, []), key=exp_list.index) == exp_list
+    assert sum(len(shard) for shard in shard_list) == len(exp_list)
+    # Same partition on every call
+    assert list(get_shard_list(exp_list, (2, 3))) == shard_list[1]
+    assert len(get_shard_list(exp_list, (2, 3))) == len(shard_list[1])
+    assert get_shard_list(exp_list, None) is exp_list
+
+
+def test_shard_balance():
+    exp_list = [{ATT: cost} for cost in [8, 1, 1, 1, 1, 1, 1, 1, 1]]
+    shard_list = [list(get_shard_list(exp_list, (index, 2)))
+                  for index in range(1, 3)]
+    assert shard_list[0] == [{ATT: 8}]
+    assert len(shard_list[1]) == 8
+
+
+def test_merge_summary_files(tmpdir):
+    shard1 = str(tmpdir.join('s1.csv'))
+    shard2 = str(tmpdir.join('s2.csv'))
+    write_to_csv(shard1, ['att', 'cql', 'seq'],
+                 [{'att': 2, 'cql': 1.5, 'seq': ''},
+                  {'att': 3, 'cql': 'nan', 'seq': 2.5}])
+    write_to_csv(shard2, ['att', 'cql', 'seq', 'other'],
+                 [{'att': 3, 'cql': 0.5, 'seq': 9, 'other': 1},
+                  {'att': 2, 'cql': 9, 'seq': 3.5, 'other': ''},
+                  {'att': 4, 'cql': 4.5, 'seq': '', 'other': ''}])
+    merged = str(tmpdir.join('merged.csv'))
+    merge_summary_files(merged, [shard1, shard2])
+    assert read_rows(merged) == [
+        ['att', 'cql', 'seq', 'other'],
+        ['2', '1.5', '3.5', ''],
+        ['3', '0.5', '2.5', '1'],
+        ['4', '4.5', '', '']]
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+'''
+Tests of union trees of CQL equivalent queries
+'''
+
+from gen.experiment import BALANCED_SHAPE, CQL_SHAPE
+from gen.query.basic import UNION_FANOUT, get_union_fanout, \
+    get_union_queries, get_union_tree
+
+
+def get_leaf_list(union_list):
+    '''
+    Return the united query indexes of a union tree
+    '''
+    leaf_list = []
+    for _, child_list in union_list:
+        leaf_list += [child for child in child_list
+                      if isinstance(child, int)]
+    return leaf_list
+
+
+def test_union_fanout():
+    assert get_union_fanout({}) is None
+    assert get_union_fanout({CQL_SHAPE: BALANCED_SHAPE}) == UNION_FANOUT
+
+
+def test_flat_tree():
+    assert get_union_tree(25, 'z') == [('z', range(25))]
+    assert get_union_tree(3, 'z', 3) == [('z', [0, 1, 2])]
+
+
+def test_balanced_tree():
+    union_list = get_union_tree(25, 'z', 10)
+    assert union_list == [
+        ('z_u1_1', range(0, 8)), ('z_u1_2', range(8, 16)),
+        ('z_u1_3', range(16, 25)),
+        ('z', ['z_u1_1', 'z_u1_2', 'z_u1_3'])]
+
+
+def test_balanced_tree_levels():
+    union_list = get_union_tree(100, 'z', 4)
+    # Every query is united once and every union respects the fanout
+    assert get_leaf_list(union_list) == range(100)
+    assert max(len(child_list) for _, child_list in union_list) <= 4
+    # Unions of the same level have (almost) the same size
+    assert min(len(child_list) for _, child_list in union_list[:-1]) >= 3
+    # Unions are registered after their children
+    name_list = [union_name for union_name, _ in union_list]
+    for index, (_, child_list) in enumerate(union_list):
+        for child in child_list:
+            if not isinstance(child, int):
+                assert name_list.index(child) < index
+    assert name_list[-1] == 'z'
+    assert name_list.count('z') == 1
+
+
+def test_union_queries():
+    query_list = ['SELECT 0', 'SELECT 1', 'SELECT 2']
+    assert get_union_queries(query_list, 'z') == \
+        [('z', 'SELECT 0\nUNION\nSELECT 1\nUNION\nSELECT 2;')]
+    assert get_union_queries(query_list, 'z', 2) == [
+        ('z_u1_1', 'SELECT 0;'),
+        ('z_u1_2', 'SELECT 1\nUNION\nSELECT 2;'),
+        ('z', 'SELECT * FROM z_u1_1\nUNION\nSELECT * FROM z_u1_2;')]
@@ -11,6 +11,7 @@ from gen.experiment import RAN, VAR, DEF, MIN, MAX, DIRECTORY, PARAMETER, \
     TUPLE_RATE, gen_util_experiment_list
 from gen.query.util import gen_all_queries, gen_all_env
 from gen.run import run_util_experiments, summarize_all_util
+from gen.shard import parse_shard, get_shard_list, merge_shards
 
 
 # =============================================================================
@@ -96,6 +97,11 @@ def get_arguments(print_help=False):
     parser.add_argument('-s', '--summarize', action="store_true",
                         default=False,
                         help='Summarize results')
+    parser.add_argument('--shard', type=parse_shard, default=None,
+                        help='Shard of experiments (i/N, from 1/N to N/N)')
+    parser.add_argument('--merge', nargs='+', default=None, metavar='DIR',
+                        help='Merge details and summaries of shards '
+                        '(main directories of shards)')
     args = parser.parse_args()
     if print_help:
         parser.print_help()
@@ -107,7 +113,7 @@ def main():
     Main routine
     '''
     args = get_arguments()
-    exp_list = gen_util_experiment_list(UTIL_CONF)
+    exp_list = get_shard_list(gen_util_experiment_list(UTIL_CONF), args.shard)
     if args.gen:
         create_util_directories(UTIL_CONF)
         print 'Generating stream data'
@@ -121,7 +127,13 @@ def main():
         run_util_experiments(UTIL_CONF, exp_list)
     elif args.summarize:
         print 'Summarizing results'
-        summarize_all_util(UTIL_CONF)
+        if args.shard is None:
+            summarize_all_util(UTIL_CONF)
+        else:
+            summarize_all_util(UTIL_CONF, exp_list)
+    elif args.merge:
+        print 'Merging shards'
+        merge_shards(UTIL_CONF, args.merge)
     else:
         get_arguments(True)
 